@@ -1,19 +1,41 @@
 """Admin interface setup for Notifications feature/app"""
 
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.widgets import AdminSplitDateTime
+from django.core.exceptions import ValidationError
 from django.utils.safestring import mark_safe
 
 from .models import (
+    ArchivedNotification,
     Notification,
+    NotificationBatch,
     NotificationOptOut,
     NotificationTarget,
+    QueueHealthSnapshot,
     TargetUserRecord,
 )
 from .utils.admin_site_utils import (
+    EstimatedCountPaginator,
     MeOrAllFilter,
     is_null_filter_factory,
     USER_SEARCH_FIELDS,
 )
+from .utils.bulk import (
+    cancel_notifications,
+    requeue_notifications,
+    reschedule_notifications,
+)
+
+
+class NotificationActionForm(ActionForm):
+    scheduled_delivery = forms.SplitDateTimeField(
+        required=False,
+        widget=AdminSplitDateTime,
+        label="Reschedule to",
+        help_text="Only used by the reschedule action.",
+    )
 
 
 @admin.register(Notification)
@@ -29,13 +51,126 @@ class NotificationAdmin(admin.ModelAdmin):
         is_null_filter_factory("attempted_delivery"),
         "target_user_record__target",
     ]
+    # TargetUserRecord.__str__ needs the user.
+    list_select_related = ["target_user_record__user"]
 
+    # Only search indexed columns, with lookups that can use the indexes.
     search_fields = [
-        "target_user_record__" + field for field in USER_SEARCH_FIELDS
-    ] + ["title", "body"]
+        "target_user_record__user__username__exact",
+        "target_user_record__target_user_id__startswith",
+        "idempotency_key__exact",
+    ]
 
     autocomplete_fields = ["target_user_record"]
 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # These actions run chunked UPDATE statements over the selection, without
+    # loading (or validating) the notifications.
+    action_form = NotificationActionForm
+    actions = ["requeue", "cancel", "reschedule"]
+
+    def requeue(self, request, queryset):
+        count = requeue_notifications(queryset)
+        self.message_user(request, f"Requeued {count} notifications.")
+
+    requeue.short_description = "Requeue failed, throttled or cancelled notifications"
+
+    def cancel(self, request, queryset):
+        count = cancel_notifications(queryset)
+        self.message_user(request, f"Cancelled {count} notifications.")
+
+    cancel.short_description = "Cancel pending notifications"
+
+    def reschedule(self, request, queryset):
+        field = NotificationActionForm.base_fields["scheduled_delivery"]
+        try:
+            scheduled_delivery = field.clean(
+                field.widget.value_from_datadict(request.POST, request.FILES, "scheduled_delivery")
+            )
+        except ValidationError:
+            scheduled_delivery = None
+        if not scheduled_delivery:
+            self.message_user(
+                request, "Pick a date and time to reschedule to.", messages.ERROR
+            )
+            return
+        count = reschedule_notifications(queryset, scheduled_delivery)
+        self.message_user(request, f"Rescheduled {count} notifications.")
+
+    reschedule.short_description = "Reschedule pending notifications"
+
+
+@admin.register(NotificationBatch)
+class NotificationBatchAdmin(admin.ModelAdmin):
+    list_display = [
+        "name",
+        "status",
+        "scheduled_count",
+        "delivered_count",
+        "failed_count",
+        "cancelled_count",
+        "skipped_count",
+        "remaining_count",
+        "audience_count",
+        "created_date",
+    ]
+    list_filter = ["status"]
+    search_fields = ["name"]
+    readonly_fields = [
+        "status",
+        "scheduled_count",
+        "delivered_count",
+        "failed_count",
+        "cancelled_count",
+        "skipped_count",
+        "audience_count",
+        "fanout_cursor",
+        "fanout_completed",
+    ]
+
+    actions = ["pause", "resume", "cancel"]
+
+    def pause(self, request, queryset):
+        count = sum(batch.pause() for batch in queryset)
+        self.message_user(request, f"Paused {count} notifications.")
+
+    pause.short_description = "Pause the selected batches"
+
+    def resume(self, request, queryset):
+        count = sum(batch.resume() for batch in queryset)
+        self.message_user(request, f"Resumed {count} notifications.")
+
+    resume.short_description = "Resume the selected batches"
+
+    def cancel(self, request, queryset):
+        count = sum(batch.cancel() for batch in queryset)
+        self.message_user(request, f"Cancelled {count} notifications.")
+
+    cancel.short_description = "Cancel the selected batches"
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = [
+        "title",
+        "status",
+        "scheduled_delivery",
+        "archived_date",
+    ]
+    list_filter = ["status"]
+    search_fields = ["title"]
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(NotificationOptOut)
 class NotificationOptOutAdmin(admin.ModelAdmin):
@@ -60,8 +195,40 @@ class UserInNotificationTargetAdmin(admin.ModelAdmin):
     ]
 
     list_filter = ["active", MeOrAllFilter, "target"]
+    list_select_related = ["user", "target"]
 
-    search_fields = USER_SEARCH_FIELDS + (
-        "target_user_id",
-        "description",
-    )
+    # Only search indexed columns, with lookups that can use the indexes.
+    search_fields = [
+        "user__username__exact",
+        "target_user_id__startswith",
+    ]
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(QueueHealthSnapshot)
+class QueueHealthSnapshotAdmin(admin.ModelAdmin):
+    """Shows the latest snapshot taken by the `refresh_queue_health` command."""
+
+    list_display = [
+        "target",
+        "status",
+        "pending_count",
+        "due_count",
+        "oldest_due",
+        "lag",
+        "recent_counts",
+        "retry_distribution",
+        "snapshot_date",
+    ]
+    list_filter = ["target", "status"]
+
+    def get_queryset(self, request):
+        return QueueHealthSnapshot.latest()
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,6 @@
+"""
+Building blocks of the `process_notifications` dispatcher.
+
+Each module implements one stage that runs before or while due notifications
+are handed to their notification handlers.
+"""
@@ -0,0 +1,131 @@
+"""
+Per-target circuit breakers, shared across workers through the Django cache.
+
+After `threshold` consecutive failed sends to a target, its breaker opens and
+the remaining due notifications for the target are rescheduled in bulk, without
+spending any of their retries. Once the cooldown has passed, a single probe send
+is let through (half-open): success closes the breaker, failure opens it again.
+
+Settings (circuit breakers are disabled without them):
+
+    NOTIFICATION_SYSTEM_CIRCUIT_BREAKER = {
+        "threshold": 5,
+        "cooldown": 300,
+        "cache": "default",
+    }
+
+Use a cache shared by all workers (e.g. Redis or Memcached) for the state to be
+shared as well.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+DEFAULT_CIRCUIT_BREAKER_SETTINGS = {
+    "threshold": 5,
+    "cooldown": 300,
+    "cache": "default",
+}
+KEY_PREFIX = "notification_system:circuit_breaker"
+
+
+def get_circuit_breaker_settings():
+    """Return the circuit breaker settings with defaults, or None when disabled."""
+    if not getattr(settings, "NOTIFICATION_SYSTEM_CIRCUIT_BREAKER", None):
+        return None
+    return {
+        **DEFAULT_CIRCUIT_BREAKER_SETTINGS,
+        **settings.NOTIFICATION_SYSTEM_CIRCUIT_BREAKER,
+    }
+
+
+class CircuitBreaker:
+    """
+    The circuit breaker of a single target.
+
+    Args:
+        name (str): The notification module name of the target.
+        threshold (int): Consecutive failures after which the breaker opens.
+        cooldown (int): Seconds the breaker stays open before probing.
+        cache (str): The alias of the cache holding the state.
+    """
+
+    def __init__(self, name, threshold, cooldown, cache="default"):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.cache = caches[cache]
+        self.failures_key = f"{KEY_PREFIX}:{name}:failures"
+        self.open_until_key = f"{KEY_PREFIX}:{name}:open_until"
+        self.probe_key = f"{KEY_PREFIX}:{name}:probe"
+
+    @property
+    def open_until(self):
+        """When the breaker is next allowed to probe, or None when closed."""
+        return self.cache.get(self.open_until_key)
+
+    def allow(self) -> bool:
+        """
+        Determine whether a notification may be sent to the target.
+
+        Returns:
+            bool: True while closed, and for the single probe of a half-open
+                breaker. False while open.
+        """
+        open_until = self.open_until
+        if open_until is None:
+            return True
+        if timezone.now() < open_until:
+            return False
+        # Half-open: only one worker gets to probe.
+        return self.cache.add(self.probe_key, True, timeout=self.cooldown)
+
+    def record_success(self):
+        """Close the breaker."""
+        self.cache.delete_many([self.failures_key, self.open_until_key, self.probe_key])
+
+    def record_failure(self) -> bool:
+        """
+        Count a failed send, opening the breaker when the threshold is reached
+        or the probe failed.
+
+        Returns:
+            bool: Whether the breaker is open now.
+        """
+        self.cache.add(self.failures_key, 0, timeout=None)
+        try:
+            failures = self.cache.incr(self.failures_key)
+        except ValueError:
+            # The key was evicted in the meantime.
+            failures = 1
+            self.cache.set(self.failures_key, failures, timeout=None)
+
+        if failures >= self.threshold or self.cache.get(self.probe_key):
+            self.cache.set(
+                self.open_until_key,
+                timezone.now() + timedelta(seconds=self.cooldown),
+                timeout=None,
+            )
+            self.cache.delete(self.probe_key)
+            return True
+        return False
+
+
+class CircuitBreakers:
+    """The circuit breakers of all targets, created as they are needed."""
+
+    def __init__(self, breaker_settings=None):
+        self.settings = (
+            get_circuit_breaker_settings() if breaker_settings is None else breaker_settings
+        )
+        self.breakers = {}
+
+    def __bool__(self):
+        return bool(self.settings)
+
+    def __getitem__(self, name) -> CircuitBreaker:
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(name, **self.settings)
+        return self.breakers[name]
@@ -0,0 +1,165 @@
+"""
+Coalescing of chatty notifications into digests.
+
+Scheduled notifications that have a `digest_key` are held back for a window
+(NOTIFICATION_SYSTEM_DIGEST["window"] seconds) after the oldest of them became
+due. Once the window has passed, all due notifications for the same target user
+record and digest key are replaced by a single digest notification.
+
+Settings (all optional):
+
+    NOTIFICATION_SYSTEM_DIGEST = {
+        "window": 300,
+        "title": "{title} (and {others} more)",
+        "template_name": "notifications/digest.html",
+    }
+
+The title is formatted with `title` (of the oldest notification), `count` and
+`others`. The template is rendered with `notifications`, `count` and `digest_key`.
+Without a template, the HTML bodies of emails are separated by horizontal rules,
+and the plain text bodies of other targets by blank lines.
+"""
+import hashlib
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from ..models import Notification
+from ..utils.bulk import bulk_create_notifications, chunked, set_notification_status
+
+DEFAULT_DIGEST_SETTINGS = {
+    "window": 0,
+    "title": "{title} (and {others} more)",
+    "template_name": None,
+}
+
+
+def get_digest_settings() -> dict:
+    """Return the digest settings, with defaults filled in."""
+    return {
+        **DEFAULT_DIGEST_SETTINGS,
+        **getattr(settings, "NOTIFICATION_SYSTEM_DIGEST", {}),
+    }
+
+
+def held_back_filter(now) -> Q:
+    """
+    Return a filter matching the notifications that may be dispatched, which
+    excludes digest notifications still within their window.
+    """
+    window = get_digest_settings()["window"]
+    return Q(digest_key__isnull=True) | Q(
+        scheduled_delivery__lte=now - timedelta(seconds=window)
+    )
+
+
+def coalesce_notifications(now=None, queryset=None, batch_size: int = 500) -> int:
+    """
+    Replace groups of due notifications sharing a target user record and digest
+    key with a single digest notification.
+
+    Groups are found with one aggregate query. Per chunk of groups, members are
+    fetched with one query, digests are created with one INSERT and members are
+    marked as COALESCED with one UPDATE.
+
+    Args:
+        now (datetime, optional): The current time. Defaults to timezone.now().
+        queryset (QuerySet, optional): Restrict coalescing to these notifications.
+        batch_size (int, optional): Number of groups per chunk. Defaults to 500.
+
+    Returns:
+        int: The number of notifications that were coalesced.
+    """
+    now = now or timezone.now()
+    digest_settings = get_digest_settings()
+    cutoff = now - timedelta(seconds=digest_settings["window"])
+
+    due = (queryset if queryset is not None else Notification.objects.all()).filter(
+        status=Notification.SCHEDULED,
+        digest_key__isnull=False,
+        scheduled_delivery__lte=now,
+    )
+    groups = (
+        due.order_by()
+        .values_list("target_user_record_id", "digest_key")
+        .annotate(count=Count("id"), oldest=Min("scheduled_delivery"))
+        .filter(count__gt=1, oldest__lte=cutoff)
+    )
+
+    coalesced = 0
+    for chunk in chunked(groups.iterator(), batch_size):
+        group_filter = Q()
+        for target_user_record_id, digest_key, _, _ in chunk:
+            group_filter |= Q(target_user_record_id=target_user_record_id, digest_key=digest_key)
+
+        members = {}
+        for notification in (
+            due.filter(group_filter)
+            .select_related("target_user_record__target")
+            .order_by("scheduled_delivery")
+        ):
+            members.setdefault(
+                (notification.target_user_record_id, notification.digest_key), []
+            ).append(notification)
+
+        digests = [
+            _build_digest(group, digest_settings)
+            for group in members.values()
+            if len(group) > 1
+        ]
+        member_ids = [
+            notification.id
+            for group in members.values()
+            if len(group) > 1
+            for notification in group
+        ]
+
+        with transaction.atomic():
+            bulk_create_notifications(digests, check_existing=False)
+            coalesced += set_notification_status(
+                Notification.objects.filter(id__in=member_ids, status=Notification.SCHEDULED),
+                Notification.COALESCED,
+            )
+
+    return coalesced
+
+
+def _build_digest(group, digest_settings) -> Notification:
+    """Build the (unsaved) digest notification of a group of notifications."""
+    first = group[0]
+    context = {
+        "title": first.title,
+        "count": len(group),
+        "others": len(group) - 1,
+    }
+
+    if digest_settings["template_name"]:
+        body = render_to_string(
+            digest_settings["template_name"],
+            {"notifications": group, "count": len(group), "digest_key": first.digest_key},
+        )
+    elif first.target_user_record.target.notification_module_name == "email":
+        body = "\n<hr>\n".join(notification.body for notification in group)
+    else:
+        body = "\n\n".join(notification.body for notification in group)
+
+    member_ids = ",".join(sorted(str(notification.id) for notification in group))
+    batch_ids = {notification.batch_id for notification in group}
+    return Notification(
+        target_user_record_id=first.target_user_record_id,
+        title=digest_settings["title"].format(**context)[:100],
+        body=body,
+        extra=first.extra,
+        status=Notification.SCHEDULED,
+        scheduled_delivery=first.scheduled_delivery,
+        retry_time_interval=first.retry_time_interval,
+        max_retries=first.max_retries,
+        # Coalescing the same group twice must not create two digests.
+        idempotency_key="digest:" + hashlib.sha256(member_ids.encode("utf-8")).hexdigest(),
+        # The digest takes the place of its members in their batch, if they share one.
+        batch_id=batch_ids.pop() if len(batch_ids) == 1 else None,
+    )
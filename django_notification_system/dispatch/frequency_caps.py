@@ -0,0 +1,153 @@
+"""
+Per-user frequency caps, enforced while dispatching.
+
+Caps limit the number of notifications delivered to a user within a sliding
+window. The "user" cap counts deliveries across all targets; any other key is a
+notification module name and counts deliveries to that target only.
+
+Settings (all optional, no caps by default):
+
+    NOTIFICATION_SYSTEM_FREQUENCY_CAPS = {
+        "user": {"limit": 20, "period": 3600},
+        "twilio": {"limit": 5, "period": 3600, "action": "drop"},
+    }
+
+Over-cap notifications are deferred until the window has room again
+("action": "defer", the default) or marked as THROTTLED ("action": "drop").
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Min, Q
+
+from ..models import Notification
+
+USER_CAP = "user"
+DEFER = "defer"
+DROP = "drop"
+
+
+def get_frequency_caps() -> dict:
+    """Return the configured caps, with the defaults filled in."""
+    return {
+        name: {"action": DEFER, **cap}
+        for name, cap in getattr(settings, "NOTIFICATION_SYSTEM_FREQUENCY_CAPS", {}).items()
+    }
+
+
+class FrequencyCaps:
+    """
+    Windowed delivery counts of the users in a batch of notifications.
+
+    The counts are loaded with one aggregate query per batch by `load`, and kept
+    up to date in memory by `check` as notifications are let through.
+
+    Args:
+        now (datetime): The time the dispatch run started.
+        caps (dict, optional): Defaults to the NOTIFICATION_SYSTEM_FREQUENCY_CAPS setting.
+    """
+
+    def __init__(self, now, caps=None):
+        self.now = now
+        self.caps = get_frequency_caps() if caps is None else caps
+        # (cap name, user id) -> number of deliveries within the window
+        self.counts = defaultdict(int)
+        # (cap name, user id) -> oldest delivery within the window
+        self.oldest = {}
+        self.loaded_user_ids = set()
+
+    def __bool__(self):
+        return bool(self.caps)
+
+    def load(self, notifications):
+        """
+        Load the delivery counts of the users in a batch of notifications that
+        have not been loaded yet, with one aggregate query.
+
+        Args:
+            notifications ([Notification]): The batch, with `target_user_record` loaded.
+        """
+        if not self.caps:
+            return
+
+        user_ids = {
+            notification.target_user_record.user_id for notification in notifications
+        } - self.loaded_user_ids
+        if not user_ids:
+            return
+        self.loaded_user_ids |= user_ids
+
+        annotations = {}
+        for i, (name, cap) in enumerate(self.caps.items()):
+            window = Q(attempted_delivery__gte=self.now - timedelta(seconds=cap["period"]))
+            annotations[f"count_{i}"] = Count("id", filter=window)
+            annotations[f"oldest_{i}"] = Min("attempted_delivery", filter=window)
+
+        longest = max(cap["period"] for cap in self.caps.values())
+        rows = (
+            Notification.objects.filter(
+                status=Notification.DELIVERED,
+                target_user_record__user_id__in=user_ids,
+                attempted_delivery__gte=self.now - timedelta(seconds=longest),
+            )
+            .order_by()
+            .values(
+                "target_user_record__user_id",
+                "target_user_record__target__notification_module_name",
+            )
+            .annotate(**annotations)
+        )
+
+        for row in rows:
+            user_id = row["target_user_record__user_id"]
+            module_name = row["target_user_record__target__notification_module_name"]
+            for i, name in enumerate(self.caps):
+                if name != USER_CAP and name != module_name:
+                    continue
+                if not row[f"count_{i}"]:
+                    continue
+                self.counts[name, user_id] += row[f"count_{i}"]
+                oldest = self.oldest.get((name, user_id))
+                if oldest is None or row[f"oldest_{i}"] < oldest:
+                    self.oldest[name, user_id] = row[f"oldest_{i}"]
+
+    def check(self, notification):
+        """
+        Check a notification against the caps. If it may be sent, it is counted
+        right away.
+
+        Args:
+            notification (Notification): A notification about to be sent.
+
+        Returns:
+            tuple: (None, None) if the notification may be sent, otherwise the
+                action to take and, for deferrals, when the window has room again.
+        """
+        user_id = notification.target_user_record.user_id
+        module_name = notification.target_user_record.target.notification_module_name
+        applicable = [
+            name for name in self.caps if name == USER_CAP or name == module_name
+        ]
+
+        exceeded = [
+            name for name in applicable
+            if self.counts[name, user_id] >= self.caps[name]["limit"]
+        ]
+        if not exceeded:
+            for name in applicable:
+                self.counts[name, user_id] += 1
+                self.oldest.setdefault((name, user_id), self.now)
+            return None, None
+
+        if any(self.caps[name]["action"] == DROP for name in exceeded):
+            return DROP, None
+
+        # Deliveries made during this run are dated `now`, so the window has
+        # room again once its oldest delivery expires.
+        retry_at = max(
+            self.oldest.get((name, user_id), self.now)
+            + timedelta(seconds=self.caps[name]["period"])
+            for name in exceeded
+        )
+        return DEFER, retry_at
@@ -0,0 +1,178 @@
+"""
+Per-phase timings and query counts of a `process_notifications` run.
+
+The dispatch loop is split into phases:
+
+* fetch: loading the due notifications,
+* prepare: digests, quiet hours, frequency caps and circuit breakers,
+* render: turning notifications into messages within the handlers, e.g. html2text,
+* send: the rest of the handlers, mostly waiting for the provider,
+* persist: saving each result, and escalations, deferrals and campaign
+  counters once per batch.
+
+Phases may be nested, e.g. render and persist run within send; the time of a
+nested phase only counts towards that phase. Handlers mark their phases with
+the module level `phase`, which does nothing outside of a profiled run. Sends
+are also broken down per target, nested phases included. Query counts are only
+collected with `trace_queries`, through a database execute wrapper.
+"""
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from django.db import connection
+
+PHASES = ("fetch", "prepare", "render", "send", "persist")
+
+# The profile of the run in progress, per thread.
+_active = threading.local()
+
+
+class DispatchProfile:
+    """
+    Collects the time spent, and optionally the queries run, in each phase.
+
+    Example:
+
+        profile = DispatchProfile(trace_queries=True)
+        with profile.tracing():
+            with profile.phase("send", target="email"):
+                send_email(notification)
+        print(profile.summary())
+    """
+
+    def __init__(self, trace_queries: bool = False):
+        self.trace_queries = trace_queries
+        self.seconds = defaultdict(float)
+        self.queries = defaultdict(int)
+        self.calls = defaultdict(int)
+        self.target_seconds = defaultdict(float)
+        self.target_queries = defaultdict(int)
+        self.target_calls = defaultdict(int)
+        self.started = time.perf_counter()
+        self.total_seconds = None
+        self._stack = []
+
+    @contextmanager
+    def tracing(self):
+        """
+        Make this the profile of the phases marked with `phase` within, and
+        count their queries if `trace_queries` is set.
+        """
+        previous = getattr(_active, "profile", None)
+        _active.profile = self
+        try:
+            with ExitStack() as stack:
+                if self.trace_queries:
+                    stack.enter_context(connection.execute_wrapper(self._count_query))
+                yield self
+        finally:
+            _active.profile = previous
+        self.total_seconds = time.perf_counter() - self.started
+
+    def _count_query(self, execute, sql, params, many, context):
+        if self._stack:
+            current = self._stack[-1]
+            self.queries[current["name"]] += 1
+            if current["target"] is not None:
+                self.target_queries[current["target"]] += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def phase(self, name: str, target: str = None):
+        """
+        Time the code run within as part of a phase.
+
+        Args:
+            name (str): One of PHASES.
+            target (str, optional): The notification module name, for sends.
+                Nested phases belong to the target of the enclosing phase.
+        """
+        parent = self._stack[-1] if self._stack else None
+        current = {
+            "name": name,
+            "target": target if target is not None else parent and parent["target"],
+            "nested_seconds": 0.0,
+        }
+        self._stack.append(current)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self._stack.pop()
+            self.seconds[name] += elapsed - current["nested_seconds"]
+            self.calls[name] += 1
+            if parent is not None:
+                parent["nested_seconds"] += elapsed
+            if target is not None:
+                self.target_seconds[target] += elapsed
+                self.target_calls[target] += 1
+
+    def report(self) -> dict:
+        """Return the timings as a JSON serializable dictionary."""
+        total = (
+            self.total_seconds
+            if self.total_seconds is not None
+            else time.perf_counter() - self.started
+        )
+        return {
+            "total_seconds": round(total, 6),
+            "trace_queries": self.trace_queries,
+            "phases": {
+                name: {
+                    "seconds": round(self.seconds[name], 6),
+                    "calls": self.calls[name],
+                    "queries": self.queries[name] if self.trace_queries else None,
+                }
+                for name in PHASES
+            },
+            "targets": {
+                target: {
+                    "seconds": round(self.target_seconds[target], 6),
+                    "notifications": self.target_calls[target],
+                    "queries": self.target_queries[target] if self.trace_queries else None,
+                }
+                for target in sorted(self.target_calls)
+            },
+        }
+
+    def summary(self) -> str:
+        """Return the timings as a table for the console."""
+        report = self.report()
+        total = report["total_seconds"] or 1
+        lines = ["{:<20} {:>10} {:>7} {:>8} {:>8}".format(
+            "Phase", "Seconds", "%", "Calls", "Queries")]
+        rows = [(name, values, values["calls"]) for name, values in report["phases"].items()]
+        rows += [
+            ("  send: " + target, values, values["notifications"])
+            for target, values in report["targets"].items()
+        ]
+        for name, values, calls in rows:
+            lines.append("{:<20} {:>10.3f} {:>7.1f} {:>8} {:>8}".format(
+                name,
+                values["seconds"],
+                100 * values["seconds"] / total,
+                calls,
+                "-" if values["queries"] is None else values["queries"],
+            ))
+        lines.append("{:<20} {:>10.3f}".format("Total", report["total_seconds"]))
+        return "\n".join(lines)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Time the code run within as part of a phase of the profiled
+    `process_notifications` run in progress, if any.
+
+    Args:
+        name (str): One of PHASES, e.g. "render" in a notification handler.
+    """
+    profile = getattr(_active, "profile", None)
+    if profile is None:
+        yield
+        return
+    with profile.phase(name):
+        yield
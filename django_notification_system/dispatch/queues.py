@@ -0,0 +1,148 @@
+"""
+Queue backends, which wake `process_notifications --daemon` when there is work.
+
+Notifications are always stored in, and dispatched from, the notification table.
+A queue backend only decides how the daemon learns that new notifications were
+created: creating notifications calls `notify()`, and between runs the daemon
+calls `wait()`, which returns early when notified.
+
+* `DatabaseQueue` (the default): no signalling, the daemon polls every
+  `poll_interval` seconds.
+* `PostgresQueue`: NOTIFY on a channel when notifications are created, LISTEN in
+  the daemon, which wakes within milliseconds. NOTIFY is transactional, so the
+  daemon is only woken once the notifications are committed.
+* `InMemoryQueue`: a threading.Event, for tests and single process setups.
+
+Configure the backend with the NOTIFICATION_SYSTEM_QUEUE setting, e.g.
+
+    NOTIFICATION_SYSTEM_QUEUE = {
+        "backend": "django_notification_system.dispatch.queues.PostgresQueue",
+        "poll_interval": 30,
+        "options": {"channel": "notifications", "using": "default"},
+    }
+"""
+import select
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.module_loading import import_string
+
+DEFAULT_BACKEND = "django_notification_system.dispatch.queues.DatabaseQueue"
+DEFAULT_POLL_INTERVAL = 5
+
+
+class QueueBackend:
+    """The interface of queue backends."""
+
+    def notify(self):
+        """Signal that notifications were created."""
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Block until notified, or for at most `timeout` seconds.
+
+        Returns:
+            bool: Whether the backend was notified.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Release the resources of the backend."""
+
+
+class DatabaseQueue(QueueBackend):
+    """Poll the notification table; `wait` simply sleeps."""
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+        return False
+
+
+class InMemoryQueue(QueueBackend):
+    """Wake a daemon running in the same process."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def notify(self):
+        self._event.set()
+
+    def wait(self, timeout):
+        notified = self._event.wait(timeout)
+        self._event.clear()
+        return notified
+
+
+class PostgresQueue(QueueBackend):
+    """
+    Wake daemons on any host with PostgreSQL LISTEN/NOTIFY.
+
+    Args:
+        channel (str, optional): The channel name. Defaults to "notifications".
+        using (str, optional): The database alias. Defaults to "default".
+    """
+
+    def __init__(self, channel: str = "notifications", using: str = DEFAULT_DB_ALIAS):
+        if connections[using].vendor != "postgresql":
+            raise ImproperlyConfigured("PostgresQueue requires a PostgreSQL database.")
+        self.channel = channel
+        self.using = using
+        self._listener = None
+
+    def notify(self):
+        # Part of the current transaction, so delivered on commit.
+        with connections[self.using].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, '')", [self.channel])
+
+    def _listen(self):
+        if self._listener is None:
+            # A dedicated connection, outside Django's transaction handling.
+            wrapper = connections[self.using]
+            self._listener = wrapper.get_new_connection(wrapper.get_connection_params())
+            self._listener.autocommit = True
+            with self._listener.cursor() as cursor:
+                cursor.execute('LISTEN "{}"'.format(self.channel.replace('"', '""')))
+        return self._listener
+
+    def wait(self, timeout):
+        listener = self._listen()
+        listener.poll()
+        if not listener.notifies:
+            if select.select([listener], [], [], timeout) == ([], [], []):
+                return False
+            listener.poll()
+        notified = bool(listener.notifies)
+        listener.notifies.clear()
+        return notified
+
+    def close(self):
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+
+def get_queue_settings() -> dict:
+    """Return the NOTIFICATION_SYSTEM_QUEUE setting, with defaults filled in."""
+    queue_settings = getattr(settings, "NOTIFICATION_SYSTEM_QUEUE", {})
+    return {
+        "backend": queue_settings.get("backend", DEFAULT_BACKEND),
+        "poll_interval": queue_settings.get("poll_interval", DEFAULT_POLL_INTERVAL),
+        "options": queue_settings.get("options", {}),
+    }
+
+
+@lru_cache(maxsize=None)
+def _load_queue(backend, options):
+    return import_string(backend)(**dict(options))
+
+
+def get_queue() -> QueueBackend:
+    """Return the configured queue backend, shared by the whole process."""
+    queue_settings = get_queue_settings()
+    return _load_queue(
+        queue_settings["backend"], tuple(sorted(queue_settings["options"].items()))
+    )
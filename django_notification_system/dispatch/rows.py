@@ -0,0 +1,219 @@
+"""
+Lightweight rows of the notifications being dispatched.
+
+The dispatcher only reads a handful of fields of each notification, so rather
+than model instances (with their state, every column and the related user and
+target instances) it loads `values_list` rows into compact `__slots__` objects.
+Notifications of the same target user record share a single
+`TargetUserRecordRow`, and all of them share one `TargetRow` per target.
+
+The rows quack like the models: handlers read the same attributes, set
+`status`, `attempted_delivery` and friends, and call `save()`, which writes the
+changed fields with a single UPDATE. Any other attribute, e.g.
+`notification.created_date` in a custom handler, loads the model instance on
+first use, after which `save()` saves that instance instead.
+"""
+from django.utils import timezone
+
+from ..models import Notification, TargetUserRecord
+from .profiling import phase
+
+
+class _Row:
+    __slots__ = ("_instance",)
+
+    model = None
+    # Fields written by save().
+    saved_fields = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+    def get_instance(self):
+        """Return the model instance of the row, loading it on first use."""
+        if self._instance is None:
+            self._instance = self.model.objects.get(pk=self.id)
+        return self._instance
+
+    def __getattr__(self, name):
+        # Only called for attributes the row does not have.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get_instance(), name)
+
+    def save(self, *args, **kwargs):
+        """Write the saved fields, or the whole instance once it is loaded."""
+        with phase("persist"):
+            if self._instance is not None:
+                for field in self.saved_fields:
+                    setattr(self._instance, field, getattr(self, field))
+                self._instance.save(*args, **kwargs)
+                return
+            self.model.objects.filter(pk=self.id).update(
+                modified_date=timezone.now(),
+                **{field: getattr(self, field) for field in self.saved_fields},
+            )
+
+
+class TargetRow:
+    """The fields of a NotificationTarget used while dispatching."""
+
+    __slots__ = ("id", "name", "notification_module_name")
+
+    def __init__(self, id, name, notification_module_name):
+        self.id = id
+        self.name = name
+        self.notification_module_name = notification_module_name
+
+    def __str__(self):
+        return self.name
+
+
+class TargetUserRecordRow(_Row):
+    """The fields of a TargetUserRecord used while dispatching."""
+
+    __slots__ = ("id", "user_id", "username", "target_user_id", "active", "target")
+
+    model = TargetUserRecord
+    saved_fields = ("active",)
+
+    def __init__(self, id, user_id, username, target_user_id, active, target):
+        self._instance = None
+        self.id = id
+        self.user_id = user_id
+        self.username = username
+        self.target_user_id = target_user_id
+        self.active = active
+        self.target = target
+
+
+class NotificationRow(_Row):
+    """The fields of a Notification used while dispatching."""
+
+    __slots__ = (
+        "id",
+        "target_user_record",
+        "title",
+        "body",
+        "extra",
+        "status",
+        "scheduled_delivery",
+        "attempted_delivery",
+        "retry_time_interval",
+        "retry_attempts",
+        "max_retries",
+        "push_ticket_id",
+        "batch_id",
+    )
+
+    model = Notification
+    saved_fields = (
+        "status",
+        "scheduled_delivery",
+        "attempted_delivery",
+        "retry_attempts",
+        "push_ticket_id",
+    )
+
+    # The statuses, as handlers use e.g. `notification.DELIVERED`.
+    CANCELLED = Notification.CANCELLED
+    COALESCED = Notification.COALESCED
+    DELIVERED = Notification.DELIVERED
+    DELIVERY_FAILURE = Notification.DELIVERY_FAILURE
+    INACTIVE_DEVICE = Notification.INACTIVE_DEVICE
+    OPTED_OUT = Notification.OPTED_OUT
+    PAUSED = Notification.PAUSED
+    RETRY = Notification.RETRY
+    SCHEDULED = Notification.SCHEDULED
+    THROTTLED = Notification.THROTTLED
+
+    def __init__(self, target_user_record, **fields):
+        self._instance = None
+        self.target_user_record = target_user_record
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+    @property
+    def target_user_record_id(self):
+        return self.target_user_record.id
+
+    def __str__(self):
+        return "{} - {} - {}".format(
+            self.target_user_record.username, self.status, self.scheduled_delivery
+        )
+
+
+NOTIFICATION_FIELDS = [
+    field for field in NotificationRow.__slots__ if field != "target_user_record"
+]
+RECORD_FIELDS = [
+    "target_user_record_id",
+    "target_user_record__user_id",
+    "target_user_record__user__username",
+    "target_user_record__target_user_id",
+    "target_user_record__active",
+    "target_user_record__target_id",
+    "target_user_record__target__name",
+    "target_user_record__target__notification_module_name",
+]
+
+
+def load_notification_rows(notifications) -> list:
+    """
+    Load notifications as NotificationRows with one query.
+
+    Args:
+        notifications (QuerySet): The notifications, ordered and sliced as needed.
+
+    Returns:
+        [NotificationRow]: The rows, in the order of the queryset.
+    """
+    records = {}
+    targets = {}
+    rows = []
+    for values in notifications.values_list(*NOTIFICATION_FIELDS, *RECORD_FIELDS):
+        fields = dict(zip(NOTIFICATION_FIELDS, values))
+        (
+            record_id,
+            user_id,
+            username,
+            target_user_id,
+            active,
+            target_id,
+            target_name,
+            module_name,
+        ) = values[len(NOTIFICATION_FIELDS):]
+
+        record = records.get(record_id)
+        if record is None:
+            target = targets.get(target_id)
+            if target is None:
+                target = targets[target_id] = TargetRow(target_id, target_name, module_name)
+            record = records[record_id] = TargetUserRecordRow(
+                record_id, user_id, username, target_user_id, active, target
+            )
+        rows.append(NotificationRow(record, **fields))
+    return rows
+
+
+def bulk_save_notification_rows(rows, fields) -> None:
+    """
+    Write fields of many NotificationRows with `bulk_update`.
+
+    Args:
+        rows ([NotificationRow]): The rows to save.
+        fields ([str]): The fields to write. `modified_date` is always updated.
+    """
+    modified_date = timezone.now()
+    Notification.objects.bulk_update(
+        [
+            Notification(
+                id=row.id,
+                modified_date=modified_date,
+                **{field: getattr(row, field) for field in fields},
+            )
+            for row in rows
+        ],
+        [*fields, "modified_date"],
+    )
@@ -0,0 +1,81 @@
+"""
+Partitioning of the dispatch queue among several `process_notifications` workers.
+
+Every notification carries a `shard_key` from 0 to SHARD_KEYS - 1, derived from
+its target user record. `process_notifications --shard 2/4` only handles the
+second of four contiguous ranges of shard keys, so workers on several hosts
+divide the due notifications without ever touching the same rows, and the
+notifications of a target user record are always sent in order by one worker.
+Notifications without a shard key (e.g. inserted with a plain `bulk_create`)
+are handled by the first shard.
+"""
+from django.db.models import Count, Min, Q
+
+from ..models.notification import SHARD_KEYS
+
+
+def parse_shard(value: str) -> tuple:
+    """
+    Parse a shard of the form "i/N", where 1 <= i <= N.
+
+    Args:
+        value (str): e.g. "2/4".
+
+    Returns:
+        tuple: (i, N)
+
+    Raises:
+        ValueError: When the shard is malformed or out of range.
+    """
+    index, _, count = value.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"A shard looks like 1/4, not {value!r}.")
+    if not 1 <= index <= count <= SHARD_KEYS:
+        raise ValueError(f"A shard i/N needs 1 <= i <= N <= {SHARD_KEYS}, not {value!r}.")
+    return index, count
+
+
+def shard_range(index: int, count: int) -> tuple:
+    """Return the (start, stop) range of shard keys of shard `index` of `count`."""
+    return (index - 1) * SHARD_KEYS // count, index * SHARD_KEYS // count
+
+
+def shard_filter(index: int, count: int) -> Q:
+    """Return a filter selecting the notifications of shard `index` of `count`."""
+    start, stop = shard_range(index, count)
+    query = Q(shard_key__gte=start, shard_key__lt=stop)
+    if index == 1:
+        query |= Q(shard_key__isnull=True)
+    return query
+
+
+def shard_backlog(count: int, queryset) -> list:
+    """
+    Count the notifications of each of `count` shards with one aggregate query.
+
+    Args:
+        count (int): The number of shards.
+        queryset (QuerySet): The notifications to count, e.g. those that are due.
+
+    Returns:
+        [dict]: Per shard, its "shard" ("i/N"), the "count" of notifications and
+        the "oldest" scheduled delivery among them.
+    """
+    backlog = [
+        {"shard": f"{index}/{count}", "count": 0, "oldest": None}
+        for index in range(1, count + 1)
+    ]
+    for row in (
+        queryset.order_by()
+        .values("shard_key")
+        .annotate(count=Count("id"), oldest=Min("scheduled_delivery"))
+    ):
+        shard_key = row["shard_key"] if row["shard_key"] is not None else 0
+        shard = backlog[shard_key * count // SHARD_KEYS]
+        shard["count"] += row["count"]
+        if shard["oldest"] is None or row["oldest"] < shard["oldest"]:
+            shard["oldest"] = row["oldest"]
+    return backlog
+
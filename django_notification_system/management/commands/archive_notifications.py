@@ -0,0 +1,132 @@
+"""Django Management Command."""
+import gzip
+import json
+import time
+from datetime import timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from ...models import ArchivedNotification, Notification
+
+ARCHIVED_FIELDS = [
+    "id",
+    "target_user_record_id",
+    "title",
+    "body",
+    "extra",
+    "status",
+    "scheduled_delivery",
+    "attempted_delivery",
+    "retry_attempts",
+    "created_date",
+]
+
+FINAL_STATUSES = [
+    Notification.CANCELLED,
+    Notification.COALESCED,
+    Notification.DELIVERED,
+    Notification.DELIVERY_FAILURE,
+    Notification.INACTIVE_DEVICE,
+    Notification.OPTED_OUT,
+    Notification.THROTTLED,
+]
+
+
+class Command(BaseCommand):
+    """
+    Move notifications with a final status out of the notification table.
+
+    Notifications scheduled before the retention window are moved in small
+    batches, each in its own short transaction, to the ArchivedNotification
+    table, to a gzipped JSON Lines file (--output) or simply deleted (--delete-only).
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=90,
+            help="Keep notifications scheduled within this many days. Defaults to 90.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of notifications to move per transaction.",
+        )
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=FINAL_STATUSES,
+            help="Only archive notifications with this status. May be repeated. "
+                 "Defaults to all final statuses.",
+        )
+        destination = parser.add_mutually_exclusive_group()
+        destination.add_argument(
+            "--output",
+            help="Append archived notifications to this gzipped JSON Lines file "
+                 "instead of the archive table.",
+        )
+        destination.add_argument(
+            "--delete-only",
+            action="store_true",
+            help="Delete the notifications without archiving them.",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0,
+            help="Seconds to pause between batches to reduce database load.",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        eligible = Notification.objects.filter(
+            status__in=options["status"] or FINAL_STATUSES,
+            scheduled_delivery__lt=cutoff,
+            # Skip notifications whose Expo receipt is still to be checked.
+            push_ticket_id__isnull=True,
+        )
+
+        output = gzip.open(options["output"], "at", encoding="utf-8") if options["output"] else None
+        verb = "Deleted" if options["delete_only"] else "Archived"
+        started = time.monotonic()
+        total = 0
+        try:
+            while True:
+                with transaction.atomic():
+                    ids = list(eligible.values_list("pk", flat=True)[:options["batch_size"]])
+                    if not ids:
+                        break
+                    batch = Notification.objects.filter(pk__in=ids)
+
+                    if output:
+                        for row in batch.values(*ARCHIVED_FIELDS):
+                            output.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+                    elif not options["delete_only"]:
+                        ArchivedNotification.objects.bulk_create(
+                            [ArchivedNotification(**row) for row in batch.values(*ARCHIVED_FIELDS)],
+                            ignore_conflicts=True,
+                        )
+                    batch.delete()
+
+                total += len(ids)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"{verb} {total} notifications "
+                    f"({total / elapsed if elapsed else total:.0f} rows/sec)")
+                if options["sleep"]:
+                    time.sleep(options["sleep"])
+        finally:
+            if output:
+                output.close()
+
+        self.stdout.write(f"Done. {verb} {total} notifications.")
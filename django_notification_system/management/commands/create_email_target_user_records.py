@@ -1,8 +1,13 @@
 """Django Management Command."""
+import time
+
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 
 from ...models import TargetUserRecord, NotificationTarget
+from ...utils.bulk import chunked, upsert_target_user_records
 
 User = get_user_model()
 
@@ -14,26 +19,93 @@ class Command(BaseCommand):
 
     help = __doc__
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of users to synchronize per transaction.",
+        )
+        parser.add_argument(
+            "--deactivate-changed",
+            action="store_true",
+            help="Deactivate email records that no longer match the user's email address.",
+        )
+
     def handle(self, *args, **options):
         """
         This is what is being run by manage.py
         """
-        all_users = User.objects.all()
+        batch_size = options["batch_size"]
+        deactivate_changed = options["deactivate_changed"]
 
         email_target = NotificationTarget.objects.get(
             name='Email', notification_module_name='email')
 
-        for user in all_users:
-            # Calling this will create an email user target for each user.
-            if user.email:
-                TargetUserRecord.objects.update_or_create(
-                    user=user,
-                    target=email_target,
-                    target_user_id=user.email,
-                    defaults={
-                        "active": True,
-                        "description": f"{user.first_name} {user.last_name}'s Email",
-                    },
-                )
-            else:
-                print(f"{user.username} has no email address on record.")
\ No newline at end of file
+        users = (
+            User.objects.only("pk", "username", "email", "first_name", "last_name")
+            .order_by("pk")
+            .iterator(chunk_size=batch_size)
+        )
+
+        started = time.monotonic()
+        processed = created = updated = deactivated = missing_email = 0
+
+        for chunk in chunked(users, batch_size):
+            records = []
+            for user in chunk:
+                if user.email:
+                    records.append(
+                        TargetUserRecord(
+                            user_id=user.pk,
+                            target=email_target,
+                            target_user_id=user.email,
+                            active=True,
+                            description=f"{user.first_name} {user.last_name}'s Email",
+                        )
+                    )
+                else:
+                    missing_email += 1
+                    if options["verbosity"] > 1:
+                        self.stdout.write(
+                            f"{user.username} has no email address on record.")
+
+            with transaction.atomic():
+                chunk_created, chunk_updated = upsert_target_user_records(records)
+                created += chunk_created
+                updated += chunk_updated
+
+                if deactivate_changed and records:
+                    deactivated += self._deactivate_changed(email_target, records)
+
+            processed += len(chunk)
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"Processed {processed} users "
+                f"({processed / elapsed if elapsed else processed:.0f} users/sec)")
+
+        self.stdout.write(
+            f"Created {created}, updated {updated} and deactivated {deactivated} "
+            f"email records. {missing_email} users have no email address on record.")
+
+    @staticmethod
+    def _deactivate_changed(email_target, records):
+        """
+        Deactivate active email records of the users in `records` whose
+        address differs from the user's current email address.
+        """
+        current_emails = {record.user_id: record.target_user_id for record in records}
+        stale_ids = [
+            pk
+            for pk, user_id, target_user_id in TargetUserRecord.objects.filter(
+                target=email_target,
+                user_id__in=current_emails,
+                active=True,
+            ).values_list("id", "user_id", "target_user_id")
+            if current_emails[user_id] != target_user_id
+        ]
+        if stale_ids:
+            TargetUserRecord.objects.filter(id__in=stale_ids).update(
+                active=False, modified_date=timezone.now()
+            )
+        return len(stale_ids)
@@ -0,0 +1,311 @@
+"""Django Management Command."""
+import os
+import random
+import time
+import zlib
+from contextlib import contextmanager, redirect_stdout
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from ...models import Notification, NotificationTarget, TargetUserRecord
+from ...utils.bulk import bulk_create_notifications, chunked
+from ...utils.fake_providers import FakeExpoServer, FakeTwilioServer, SMTPSink
+
+# The share of users with a record on each target.
+DEFAULT_TARGETS = "Email=0.9,Expo=0.6,Twilio=0.2"
+
+WORDS = (
+    "account", "alert", "appointment", "balance", "confirm", "delivery", "event",
+    "invoice", "meeting", "message", "order", "password", "payment", "reminder",
+    "report", "schedule", "shift", "status", "ticket", "update", "welcome",
+)
+
+
+@contextmanager
+def settings_overridden(**values):
+    """Set Django settings for the duration of the block, then restore them."""
+    missing = object()
+    previous = {name: getattr(settings, name, missing) for name in values}
+    for name, value in values.items():
+        setattr(settings, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is missing:
+                delattr(settings, name)
+            else:
+                setattr(settings, name, value)
+
+
+def parse_targets(value: str) -> dict:
+    """Parse "Email=0.9,Expo=0.6" into {"Email": 0.9, "Expo": 0.6}."""
+    targets = {}
+    for item in value.split(","):
+        name, _, share = item.partition("=")
+        try:
+            targets[name.strip()] = float(share)
+        except ValueError:
+            raise CommandError(f"Invalid target share: {item}")
+    return targets
+
+
+class Command(BaseCommand):
+    """
+    Seed users, target user records and notifications shaped like production
+    load, and optionally send them to local stand-ins of Expo, Twilio and SMTP.
+
+    Users get a record on each target with the configured probability (and at
+    least one record). A few users receive most notifications, following a
+    Pareto distribution, body lengths are log-normal and scheduled deliveries
+    are spread over the past `--spread` minutes, with `--future` of them still
+    to come. With `--run`, `process_notifications` is run against the fakes of
+    `utils.fake_providers`, for the notifications of the load users only, and
+    the throughput and delivery lag are reported.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000, help="Number of users.")
+        parser.add_argument(
+            "--notifications", type=int, default=10000, help="Number of notifications.")
+        parser.add_argument(
+            "--targets",
+            default=DEFAULT_TARGETS,
+            help=f"Share of users with a record on each target. Defaults to {DEFAULT_TARGETS}.",
+        )
+        parser.add_argument(
+            "--spread",
+            type=int,
+            default=60,
+            help="Minutes over which scheduled deliveries are spread.",
+        )
+        parser.add_argument(
+            "--future",
+            type=float,
+            default=0.1,
+            help="Share of notifications scheduled in the future.",
+        )
+        parser.add_argument(
+            "--prefix", default="loadtest", help="Prefix of the usernames of the load users.")
+        parser.add_argument("--seed", type=int, help="Seed for reproducible load.")
+        parser.add_argument(
+            "--batch-size", type=int, default=5000, help="Number of rows per INSERT.")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the load users, with their records and notifications, first.",
+        )
+        parser.add_argument(
+            "--run",
+            action="store_true",
+            help="Run process_notifications against local fake providers afterwards.",
+        )
+        parser.add_argument(
+            "--latency",
+            type=float,
+            default=0.05,
+            help="Seconds the fake providers take to answer.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.01,
+            help="Share of requests the fake providers fail.",
+        )
+        parser.add_argument(
+            "--report",
+            metavar="PATH",
+            help="With --run, write the phase timings of process_notifications to PATH.",
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        User = get_user_model()
+        prefix = options["prefix"] + "-"
+
+        if options["clear"]:
+            deleted, _ = User.objects.filter(username__startswith=prefix).delete()
+            self.stdout.write(f"Deleted {deleted} rows of previous load.")
+
+        targets = parse_targets(options["targets"])
+        target_ids = dict(
+            NotificationTarget.objects.filter(name__in=targets).values_list("name", "id")
+        )
+        unknown = set(targets) - set(target_ids)
+        if unknown:
+            raise CommandError("Unknown notification targets: {}".format(", ".join(sorted(unknown))))
+
+        users = self.create_users(User, prefix, options)
+        records = self.create_records(users, prefix, targets, target_ids, rng, options)
+        created = self.create_notifications(records, rng, options)
+        self.stdout.write(
+            f"Load ready: {len(users)} users, {sum(map(len, records.values()))} records, "
+            f"{created} notifications."
+        )
+
+        if options["run"]:
+            self.run(prefix, options)
+
+    def create_users(self, User, prefix, options):
+        usernames = [f"{prefix}{i}" for i in range(options["users"])]
+        existing = set(
+            User.objects.filter(username__startswith=prefix).values_list("username", flat=True)
+        )
+        # Hashing a password is slow by design, so all users share one.
+        password = make_password(None)
+        for chunk in chunked((u for u in usernames if u not in existing), options["batch_size"]):
+            User.objects.bulk_create(
+                User(username=username, email=f"{username}@example.com", password=password)
+                for username in chunk
+            )
+        return list(
+            User.objects.filter(username__startswith=prefix).values_list("pk", "username")
+        )
+
+    def create_records(self, users, prefix, targets, target_ids, rng, options):
+        """Return {user pk: [(record id, target name)]}, for users without records."""
+        with_records = set(
+            TargetUserRecord.objects.filter(user__username__startswith=prefix).values_list(
+                "user_id", flat=True
+            )
+        )
+        rows = []
+        for pk, username in users:
+            if pk in with_records:
+                continue
+            names = [name for name, share in targets.items() if rng.random() < share]
+            for name in names or [rng.choice(list(targets))]:
+                rows.append(TargetUserRecord(
+                    user_id=pk,
+                    target_id=target_ids[name],
+                    target_user_id=self.target_user_id(name, username),
+                    description=f"Load {name}",
+                ))
+        for chunk in chunked(rows, options["batch_size"]):
+            TargetUserRecord.objects.bulk_create(chunk)
+
+        records = {}
+        for record_id, user_id, name in TargetUserRecord.objects.filter(
+            user__username__startswith=prefix, active=True
+        ).values_list("id", "user_id", "target__name"):
+            records.setdefault(user_id, []).append((record_id, name))
+        return records
+
+    @staticmethod
+    def target_user_id(name, username):
+        if name == "Expo":
+            return "ExponentPushToken[{}]".format(username)
+        if name == "Twilio":
+            return "+1555{:07d}".format(zlib.crc32(username.encode()) % 10 ** 7)
+        return f"{username}@example.com"
+
+    def create_notifications(self, records, rng, options):
+        if not records:
+            return 0
+        user_ids = list(records)
+        # Pareto weights: a few users receive most of the notifications.
+        weights = [rng.paretovariate(1.2) for _ in user_ids]
+        now = timezone.now()
+        spread = options["spread"] * 60
+
+        def notifications():
+            for i, user_id in enumerate(rng.choices(user_ids, weights, k=options["notifications"])):
+                record_id, name = rng.choice(records[user_id])
+                words = max(3, int(rng.lognormvariate(3, 0.8)))
+                offset = rng.uniform(0, spread)
+                yield Notification(
+                    target_user_record_id=record_id,
+                    title="{} {} #{}".format(*rng.sample(WORDS, 2), i).capitalize(),
+                    body="<p>{}</p>".format(" ".join(rng.choices(WORDS, k=words))),
+                    extra={"data": {"load": i}, "priority": "high"} if name == "Expo" else {},
+                    status=Notification.SCHEDULED,
+                    scheduled_delivery=(
+                        now + timedelta(seconds=offset)
+                        if rng.random() < options["future"]
+                        else now - timedelta(seconds=offset)
+                    ),
+                    retry_time_interval=rng.choice([1, 5, 60]),
+                    max_retries=3,
+                )
+
+        return len(bulk_create_notifications(
+            notifications(), batch_size=options["batch_size"], check_existing=False))
+
+    def run(self, prefix, options):
+        fakes = {
+            "latency": options["latency"],
+            "error_rate": options["error_rate"],
+            "seed": options["seed"],
+        }
+        load = Notification.objects.filter(target_user_record__user__username__startswith=prefix)
+        with SMTPSink(**fakes) as smtp, FakeExpoServer(**fakes) as expo, \
+                FakeTwilioServer(**fakes) as twilio:
+            targets = getattr(settings, "NOTIFICATION_SYSTEM_TARGETS", {})
+            twilio_settings = targets.get("twilio_sms", {})
+            with settings_overridden(
+                NOTIFICATION_SYSTEM_TARGETS={
+                    **targets,
+                    "expo": {**targets.get("expo", {}), "host": expo.url},
+                    "twilio_sms": {
+                        **twilio_settings,
+                        "account_sid": twilio_settings.get("account_sid") or "ACloadtest",
+                        "auth_token": twilio_settings.get("auth_token") or "loadtest",
+                        "sender": twilio_settings.get("sender") or "+15550000000",
+                        "base_url": twilio.url,
+                    },
+                    "email": {
+                        **targets.get("email", {}),
+                        "from_email": targets.get("email", {}).get("from_email")
+                        or "loadtest@example.com",
+                    },
+                },
+                EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+                EMAIL_HOST=smtp.host,
+                EMAIL_PORT=smtp.port,
+                EMAIL_HOST_USER="",
+                EMAIL_HOST_PASSWORD="",
+                EMAIL_USE_TLS=False,
+                EMAIL_USE_SSL=False,
+            ):
+                started_at = timezone.now()
+                started = time.perf_counter()
+                arguments = ["--report", options["report"]] if options["report"] else []
+                # The dispatcher prints every notification; keep the console readable.
+                with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                    # Only the load: other due notifications must not end up at the fakes.
+                    call_command(
+                        "process_notifications",
+                        *arguments,
+                        scope=Q(target_user_record__user__username__startswith=prefix),
+                        stdout=devnull,
+                    )
+                elapsed = time.perf_counter() - started
+
+        attempted = load.filter(attempted_delivery__gte=started_at)
+        count = attempted.count()
+        # Retries move scheduled_delivery, so the lag is measured on deliveries.
+        lags = sorted(
+            (attempted_delivery - scheduled_delivery).total_seconds()
+            for attempted_delivery, scheduled_delivery in attempted.filter(
+                status=Notification.DELIVERED
+            ).values_list("attempted_delivery", "scheduled_delivery")
+        )
+
+        self.stdout.write(f"Attempted {count} notifications in {elapsed:.2f}s "
+                          f"({count / elapsed if elapsed else 0:.1f}/s), {len(lags)} delivered.")
+        if lags:
+            self.stdout.write("Delivery lag p50 {:.2f}s, p95 {:.2f}s, max {:.2f}s.".format(
+                lags[len(lags) // 2], lags[int(len(lags) * 0.95)], lags[-1]))
+        for name, fake in (("SMTP", smtp), ("Expo", expo), ("Twilio", twilio)):
+            self.stdout.write(f"{name}: {fake.requests} requests, {fake.errors} failed.")
+        if options["report"]:
+            self.stdout.write(f"Report written to {options['report']}")
@@ -0,0 +1,109 @@
+"""Django Management Command."""
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...utils.bulk import (
+    chunked,
+    infer_format,
+    parse_bool,
+    read_rows,
+    resolve_user_ids,
+    set_opt_outs,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Create or update NotificationOptOuts from a CSV or JSON Lines file.
+
+    Each row must provide a `user` value and may provide an `active` value
+    (defaults to true). Opting a user out marks their SCHEDULED and RETRY
+    notifications as OPTED OUT, one UPDATE statement per batch.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="The file to read opt outs from, or - to read from stdin.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="The input format. Inferred from the file extension when omitted.",
+        )
+        parser.add_argument(
+            "--user-field",
+            default=User.USERNAME_FIELD,
+            help="The user model field that the `user` column refers to. "
+                 "Defaults to the USERNAME_FIELD of the user model.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of rows to process per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            input_format = options["format"] or infer_format(path)
+        except ValueError as e:
+            raise CommandError(e)
+
+        started = time.monotonic()
+        processed = created = updated = opted_out = skipped = 0
+
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            for chunk in chunked(read_rows(stream, input_format), options["batch_size"]):
+                user_ids = resolve_user_ids(
+                    (str(row.get("user", "")) for row in chunk), options["user_field"]
+                )
+
+                # One state per user, the last row winning, as if the rows were
+                # applied one by one.
+                states = {}
+                for row in chunk:
+                    user_id = user_ids.get(str(row.get("user", "")))
+                    if user_id is None:
+                        skipped += 1
+                        if options["verbosity"] > 1:
+                            self.stdout.write(f"Skipping row {row}: unknown user.")
+                        continue
+                    states[user_id] = parse_bool(row.get("active"))
+
+                # Group the chunk by state so each group is a single update.
+                by_state = {True: set(), False: set()}
+                for user_id, active in states.items():
+                    by_state[active].add(user_id)
+
+                with transaction.atomic():
+                    for active, ids in by_state.items():
+                        counts = set_opt_outs(ids, active=active)
+                        created += counts[0]
+                        updated += counts[1]
+                        opted_out += counts[2]
+
+                processed += len(chunk)
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"Processed {processed} rows "
+                    f"({processed / elapsed if elapsed else processed:.0f} rows/sec)")
+        except ValueError as e:
+            raise CommandError(e)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(
+            f"Created {created} and updated {updated} opt outs, marking "
+            f"{opted_out} notifications as opted out. Skipped {skipped} rows.")
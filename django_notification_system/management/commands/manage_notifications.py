@@ -0,0 +1,123 @@
+"""Django Management Command."""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from ...models import Notification
+from ...utils.bulk import (
+    PENDING_STATUSES,
+    cancel_notifications,
+    requeue_notifications,
+    requeueable_notifications,
+    reschedule_notifications,
+)
+
+
+def aware_datetime(value):
+    """Parse an ISO 8601 date/time, assuming the current timezone if it has none."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise CommandError(f"Invalid date/time: {value}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    """
+    Requeue, cancel or reschedule all notifications matching some filters.
+
+    requeue: DELIVERY FAILURE, RETRY, INACTIVE DEVICE, THROTTLED and CANCELLED
+        notifications are scheduled for delivery right away, with their retry
+        attempts reset. Notifications of opted out users are left alone.
+    cancel: SCHEDULED and RETRY notifications are marked as CANCELLED.
+    reschedule: SCHEDULED and RETRY notifications are moved to --to.
+
+    Notifications are updated with chunked UPDATE statements, without being loaded.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["requeue", "cancel", "reschedule"])
+        parser.add_argument(
+            "--status",
+            action="append",
+            choices=[status for status, _ in Notification.STATUS_CHOICES],
+            help="Only notifications with this status. May be repeated.",
+        )
+        parser.add_argument(
+            "--target",
+            help="Only notifications for this NotificationTarget, e.g. Twilio.",
+        )
+        parser.add_argument("--title", help="Only notifications with this exact title.")
+        parser.add_argument(
+            "--scheduled-after",
+            type=aware_datetime,
+            help="Only notifications scheduled at or after this ISO 8601 date/time.",
+        )
+        parser.add_argument(
+            "--scheduled-before",
+            type=aware_datetime,
+            help="Only notifications scheduled before this ISO 8601 date/time.",
+        )
+        parser.add_argument(
+            "--to",
+            type=aware_datetime,
+            help="The new delivery date/time of the reschedule action.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of notifications per UPDATE statement.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many notifications would be changed.",
+        )
+
+    def handle(self, *args, **options):
+        action = options["action"]
+        if action == "reschedule" and options["to"] is None:
+            raise CommandError("The reschedule action needs --to.")
+
+        notifications = Notification.objects.all()
+        if options["status"]:
+            notifications = notifications.filter(status__in=options["status"])
+        if options["target"]:
+            notifications = notifications.filter(
+                target_user_record__target__name=options["target"]
+            )
+        if options["title"]:
+            notifications = notifications.filter(title=options["title"])
+        if options["scheduled_after"]:
+            notifications = notifications.filter(
+                scheduled_delivery__gte=options["scheduled_after"]
+            )
+        if options["scheduled_before"]:
+            notifications = notifications.filter(
+                scheduled_delivery__lt=options["scheduled_before"]
+            )
+
+        if options["dry_run"]:
+            if action == "requeue":
+                count = requeueable_notifications(notifications).count()
+            else:
+                count = notifications.filter(status__in=PENDING_STATUSES).count()
+            self.stdout.write(f"{count} notifications would be changed by {action}.")
+            return
+
+        def progress(updated):
+            self.stdout.write(f"{updated} notifications updated so far...")
+
+        kwargs = {"batch_size": options["batch_size"], "progress": progress}
+        if action == "requeue":
+            count = requeue_notifications(notifications, **kwargs)
+        elif action == "cancel":
+            count = cancel_notifications(notifications, **kwargs)
+        else:
+            count = reschedule_notifications(notifications, options["to"], **kwargs)
+
+        self.stdout.write(f"Done, {action} changed {count} notifications.")
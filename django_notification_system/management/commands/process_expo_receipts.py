@@ -0,0 +1,170 @@
+"""Django Management Command."""
+from collections import defaultdict
+from datetime import timedelta
+
+from exponent_server_sdk import PushResponse, PushServerError
+from requests import RequestException
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from ...models import Notification, TargetUserRecord
+from ...routing import escalate_notifications
+from ...utils.bulk import chunked, set_notification_status
+from ...utils.expo_client import PushClient
+
+
+class Command(BaseCommand):
+    """
+    Check the Expo push receipts of delivered push notifications.
+
+    Receipts reporting DeviceNotRegistered deactivate the target user record and
+    mark the notification as INACTIVE DEVICE, escalating notifications created
+    with `notify` to their next fallback channel. MessageRateExceeded receipts
+    schedule a RETRY after the notification's retry interval, as long as it has
+    retries left. Any other error marks the notification as DELIVERY FAILURE. This command only touches DELIVERED notifications, so it
+    can run alongside `process_notifications`.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=PushClient.MAX_RECEIPT_IDS,
+            help="Number of receipts to fetch per request (at most 1000).",
+        )
+        parser.add_argument(
+            "--min-age",
+            type=int,
+            default=15,
+            help="Minutes to wait after delivery before checking a receipt.",
+        )
+        parser.add_argument(
+            "--max-age",
+            type=int,
+            default=24,
+            help="Hours after which receipts are no longer available from Expo "
+                 "and ticket ids are discarded unchecked.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = min(options["batch_size"], PushClient.MAX_RECEIPT_IDS)
+        now = timezone.now()
+
+        expired = Notification.objects.filter(
+            push_ticket_id__isnull=False,
+            attempted_delivery__lt=now - timedelta(hours=options["max_age"]),
+        ).update(push_ticket_id=None)
+
+        pending = (
+            Notification.objects.filter(
+                push_ticket_id__isnull=False,
+                status=Notification.DELIVERED,
+                attempted_delivery__lte=now - timedelta(minutes=options["min_age"]),
+            )
+            .order_by("pk")
+            .values_list("id", "push_ticket_id", "target_user_record_id")
+            .iterator(chunk_size=batch_size)
+        )
+
+        client = PushClient()
+        totals = {"ok": 0, "inactive": 0, "retried": 0, "failed": 0}
+        for chunk in chunked(pending, batch_size):
+            try:
+                receipts = client.get_receipts(ticket_id for _, ticket_id, _ in chunk)
+            except (PushServerError, RequestException) as e:
+                self.stderr.write(f"Unable to fetch receipts: {type(e)}: {e}")
+                continue
+
+            for key, count in self._apply_receipts(chunk, receipts).items():
+                totals[key] += count
+
+        self.stdout.write(
+            "Checked receipts: {ok} delivered, {inactive} inactive devices, "
+            "{retried} retries, {failed} delivery failures. Discarded {expired} expired tickets.".format(
+                expired=expired, **totals
+            )
+        )
+
+    @staticmethod
+    def _apply_receipts(chunk, receipts):
+        """Apply a chunk of receipts with one UPDATE statement per outcome."""
+        delivered, inactive, rate_limited, failed = [], [], [], []
+        inactive_records = set()
+        for notification_id, ticket_id, target_user_record_id in chunk:
+            receipt = receipts.get(ticket_id)
+            if receipt is None:
+                # Not available yet, try again on the next run.
+                continue
+            if receipt.get("status") == PushResponse.SUCCESS_STATUS:
+                delivered.append(notification_id)
+            elif (receipt.get("details") or {}).get(
+                "error"
+            ) == PushResponse.ERROR_DEVICE_NOT_REGISTERED:
+                inactive.append(notification_id)
+                inactive_records.add(target_user_record_id)
+            elif (receipt.get("details") or {}).get(
+                "error"
+            ) == PushResponse.ERROR_MESSAGE_RATE_EXCEEDED:
+                rate_limited.append(notification_id)
+            else:
+                failed.append(notification_id)
+
+        # Only DELIVERED notifications are changed, in case a notification
+        # was updated by someone else since it was read.
+        notifications = Notification.objects.filter(status=Notification.DELIVERED)
+        retried = 0
+        with transaction.atomic():
+            if delivered:
+                notifications.filter(id__in=delivered).update(push_ticket_id=None)
+            if inactive:
+                set_notification_status(
+                    notifications.filter(id__in=inactive),
+                    Notification.INACTIVE_DEVICE,
+                    push_ticket_id=None,
+                )
+                TargetUserRecord.objects.filter(id__in=inactive_records).update(
+                    active=False, modified_date=timezone.now()
+                )
+            if rate_limited:
+                # Like a rate limited push, retried after the retry interval of
+                # each notification, one UPDATE per interval.
+                retryable = notifications.filter(
+                    id__in=rate_limited, retry_attempts__lt=F("max_retries") - 1
+                )
+                by_interval = defaultdict(list)
+                for notification_id, interval in retryable.values_list(
+                    "id", "retry_time_interval"
+                ):
+                    by_interval[interval].append(notification_id)
+                now = timezone.now()
+                for interval, ids in by_interval.items():
+                    retried += set_notification_status(
+                        notifications.filter(id__in=ids),
+                        Notification.RETRY,
+                        push_ticket_id=None,
+                        retry_attempts=F("retry_attempts") + 1,
+                        scheduled_delivery=now + timedelta(minutes=interval),
+                    )
+            if failed or rate_limited:
+                # Rate limited notifications without retries left fail, the
+                # others are no longer DELIVERED.
+                set_notification_status(
+                    notifications.filter(id__in=failed + rate_limited),
+                    Notification.DELIVERY_FAILURE,
+                    push_ticket_id=None,
+                )
+
+        if inactive:
+            escalate_notifications(inactive)
+
+        return {
+            "ok": len(delivered),
+            "inactive": len(inactive),
+            "retried": retried,
+            "failed": len(failed) + len(rate_limited) - retried,
+        }
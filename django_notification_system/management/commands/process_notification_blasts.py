@@ -0,0 +1,41 @@
+"""Django Management Command."""
+from django.core.management.base import BaseCommand
+
+from ...models import NotificationBatch
+from ...routing import fan_out_blast
+
+
+class Command(BaseCommand):
+    """
+    Fan out the blasts created through the notification blast endpoint.
+
+    The notifications of each blast are created in chunks of users, and the
+    progress of every chunk is saved, so an interrupted run picks up where it
+    stopped. Run it every minute or so, next to `process_notifications`.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of users whose notifications are created at once.",
+        )
+
+    def handle(self, *args, **options):
+        blasts = (
+            NotificationBatch.objects.filter(
+                audience__isnull=False, fanout_completed__isnull=True
+            )
+            .exclude(status=NotificationBatch.CANCELLED)
+            .order_by("created_date")
+        )
+        for batch in blasts:
+            created = fan_out_blast(batch, batch_size=options["batch_size"])
+            self.stdout.write(
+                "{}: {} notifications created for {} users.".format(
+                    batch.name, created, batch.audience_count
+                )
+            )
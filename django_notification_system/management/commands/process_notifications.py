@@ -1,25 +1,55 @@
+import cProfile
 import importlib
 import inspect
+import io
+import json
 import os
+import pstats
 from os import path
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
-from django.db.models import Q
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.models import Min, Q
 from django.utils import timezone
 
-from ...models import Notification
+from ...dispatch.circuit_breaker import CircuitBreakers
+from ...dispatch.digest import coalesce_notifications, held_back_filter
+from ...dispatch.frequency_caps import DROP, FrequencyCaps
+from ...dispatch.profiling import DispatchProfile
+from ...dispatch.queues import get_queue, get_queue_settings
+from ...dispatch.quiet_hours import reschedule_quiet_hours
+from ...dispatch.shards import parse_shard, shard_backlog, shard_filter
+from ...dispatch.rows import bulk_save_notification_rows, load_notification_rows
+from ...models import Notification, NotificationTarget
+from ...routing import FALLBACK_CHANNELS, escalate_notifications
+from ...utils.bulk import increment_batch_counters
 from ...notification_handlers.email import send_notification as send_email
 from ...notification_handlers.twilio import send_notification as send_twilio
 from ...notification_handlers.expo import send_notification as send_expo
 
 
+# Final statuses other than DELIVERED that notifications reach while being processed.
+FAILED_STATUSES = [
+    Notification.DELIVERY_FAILURE,
+    Notification.INACTIVE_DEVICE,
+    Notification.THROTTLED,
+]
+
+
 class Command(BaseCommand):
     """
     Push all SCHEDULED notifications with a scheduled_delivery before the current date_time
+
+    With --daemon, keep doing so, waking up through the queue backend of
+    `dispatch.queues` when notifications are created. With --shard and
+    --targets, several workers divide the notifications, see `dispatch.shards`.
+    Callers of `call_command` may also pass a `scope`, a Q object that limits
+    the notifications handled.
     """
 
     help = __doc__
+    stealth_options = ("scope",)
 
     __function_table = {
         "expo": send_expo,
@@ -59,36 +89,303 @@ class Command(BaseCommand):
                     # the directory provided in the settings file does not exist
                     pass
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of notifications loaded, rescheduled or checked against the frequency caps at once.",
+        )
+        parser.add_argument(
+            "--daemon",
+            action="store_true",
+            help="Keep running, waking up when notifications are created or become due. "
+                 "See NOTIFICATION_SYSTEM_QUEUE.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            help="With --daemon, the longest wait between runs in seconds. Defaults to "
+                 "the poll_interval of NOTIFICATION_SYSTEM_QUEUE, or 5.",
+        )
+        parser.add_argument(
+            "--max-runs",
+            type=int,
+            help="With --daemon, stop after this many runs.",
+        )
+        parser.add_argument(
+            "--shard",
+            metavar="I/N",
+            help="Only process shard I of N, e.g. 2/4. The shard of a notification is "
+                 "derived from its target user record.",
+        )
+        parser.add_argument(
+            "--targets",
+            metavar="NAMES",
+            help="Only process notifications of these notification module names, "
+                 "e.g. email,expo.",
+        )
+        parser.add_argument(
+            "--profile",
+            metavar="PATH",
+            help="Run under cProfile, write the stats to PATH and print the top functions.",
+        )
+        parser.add_argument(
+            "--trace-queries",
+            action="store_true",
+            help="Count the queries of each phase and target.",
+        )
+        parser.add_argument(
+            "--report",
+            metavar="PATH",
+            help="Write the timings of each phase and target to PATH as JSON.",
+        )
+
+    @staticmethod
+    def _batches(notifications, batch_size, profile):
+        """
+        Yield the notifications in batches of lightweight rows, paging by
+        (scheduled_delivery, id) so rows updated while sending cannot shift
+        later pages.
+        """
+        with profile.phase("fetch"):
+            batch = load_notification_rows(notifications[:batch_size])
+        while batch:
+            # Taken before yielding, as sending may change scheduled_delivery.
+            last_scheduled_delivery, last_id = batch[-1].scheduled_delivery, batch[-1].id
+            yield batch
+            with profile.phase("fetch"):
+                batch = load_notification_rows(
+                    notifications.filter(
+                        Q(scheduled_delivery__gt=last_scheduled_delivery)
+                        | Q(scheduled_delivery=last_scheduled_delivery, id__gt=last_id)
+                    )[:batch_size]
+                )
+
+    @staticmethod
+    def _parse_scope(options):
+        """Parse --shard and --targets into (shard, targets)."""
+        shard = targets = None
+        if options["shard"]:
+            try:
+                shard = parse_shard(options["shard"])
+            except ValueError as e:
+                raise CommandError(e)
+        if options["targets"]:
+            targets = [name.strip() for name in options["targets"].split(",") if name.strip()]
+            unknown = set(targets) - set(
+                NotificationTarget.objects.values_list("notification_module_name", flat=True)
+            )
+            if unknown:
+                raise CommandError(
+                    "Unknown notification module names: {}".format(", ".join(sorted(unknown))))
+        return shard, targets
+
+    @staticmethod
+    def _scope_filter(shard, targets, scope=None):
+        """Return the filter selecting the notifications of this worker."""
+        scope = scope if scope is not None else Q()
+        if shard:
+            scope &= shard_filter(*shard)
+        if targets:
+            scope &= Q(target_user_record__target__notification_module_name__in=targets)
+        return scope
+
     def handle(self, *args, **options):
+        options["shard"], options["targets"] = self._parse_scope(options)
+
+        if not options["daemon"]:
+            self._run(options)
+            return
+
+        queue = get_queue()
+        poll_interval = options["poll_interval"] or get_queue_settings()["poll_interval"]
+        runs = 0
+        try:
+            while True:
+                self._run(options)
+                runs += 1
+                if options["max_runs"] and runs >= options["max_runs"]:
+                    break
+                queue.wait(self._seconds_until_next_due(
+                    poll_interval,
+                    self._scope_filter(options["shard"], options["targets"], options.get("scope"))))
+                # Drop broken or expired connections between runs, like Django
+                # does between requests.
+                if not connection.in_atomic_block:
+                    close_old_connections()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            queue.close()
+
+    @staticmethod
+    def _seconds_until_next_due(poll_interval, scope=Q()):
+        """
+        Return how long the daemon may wait: until the next scheduled
+        notification of its scope is due, but no longer than the poll interval.
+        """
+        now = timezone.now()
+        next_due = Notification.objects.filter(
+            scope,
+            status__in=[Notification.SCHEDULED, Notification.RETRY],
+            scheduled_delivery__gt=now,
+        ).aggregate(next_due=Min("scheduled_delivery"))["next_due"]
+        if next_due is None:
+            return poll_interval
+        return max(min((next_due - now).total_seconds(), poll_interval), 0)
+
+    def _run(self, options):
+        profile = DispatchProfile(trace_queries=options["trace_queries"])
+        profiler = cProfile.Profile() if options["profile"] else None
+
+        if profiler is not None:
+            profiler.enable()
+        try:
+            with profile.tracing():
+                self._dispatch(profile, options)
+                backlog = self._backlog(options) if options["shard"] else None
+        finally:
+            if profiler is not None:
+                profiler.disable()
+
+        if profiler is not None:
+            profiler.dump_stats(options["profile"])
+            stream = io.StringIO()
+            pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+            self.stdout.write(stream.getvalue())
+            self.stdout.write(f"Profile written to {options['profile']}")
+
+        if profiler is not None or options["trace_queries"] or options["report"]:
+            self.stdout.write(profile.summary())
+
+        if backlog is not None:
+            for shard in backlog:
+                self.stdout.write(
+                    "Shard {shard}: {count} due notifications left, oldest {oldest}".format(**shard))
+
+        if options["report"]:
+            report = profile.report()
+            if backlog is not None:
+                report["shard"] = "{}/{}".format(*options["shard"])
+                report["backlog"] = [
+                    {**shard, "oldest": shard["oldest"] and shard["oldest"].isoformat()}
+                    for shard in backlog
+                ]
+            with open(options["report"], "w") as report_file:
+                json.dump(report, report_file, indent=2)
+            self.stdout.write(f"Report written to {options['report']}")
+
+    def _backlog(self, options):
+        """
+        Return the due notifications left in each shard, with one aggregate
+        query, so an uneven split of the work among workers shows.
+        """
+        scope = self._scope_filter(None, options["targets"], options.get("scope"))
+        return shard_backlog(
+            options["shard"][1],
+            Notification.objects.filter(
+                scope,
+                status__in=[Notification.SCHEDULED, Notification.RETRY],
+                scheduled_delivery__lte=timezone.now(),
+            ),
+        )
+
+    def _dispatch(self, profile, options):
         # Load the function table
         self._load_function_table()
 
+        now = timezone.now()
+
+        # Only the shard and targets of this worker. A target user record
+        # always falls in one shard, so its notifications stay in order.
+        scope = self._scope_filter(options["shard"], options["targets"], options.get("scope"))
+
+        # Replace bursts of notifications sharing a digest key with digests.
+        with profile.phase("prepare"):
+            coalesced = coalesce_notifications(now, Notification.objects.filter(scope))
+        if coalesced:
+            print(f"Coalesced {coalesced} notifications into digests")
+
         # Get all SCHEDULED and RETRY notifications with a
         # scheduled_delivery before the current date_time
-        notifications = Notification.objects.filter(
+        due = notifications = Notification.objects.filter(
             Q(status="SCHEDULED") | Q(status="RETRY"),
-            scheduled_delivery__lte=timezone.now(),
+            held_back_filter(now),
+            scope,
+            scheduled_delivery__lte=now,
         )
 
-        # excludes all notifications where the user has NotificationOptOut object with has_opted_out=True
-        notifications = notifications.exclude(target_user_record__user__notification_opt_out__active=True)
+        # Move notifications of users within their quiet hours out of the way.
+        with profile.phase("prepare"):
+            rescheduled = reschedule_quiet_hours(notifications, now, options["batch_size"])
+        if rescheduled:
+            print(f"Rescheduled {rescheduled} notifications for quiet hours")
 
-        # Loop through each notification and attempt to push it
-        for notification in notifications:
-            print(
-                f"{notification.target_user_record.user.username} - {notification.scheduled_delivery} - {notification.status}")
-            print(f"{notification.title} - {notification.body}")
+        # Notifications are loaded as rows carrying only what the handlers
+        # need, see `dispatch.rows`.
+        notifications = notifications.order_by("scheduled_delivery", "id")
+
+        # Opted out users are not excluded here. Activating a NotificationOptOut
+        # already marks the user's pending notifications as OPTED_OUT, which keeps
+        # this query free of joins through the user and opt out tables. Any drift
+        # is repaired by the `reconcile_opt_outs` command.
+
+        frequency_caps = FrequencyCaps(now)
+        circuit_breakers = CircuitBreakers()
+        paused_targets = set()
+
+        for batch in self._batches(notifications, options["batch_size"], profile):
+            # One aggregate query per batch for the windowed delivery counts.
+            with profile.phase("prepare"):
+                frequency_caps.load(batch)
+            capped = []
+
+            # Loop through each notification and attempt to push it
+            for notification in batch:
+                print(
+                    f"{notification.target_user_record.username} - {notification.scheduled_delivery} - {notification.status}")
+                print(f"{notification.title} - {notification.body}")
+
+                if not notification.target_user_record.active:
+                    notification.status = Notification.INACTIVE_DEVICE
+                    with profile.phase("persist"):
+                        notification.save()
+                    continue
 
-            if not notification.target_user_record.active:
-                notification.status = Notification.INACTIVE_DEVICE
-                notification.save()
-            else:
                 notification_type = (
                     notification.target_user_record.target.notification_module_name
                 )
+                breaker = circuit_breakers[notification_type] if circuit_breakers else None
+                if breaker and not breaker.allow():
+                    if notification_type not in paused_targets:
+                        # Reschedule everything due for the target with one
+                        # UPDATE, without spending any retries.
+                        paused_targets.add(notification_type)
+                        open_until = breaker.open_until or timezone.now()
+                        with profile.phase("prepare"):
+                            paused = due.filter(
+                                target_user_record__target__notification_module_name=notification_type
+                            ).update(scheduled_delivery=open_until, modified_date=timezone.now())
+                        print(f"Circuit open for {notification_type}, rescheduled {paused} notifications until {open_until}")
+                    continue
+
+                action, retry_at = frequency_caps.check(notification)
+                if action == DROP:
+                    print("Frequency cap exceeded, throttled")
+                    notification.status = Notification.THROTTLED
+                    capped.append(notification)
+                    continue
+                elif action:
+                    print(f"Frequency cap exceeded, deferred until {retry_at}")
+                    notification.scheduled_delivery = retry_at
+                    capped.append(notification)
+                    continue
+
                 try:
                     # Use our function table to call the appropriate sending function
-                    response_message = self.__function_table[notification_type](notification)
+                    with profile.phase("send", notification_type):
+                        response_message = self.__function_table[notification_type](notification)
                 except KeyError:
                     print(
                         f"invalid notification target name {notification.target_user_record.target.name}")
@@ -96,3 +393,30 @@ class Command(BaseCommand):
                     # The notification was sent successfully
                     print(response_message)
                     print("*********************************")
+
+                    if breaker is not None:
+                        if notification.status in (Notification.RETRY, Notification.DELIVERY_FAILURE):
+                            if breaker.record_failure():
+                                print(f"Circuit opened for {notification_type}")
+                        else:
+                            breaker.record_success()
+
+            with profile.phase("persist"):
+                # Route notifications for inactive devices to their fallback channels.
+                escalated = escalate_notifications(
+                    notification.id
+                    for notification in batch
+                    if notification.status == Notification.INACTIVE_DEVICE
+                    and (notification.extra or {}).get(FALLBACK_CHANNELS)
+                )
+                if escalated:
+                    print(f"Escalated {len(escalated)} notifications to fallback channels")
+
+                if capped:
+                    bulk_save_notification_rows(capped, ["status", "scheduled_delivery"])
+
+                # Update the progress of campaigns once per chunk.
+                increment_batch_counters(
+                    [n for n in batch if n.status == Notification.DELIVERED], "delivered_count")
+                increment_batch_counters(
+                    [n for n in batch if n.status in FAILED_STATUSES], "failed_count")
@@ -0,0 +1,56 @@
+"""Django Management Command."""
+from django.core.management.base import BaseCommand
+
+from ...models import Notification, NotificationOptOut
+from ...utils.bulk import chunked, set_notification_status
+
+
+class Command(BaseCommand):
+    """
+    Mark pending notifications of opted out users as OPTED OUT.
+
+    `process_notifications` relies on opt outs having already been applied
+    to pending notifications. That happens whenever a NotificationOptOut is
+    saved, but not when opt outs are changed with queryset updates or
+    notifications are created for a user who is already opted out without
+    going through a notification creator. This command repairs such drift.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of opted out users to reconcile per UPDATE statement.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many notifications would be changed.",
+        )
+
+    def handle(self, *args, **options):
+        opted_out_users = (
+            NotificationOptOut.objects.filter(active=True)
+            .order_by("pk")
+            .values_list("user_id", flat=True)
+            .iterator(chunk_size=options["batch_size"])
+        )
+
+        total = 0
+        for user_ids in chunked(opted_out_users, options["batch_size"]):
+            drifted = Notification.objects.filter(
+                status__in=[Notification.SCHEDULED, Notification.RETRY, Notification.PAUSED],
+                target_user_record__user_id__in=user_ids,
+            )
+            if options["dry_run"]:
+                total += drifted.count()
+            else:
+                total += set_notification_status(drifted, Notification.OPTED_OUT)
+
+        if options["dry_run"]:
+            self.stdout.write(f"{total} notifications of opted out users are pending.")
+        else:
+            self.stdout.write(f"Marked {total} notifications as opted out.")
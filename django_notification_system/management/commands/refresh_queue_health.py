@@ -0,0 +1,45 @@
+"""Django Management Command."""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from ...utils.queue_health import DEFAULT_WINDOWS, refresh_queue_health
+
+
+class Command(BaseCommand):
+    """
+    Take a snapshot of the notification queue for the queue health dashboard.
+
+    Pending and due counts, the oldest due notification and the retry distribution
+    are computed per target and status, along with the number of delivery attempts
+    within recent windows. Run it every minute or so.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            type=int,
+            action="append",
+            help="Window in seconds over which recent delivery attempts are "
+                 "counted. May be repeated. Defaults to 5 minutes, 1 hour and 1 day.",
+        )
+        parser.add_argument(
+            "--keep-days",
+            type=int,
+            default=7,
+            help="Days after which snapshots are deleted.",
+        )
+
+    def handle(self, *args, **options):
+        snapshots = refresh_queue_health(
+            windows=options["window"] or DEFAULT_WINDOWS,
+            keep=timedelta(days=options["keep_days"]),
+        )
+        self.stdout.write(
+            "Queue health refreshed: {} pending, {} due.".format(
+                sum(snapshot.pending_count for snapshot in snapshots),
+                sum(snapshot.due_count for snapshot in snapshots),
+            )
+        )
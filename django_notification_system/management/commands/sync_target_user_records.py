@@ -0,0 +1,164 @@
+"""Django Management Command."""
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from ...models import NotificationTarget, TargetUserRecord
+from ...utils.bulk import (
+    chunked,
+    infer_format,
+    parse_bool,
+    read_rows,
+    resolve_user_ids,
+    upsert_target_user_records,
+)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Create or update TargetUserRecords from a CSV or JSON Lines file.
+
+    Each row must provide `user`, `target` and `target_user_id` values, and
+    may provide `active` (defaults to true) and `description` values. The
+    `user` value is matched against the field given by --user-field and the
+    `target` value against the name of a NotificationTarget. Rows with an
+    unknown user or target, or an invalid `active` value, are skipped and
+    reported; invalid rows also keep --deactivate-missing from deactivating
+    anything, as their records would look missing.
+    """
+
+    help = __doc__
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path",
+            help="The file to read records from, or - to read from stdin.",
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="The input format. Inferred from the file extension when omitted.",
+        )
+        parser.add_argument(
+            "--user-field",
+            default=User.USERNAME_FIELD,
+            help="The user model field that the `user` column refers to. "
+                 "Defaults to the USERNAME_FIELD of the user model.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of rows to synchronize per transaction.",
+        )
+        parser.add_argument(
+            "--deactivate-missing",
+            action="store_true",
+            help="Deactivate records of the targets present in the input "
+                 "that were not themselves present in the input.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            input_format = options["format"] or infer_format(path)
+        except ValueError as e:
+            raise CommandError(e)
+        self.user_field = options["user_field"]
+        self.verbosity = options["verbosity"]
+        deactivate_missing = options["deactivate_missing"]
+
+        self.targets = {target.name: target for target in NotificationTarget.objects.all()}
+        seen_target_ids = set()
+        sync_started = timezone.now()
+        started = time.monotonic()
+        processed = created = updated = skipped = invalid = 0
+
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        try:
+            for chunk in chunked(read_rows(stream, input_format), options["batch_size"]):
+                records, chunk_skipped, chunk_invalid = self._build_records(chunk)
+                seen_target_ids.update(record.target_id for record in records)
+
+                with transaction.atomic():
+                    chunk_created, chunk_updated = upsert_target_user_records(
+                        records, touch_unchanged=deactivate_missing
+                    )
+
+                processed += len(chunk)
+                created += chunk_created
+                updated += chunk_updated
+                skipped += chunk_skipped
+                invalid += chunk_invalid
+                elapsed = time.monotonic() - started
+                self.stdout.write(
+                    f"Processed {processed} rows "
+                    f"({processed / elapsed if elapsed else processed:.0f} rows/sec)")
+        except ValueError as e:
+            raise CommandError(e)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        deactivated = 0
+        if deactivate_missing and invalid:
+            self.stderr.write(
+                f"Not deactivating missing records: {invalid} rows were invalid.")
+        elif deactivate_missing and seen_target_ids:
+            # Every record present in the input was created or touched after
+            # `sync_started`, so anything older was absent from the input.
+            deactivated = TargetUserRecord.objects.filter(
+                target_id__in=seen_target_ids,
+                active=True,
+                modified_date__lt=sync_started,
+            ).update(active=False, modified_date=timezone.now())
+
+        self.stdout.write(
+            f"Created {created}, updated {updated} and deactivated {deactivated} "
+            f"records. Skipped {skipped} rows ({invalid} invalid).")
+
+    def _build_records(self, rows):
+        """
+        Turn a chunk of input rows into unsaved TargetUserRecord instances,
+        resolving all of the chunk's users with a single query.
+        """
+        user_ids = resolve_user_ids(
+            (str(row.get("user", "")) for row in rows), self.user_field
+        )
+
+        records = []
+        skipped = invalid = 0
+        for row in rows:
+            user_id = user_ids.get(str(row.get("user", "")))
+            target = self.targets.get(row.get("target"))
+            target_user_id = row.get("target_user_id")
+            if user_id is None or target is None or not target_user_id:
+                skipped += 1
+                if self.verbosity > 1:
+                    self.stdout.write(f"Skipping row {row}: unknown user or target.")
+                continue
+
+            try:
+                active = parse_bool(row.get("active"))
+            except ValueError as e:
+                skipped += 1
+                invalid += 1
+                self.stderr.write(f"Skipping row {row}: {e}.")
+                continue
+
+            records.append(
+                TargetUserRecord(
+                    user_id=user_id,
+                    target=target,
+                    target_user_id=str(target_user_id),
+                    active=active,
+                    description=row.get("description") or None,
+                )
+            )
+        return records, skipped, invalid
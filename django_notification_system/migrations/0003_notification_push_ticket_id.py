@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0002_auto_20201201_1720'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='push_ticket_id',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:27
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0003_notification_push_ticket_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('body', models.TextField()),
+                ('extra', models.JSONField(blank=True, default=dict, null=True)),
+                ('status', models.CharField(max_length=16)),
+                ('scheduled_delivery', models.DateTimeField(db_index=True)),
+                ('attempted_delivery', models.DateTimeField(blank=True, null=True)),
+                ('retry_attempts', models.PositiveIntegerField(default=0)),
+                ('created_date', models.DateTimeField()),
+                ('archived_date', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Archived Notifications',
+                'db_table': 'notification_system_archived_notification',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['status', 'scheduled_delivery'], name='notification_status_sched'),
+        ),
+        migrations.AddField(
+            model_name='archivednotification',
+            name='target_user_record',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_notifications', to='django_notification_system.targetuserrecord'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:28
+
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import migrations, models, transaction
+from django.db.models import Q
+
+
+def build_dedupe_key(target_user_record_id, scheduled_delivery, title, extra):
+    """
+    A frozen copy of `models.notification.build_dedupe_key` as of this
+    migration, so later changes to it do not change what the migration does.
+    """
+    if isinstance(scheduled_delivery, datetime) and scheduled_delivery.tzinfo is not None:
+        scheduled_delivery = scheduled_delivery.astimezone(timezone.utc)
+    payload = json.dumps(
+        [str(target_user_record_id), scheduled_delivery, title, extra or {}],
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def backfill_dedupe_keys(apps, schema_editor):
+    """
+    Give existing notifications the dedupe key they would have had if they
+    were created now, so creators can tell they already exist.
+
+    A key includes the target user record, so duplicates are looked for per
+    record: notifications are read in keyset pages ordered by (record, pk)
+    and only the keys of the current record are kept in memory. Each page
+    is written in its own transaction.
+    """
+    Notification = apps.get_model('django_notification_system', 'Notification')
+    rows = Notification.objects.order_by('target_user_record_id', 'pk').values_list(
+        'pk', 'target_user_record_id', 'scheduled_delivery', 'title', 'extra')
+    current_record, seen = None, set()
+    last = None
+    while True:
+        page = rows
+        if last is not None:
+            page = rows.filter(
+                Q(target_user_record_id__gt=last[1])
+                | Q(target_user_record_id=last[1], pk__gt=last[0])
+            )
+        page = list(page[:1000])
+        if not page:
+            return
+        last = page[-1]
+
+        batch = []
+        for pk, target_user_record_id, scheduled_delivery, title, extra in page:
+            if target_user_record_id != current_record:
+                current_record, seen = target_user_record_id, set()
+            key = build_dedupe_key(target_user_record_id, scheduled_delivery, title, extra)
+            if key in seen:
+                # Duplicates slipped through the old unique_together; leave them without a key.
+                continue
+            seen.add(key)
+            batch.append(Notification(pk=pk, dedupe_key=key))
+        with transaction.atomic():
+            Notification.objects.bulk_update(batch, ['dedupe_key'])
+
+
+class Migration(migrations.Migration):
+    # The backfill commits page by page, rather than in one huge transaction.
+    atomic = False
+
+    dependencies = [
+        ('django_notification_system', '0004_archived_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='dedupe_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+        migrations.RunPython(backfill_dedupe_keys, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='notification',
+            unique_together=set(),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0005_notification_dedupe_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='idempotency_key',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0008_notification_throttled_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='targetuserrecord',
+            name='quiet_hours_end',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='targetuserrecord',
+            name='quiet_hours_start',
+            field=models.TimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='targetuserrecord',
+            name='timezone',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0009_target_user_record_quiet_hours'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='targetuserrecord',
+            name='target_user_id',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0010_target_user_record_target_user_id_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='status',
+            field=models.CharField(choices=[('CANCELLED', 'Cancelled'), ('COALESCED', 'Coalesced'), ('DELIVERED', 'Delivered'), ('DELIVERY FAILURE', 'Delivery Failure'), ('INACTIVE DEVICE', 'Inactive Device'), ('OPTED OUT', 'Opted Out'), ('RETRY', 'Retry'), ('SCHEDULED', 'Scheduled'), ('THROTTLED', 'Throttled')], max_length=16),
+        ),
+    ]
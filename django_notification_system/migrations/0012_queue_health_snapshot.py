@@ -0,0 +1,35 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0011_notification_cancelled_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueHealthSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('snapshot_date', models.DateTimeField(db_index=True)),
+                ('target', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=16)),
+                ('pending_count', models.PositiveBigIntegerField(default=0)),
+                ('due_count', models.PositiveBigIntegerField(default=0)),
+                ('oldest_due', models.DateTimeField(blank=True, null=True)),
+                ('recent_counts', models.JSONField(blank=True, default=dict)),
+                ('retry_distribution', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'verbose_name_plural': 'Queue Health',
+                'db_table': 'notification_system_queue_health_snapshot',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['status', 'attempted_delivery'], name='notification_status_attempt'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0012_queue_health_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationBatch',
+            fields=[
+                ('created_date', models.DateTimeField(auto_now_add=True)),
+                ('modified_date', models.DateTimeField(auto_now=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200)),
+                ('status', models.CharField(choices=[('ACTIVE', 'Active'), ('PAUSED', 'Paused'), ('CANCELLED', 'Cancelled')], default='ACTIVE', max_length=16)),
+                ('scheduled_count', models.PositiveIntegerField(default=0)),
+                ('delivered_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Notification Batches',
+                'db_table': 'notification_system_notification_batch',
+            },
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='status',
+            field=models.CharField(choices=[('CANCELLED', 'Cancelled'), ('COALESCED', 'Coalesced'), ('DELIVERED', 'Delivered'), ('DELIVERY FAILURE', 'Delivery Failure'), ('INACTIVE DEVICE', 'Inactive Device'), ('OPTED OUT', 'Opted Out'), ('PAUSED', 'Paused'), ('RETRY', 'Retry'), ('SCHEDULED', 'Scheduled'), ('THROTTLED', 'Throttled')], max_length=16),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='batch',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='django_notification_system.notificationbatch'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['batch', 'status'], name='notification_batch_status'),
+        ),
+    ]
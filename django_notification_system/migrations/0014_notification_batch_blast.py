@@ -0,0 +1,53 @@
+# Generated by Django 3.1.14 on 2026-10-19 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0013_notification_batch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='audience',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='audience_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='body',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='channels',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='fanout_completed',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='fanout_cursor',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='scheduled_delivery',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='title',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.1.14 on 2026-10-19 19:04
+
+import uuid
+from collections import defaultdict
+
+from django.db import migrations, models, transaction
+
+# The number of shard keys, frozen as of this migration.
+SHARD_KEYS = 1024
+
+
+def backfill_shard_keys(apps, schema_editor):
+    """
+    Give existing notifications their shard key. Target user records are read
+    in keyset pages, and the notifications of each page are updated right
+    away, with one UPDATE per shard key, in a transaction of their own.
+    """
+    Notification = apps.get_model('django_notification_system', 'Notification')
+    TargetUserRecord = apps.get_model('django_notification_system', 'TargetUserRecord')
+    record_ids = TargetUserRecord.objects.order_by('pk').values_list('pk', flat=True)
+    last = None
+    while True:
+        page = list((record_ids if last is None else record_ids.filter(pk__gt=last))[:2000])
+        if not page:
+            return
+        last = page[-1]
+
+        records = defaultdict(list)
+        for pk in page:
+            records[uuid.UUID(str(pk)).int % SHARD_KEYS].append(pk)
+        with transaction.atomic():
+            for shard_key, ids in records.items():
+                Notification.objects.filter(
+                    target_user_record_id__in=ids, shard_key__isnull=True
+                ).update(shard_key=shard_key)
+
+
+class Migration(migrations.Migration):
+    # The backfill commits page by page, rather than in one huge transaction.
+    atomic = False
+
+    dependencies = [
+        ('django_notification_system', '0014_notification_batch_blast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='shard_key',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['shard_key', 'status', 'scheduled_delivery'], name='notification_shard_sched'),
+        ),
+        migrations.RunPython(backfill_shard_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.1.14 on 2026-10-19 19:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_notification_system', '0015_notification_shard_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationbatch',
+            name='skipped_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
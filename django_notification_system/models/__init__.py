@@ -3,14 +3,20 @@ This package contains all model definitions for the Django Notification System.
 As a convience, the models are made available directly on the package namespace.
 """
 
+from .archived_notification import ArchivedNotification
 from .notification import Notification
+from .notification_batch import NotificationBatch
 from .opt_out import NotificationOptOut
+from .queue_health import QueueHealthSnapshot
 from .target import NotificationTarget
 from .target_user_record import TargetUserRecord
 
 __all__ = [
+    "ArchivedNotification",
     "NotificationOptOut",
+    "QueueHealthSnapshot",
     "NotificationTarget",
     "TargetUserRecord",
     "Notification",
+    "NotificationBatch",
 ]
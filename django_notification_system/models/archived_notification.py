@@ -0,0 +1,66 @@
+from django.db import models
+
+from .target_user_record import TargetUserRecord
+
+
+class ArchivedNotification(models.Model):
+    """
+    Definition of an Archived Notification.
+
+    Notifications that reached a final status are moved here by the
+    `archive_notifications` management command, keeping the table that
+    `process_notifications` works on small.
+
+    Attributes
+    ----------
+    id : UUID
+        The UUID of the original notification.
+    target_user_record : TargetUserRecord
+        The TargetUserRecord the notification was sent to, if it still exists.
+    title : str
+        The title of the notification.
+    body : str
+        The body of the notification.
+    extra : dict
+        The extra data of the notification.
+    status : str
+        The final status of the notification.
+    scheduled_delivery : DateTimeField
+        When the notification was scheduled to be sent.
+    attempted_delivery : DateTimeField
+        When delivery of the notification was last attempted.
+    retry_attempts : PositiveIntegerField
+        The number of retries that were attempted.
+    created_date : DateTimeField
+        When the original notification was created.
+    archived_date : DateTimeField
+        When the notification was archived.
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    target_user_record = models.ForeignKey(
+        TargetUserRecord,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="archived_notifications",
+    )
+    title = models.CharField(max_length=100)
+    body = models.TextField()
+    extra = models.JSONField(blank=True, null=True, default=dict)
+    status = models.CharField(max_length=16)
+    scheduled_delivery = models.DateTimeField(db_index=True)
+    attempted_delivery = models.DateTimeField(null=True, blank=True)
+    retry_attempts = models.PositiveIntegerField(default=0)
+    created_date = models.DateTimeField()
+    archived_date = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "notification_system_archived_notification"
+        verbose_name_plural = "Archived Notifications"
+
+    def __str__(self):
+        return "{} - {} - {}".format(
+            self.title,
+            self.status,
+            self.scheduled_delivery,
+        )
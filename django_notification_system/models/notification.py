@@ -1,12 +1,79 @@
+import hashlib
+import json
 import uuid
+from datetime import datetime, timezone as dt_timezone
 
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.utils.dateparse import parse_datetime
 
 from .abstract import CreatedModifiedAbstractModel
+from .notification_batch import NotificationBatch
 from .target_user_record import TargetUserRecord
 
 
+# The number of shard keys. Dispatch shards are contiguous ranges of them.
+SHARD_KEYS = 1024
+
+
+def build_shard_key(target_user_record_id) -> int:
+    """
+    Build the shard key of a notification.
+
+    All notifications of a target user record share a shard key, so a dispatch
+    shard handles them in order. UUIDs are random, so the keys spread evenly.
+
+    Args:
+        target_user_record_id (UUID): The id of the notification's TargetUserRecord.
+
+    Returns:
+        int: A number from 0 to SHARD_KEYS - 1.
+    """
+    return uuid.UUID(str(target_user_record_id)).int % SHARD_KEYS
+
+
+def build_dedupe_key(
+    target_user_record_id,
+    scheduled_delivery,
+    title,
+    extra=None,
+    idempotency_key=None,
+) -> str:
+    """
+    Build the deduplication key of a notification.
+
+    Two notifications for the same target user record, scheduled for the same
+    time and with the same title and extra data share a key. When an
+    idempotency key is given, only it and the target user record are used.
+
+    Args:
+        target_user_record_id (UUID): The id of the notification's TargetUserRecord.
+        scheduled_delivery (datetime or str): When the notification is to be sent.
+        title (str): The title of the notification.
+        extra (dict, optional): The extra data of the notification.
+        idempotency_key (str, optional): A caller supplied idempotency key.
+
+    Returns:
+        str: A SHA-256 hex digest.
+    """
+    if idempotency_key:
+        payload = json.dumps([str(target_user_record_id), "idempotency", idempotency_key])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    if isinstance(scheduled_delivery, str):
+        scheduled_delivery = parse_datetime(scheduled_delivery) or scheduled_delivery
+    if isinstance(scheduled_delivery, datetime) and scheduled_delivery.tzinfo is not None:
+        scheduled_delivery = scheduled_delivery.astimezone(dt_timezone.utc)
+
+    payload = json.dumps(
+        [str(target_user_record_id), scheduled_delivery, title, extra or {}],
+        sort_keys=True,
+        cls=DjangoJSONEncoder,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
 class Notification(CreatedModifiedAbstractModel):
     """
     Definition of a Notification.
@@ -26,7 +93,8 @@ class Notification(CreatedModifiedAbstractModel):
         A dictionary of extra data to be sent to the notification processor. Valid keys
         are determined by each processor.
     status : CharField
-        The status of Notification. Options are: 'SCHEDULED', 'DELIVERED', 'DELIVERY_FAILURE', 'RETRY', 'INACTIVE_DEVICE'
+        The status of Notification. Options are: 'SCHEDULED', 'DELIVERED', 'DELIVERY_FAILURE', 'RETRY', 'INACTIVE_DEVICE',
+        'OPTED_OUT', 'COALESCED', 'THROTTLED', 'CANCELLED', 'PAUSED'
     scheduled_delivery : DateTimeField
         Day and time Notification is to be sent.
     attempted_delivery : DateTImeField
@@ -37,22 +105,48 @@ class Notification(CreatedModifiedAbstractModel):
         The number of retries that have been attempted.
     max_retries : PositiveIntegerField
         The max number of allowed retries.
+    push_ticket_id : str
+        The id of the Expo push ticket of a delivered push notification whose
+        push receipt has not been checked yet.
+    dedupe_key : str
+        Unique key preventing the same notification from being created twice.
+        Defaults to a hash of `target_user_record`, `scheduled_delivery`,
+        `title` and `extra`, or of `target_user_record` and `idempotency_key`
+        when the latter is set, see `build_dedupe_key`.
+    idempotency_key : str
+        Caller supplied key identifying the request that created the notification.
+    digest_key : str
+        Scheduled notifications for the same target user record that share a digest
+        key are coalesced into a single digest notification before they are sent.
+    batch : NotificationBatch
+        The campaign the notification belongs to, if any.
+    shard_key : int
+        Derived from the target user record, see `build_shard_key`. Partitions
+        the notifications among `process_notifications --shard` workers.
     """
 
+    CANCELLED = "CANCELLED"
+    COALESCED = "COALESCED"
     DELIVERED = "DELIVERED"
     DELIVERY_FAILURE = "DELIVERY FAILURE"
     INACTIVE_DEVICE = "INACTIVE DEVICE"
     OPTED_OUT = "OPTED OUT"
+    PAUSED = "PAUSED"
     RETRY = "RETRY"
     SCHEDULED = "SCHEDULED"
+    THROTTLED = "THROTTLED"
 
     STATUS_CHOICES = (
+        (CANCELLED, "Cancelled"),
+        (COALESCED, "Coalesced"),
         (DELIVERED, "Delivered"),
         (DELIVERY_FAILURE, "Delivery Failure"),
         (INACTIVE_DEVICE, "Inactive Device"),
         (OPTED_OUT, "Opted Out"),
+        (PAUSED, "Paused"),
         (RETRY, "Retry"),
         (SCHEDULED, "Scheduled"),
+        (THROTTLED, "Throttled"),
     )
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -70,15 +164,53 @@ class Notification(CreatedModifiedAbstractModel):
     retry_time_interval = models.PositiveIntegerField(default=0)
     retry_attempts = models.PositiveIntegerField(default=0)
     max_retries = models.PositiveIntegerField(default=3)
+    push_ticket_id = models.CharField(
+        max_length=64, null=True, blank=True, db_index=True
+    )
+    dedupe_key = models.CharField(
+        max_length=64, unique=True, null=True, blank=True, editable=False
+    )
+    idempotency_key = models.CharField(
+        max_length=255, null=True, blank=True, db_index=True
+    )
+    digest_key = models.CharField(
+        max_length=100, null=True, blank=True, db_index=True
+    )
+    batch = models.ForeignKey(
+        NotificationBatch,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="notifications",
+        # Covered by the (batch, status) index.
+        db_index=False,
+    )
+    shard_key = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
 
     class Meta:
         db_table = "notification_system_notification"
         verbose_name_plural = "Notifications"
-        unique_together = [
-            "target_user_record",
-            "scheduled_delivery",
-            "title",
-            "extra",
+        indexes = [
+            # Serves both the dispatch query and archival of old notifications.
+            models.Index(
+                fields=["status", "scheduled_delivery"],
+                name="notification_status_sched",
+            ),
+            # Serves pausing, resuming and cancelling batches.
+            models.Index(
+                fields=["batch", "status"],
+                name="notification_batch_status",
+            ),
+            # Serves the dispatch query of sharded workers.
+            models.Index(
+                fields=["shard_key", "status", "scheduled_delivery"],
+                name="notification_shard_sched",
+            ),
+            # Serves the recent throughput counts of `refresh_queue_health`.
+            models.Index(
+                fields=["status", "attempted_delivery"],
+                name="notification_status_attempt",
+            ),
         ]
 
     def __str__(self):
@@ -88,14 +220,28 @@ class Notification(CreatedModifiedAbstractModel):
             self.scheduled_delivery,
         )
 
+    def save(self, *args, **kwargs):
+        if self.shard_key is None and self.target_user_record_id:
+            self.shard_key = build_shard_key(self.target_user_record_id)
+        if not self.dedupe_key:
+            self.dedupe_key = build_dedupe_key(
+                self.target_user_record_id,
+                self.scheduled_delivery,
+                self.title,
+                self.extra,
+                self.idempotency_key,
+            )
+        super(Notification, self).save(*args, **kwargs)
+
     def clean(self):
         """
         Perform a few data checks whenever an instance is saved.
 
         1. Don't allow notifications with an attempted delivery date to
            have a status of 'SCHEDULED'.
-        2. If a notification has a status other than 'SCHEDULED' it MUST
-           have an attempted delivery date.
+        2. If a notification has a status other than 'SCHEDULED', 'OPTED OUT',
+           'COALESCED', 'THROTTLED', 'CANCELLED' or 'PAUSED' it MUST have an
+           attempted delivery date.
         3. Don't allow notifications to be saved if the user has opted out.
 
         Raises
@@ -115,7 +261,7 @@ class Notification(CreatedModifiedAbstractModel):
                 "Status cannot be 'SCHEDULED' if there is an attempted delivery."
             )
 
-        if not self.attempted_delivery and self.status not in ["SCHEDULED", "OPTED OUT"]:
+        if not self.attempted_delivery and self.status not in ["SCHEDULED", "OPTED OUT", "COALESCED", "THROTTLED", "CANCELLED", "PAUSED"]:
             raise ValidationError(
                 "Attempted Delivery must be filled out if Status is {}".format(
                     self.status
@@ -0,0 +1,188 @@
+import uuid
+
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .abstract import CreatedModifiedAbstractModel
+
+
+class NotificationBatch(CreatedModifiedAbstractModel):
+    """
+    Definition of a Notification Batch.
+
+    Groups the notifications of a campaign, so its progress can be followed and
+    it can be paused, resumed or cancelled as a whole. The counters are kept up
+    to date incrementally: `scheduled_count` when notifications are created in
+    bulk, `delivered_count` and `failed_count` by `process_notifications`
+    for every chunk it processes, and every other status change through
+    `utils.bulk.set_notification_status`.
+
+    A batch with an `audience` is a blast: its notifications are created in the
+    background by the `process_notification_blasts` management command, one
+    chunk of users at a time, rather than by whoever created the batch.
+
+    Attributes
+    ----------
+    id : UUID
+        The unique UUID of the record.
+    name : str
+        A human friendly name for the batch.
+    status : str
+        'ACTIVE', 'PAUSED' or 'CANCELLED'.
+    scheduled_count : PositiveIntegerField
+        The number of notifications created for the batch.
+    delivered_count : PositiveIntegerField
+        The number of notifications delivered.
+    failed_count : PositiveIntegerField
+        The number of notifications that reached a final status other than
+        DELIVERED while being processed.
+    cancelled_count : PositiveIntegerField
+        The number of notifications cancelled.
+    skipped_count : PositiveIntegerField
+        The number of notifications not sent because their user opted out or
+        because they were coalesced into a digest.
+    audience : dict
+        For blasts, the field lookups that select the users to notify, e.g.
+        {"groups__name": "Volunteers"}.
+    title : str
+        For blasts, the title of the notifications.
+    body : str
+        For blasts, the body of the notifications.
+    channels : list
+        For blasts, the names of the NotificationTargets to use, most preferred first.
+    scheduled_delivery : DateTimeField
+        For blasts, the scheduled delivery of the notifications.
+    audience_count : PositiveIntegerField
+        The number of users of the audience fanned out so far.
+    fanout_cursor : str
+        The primary key of the last user fanned out, so fan-out can resume.
+    fanout_completed : DateTimeField
+        When the fan-out of the blast was completed.
+    """
+
+    ACTIVE = "ACTIVE"
+    PAUSED = "PAUSED"
+    CANCELLED = "CANCELLED"
+
+    STATUS_CHOICES = (
+        (ACTIVE, "Active"),
+        (PAUSED, "Paused"),
+        (CANCELLED, "Cancelled"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=200)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=ACTIVE)
+    scheduled_count = models.PositiveIntegerField(default=0)
+    delivered_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    audience = models.JSONField(null=True, blank=True)
+    title = models.CharField(max_length=100, blank=True)
+    body = models.TextField(blank=True)
+    channels = models.JSONField(default=list, blank=True)
+    scheduled_delivery = models.DateTimeField(null=True, blank=True)
+    audience_count = models.PositiveIntegerField(default=0)
+    fanout_cursor = models.CharField(max_length=64, blank=True)
+    fanout_completed = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "notification_system_notification_batch"
+        verbose_name_plural = "Notification Batches"
+
+    def __str__(self):
+        return "{} - {}".format(self.name, self.status)
+
+    @property
+    def is_blast(self):
+        """Whether the notifications of the batch are fanned out in the background."""
+        return self.audience is not None
+
+    @property
+    def remaining_count(self):
+        """The number of notifications that are still to be processed."""
+        return max(
+            self.scheduled_count
+            - self.delivered_count
+            - self.failed_count
+            - self.cancelled_count
+            - self.skipped_count,
+            0,
+        )
+
+    def pause(self) -> int:
+        """
+        Hold back the pending notifications of the batch. Notifications waiting
+        for a retry keep their `attempted_delivery`, which is how `resume` tells
+        them apart from those that were never sent.
+
+        Returns:
+            int: The number of notifications paused.
+        """
+        from .notification import Notification
+
+        with transaction.atomic():
+            paused = self.notifications.filter(
+                status__in=[Notification.SCHEDULED, Notification.RETRY]
+            ).update(status=Notification.PAUSED)
+            self._set_status(self.PAUSED)
+        return paused
+
+    def resume(self) -> int:
+        """
+        Schedule the paused notifications of the batch again, and notify the
+        queue backend. Those already attempted go back to RETRY, and those of
+        users who opted out in the meantime are marked as OPTED_OUT instead.
+
+        Returns:
+            int: The number of notifications resumed.
+        """
+        from ..dispatch.queues import get_queue
+        from ..utils.bulk import set_notification_status
+        from .notification import Notification
+
+        with transaction.atomic():
+            paused = self.notifications.filter(status=Notification.PAUSED)
+            set_notification_status(
+                paused.filter(target_user_record__user__notification_opt_out__active=True),
+                Notification.OPTED_OUT,
+            )
+            resumed = paused.filter(attempted_delivery__isnull=False).update(
+                status=Notification.RETRY
+            )
+            resumed += paused.update(status=Notification.SCHEDULED)
+            self._set_status(self.ACTIVE)
+            if resumed:
+                get_queue().notify()
+        return resumed
+
+    def cancel(self) -> int:
+        """
+        Cancel the pending and paused notifications of the batch.
+
+        Returns:
+            int: The number of notifications cancelled.
+        """
+        from .notification import Notification
+
+        with transaction.atomic():
+            cancelled = self.notifications.filter(
+                status__in=[
+                    Notification.SCHEDULED,
+                    Notification.RETRY,
+                    Notification.PAUSED,
+                ]
+            ).update(status=Notification.CANCELLED)
+            self._set_status(self.CANCELLED, cancelled_count=F("cancelled_count") + cancelled)
+        self.refresh_from_db(fields=["cancelled_count"])
+        return cancelled
+
+    def _set_status(self, status, **values):
+        now = timezone.now()
+        NotificationBatch.objects.filter(pk=self.pk).update(
+            status=status, modified_date=now, **values
+        )
+        self.status = status
+        self.modified_date = now
@@ -42,11 +42,16 @@ class NotificationOptOut(CreatedModifiedAbstractModel):
         """
         When an instance of this model is saved, if the opt out is active
         change the status of notifications with a current status of
-        SCHEDULED or RETRY to OPTED_OUT.
+        SCHEDULED, RETRY or PAUSED to OPTED_OUT.
         """
+        from ..utils.bulk import set_notification_status
+
         if self.active:
-            Notification.objects.filter(
-                status__in=[Notification.SCHEDULED, Notification.RETRY],
-                target_user_record__user=self.user,
-            ).update(status=Notification.OPTED_OUT)
+            set_notification_status(
+                Notification.objects.filter(
+                    status__in=[Notification.SCHEDULED, Notification.RETRY, Notification.PAUSED],
+                    target_user_record__user=self.user,
+                ),
+                Notification.OPTED_OUT,
+            )
         super(NotificationOptOut, self).save(*args, **kwargs)
@@ -0,0 +1,64 @@
+from django.db import models
+
+
+class QueueHealthSnapshot(models.Model):
+    """
+    Definition of a Queue Health Snapshot.
+
+    A small rollup of the notification queue for one target and status, written
+    periodically by the `refresh_queue_health` management command so dashboards
+    never have to aggregate the notification table themselves.
+
+    Attributes
+    ----------
+    snapshot_date : DateTimeField
+        When the snapshot was taken. All rows of one refresh share it.
+    target : str
+        The name of the NotificationTarget.
+    status : str
+        The status of the notifications.
+    pending_count : PositiveBigIntegerField
+        The number of SCHEDULED or RETRY notifications, zero for other statuses.
+    due_count : PositiveBigIntegerField
+        The number of pending notifications whose scheduled delivery has passed.
+    oldest_due : DateTimeField
+        The scheduled delivery of the oldest due notification.
+    recent_counts : dict
+        For final statuses, the number of notifications attempted within recent
+        windows, keyed by window length in seconds, e.g. {"300": 12, "3600": 140}.
+    retry_distribution : dict
+        The number of pending notifications by number of retry attempts.
+    """
+
+    snapshot_date = models.DateTimeField(db_index=True)
+    target = models.CharField(max_length=100)
+    status = models.CharField(max_length=16)
+    pending_count = models.PositiveBigIntegerField(default=0)
+    due_count = models.PositiveBigIntegerField(default=0)
+    oldest_due = models.DateTimeField(null=True, blank=True)
+    recent_counts = models.JSONField(default=dict, blank=True)
+    retry_distribution = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        db_table = "notification_system_queue_health_snapshot"
+        verbose_name_plural = "Queue Health"
+
+    def __str__(self):
+        return "{} - {} - {}".format(self.target, self.status, self.snapshot_date)
+
+    @classmethod
+    def latest(cls):
+        """Return the rows of the most recent snapshot."""
+        snapshot_date = (
+            cls.objects.order_by("-snapshot_date")
+            .values_list("snapshot_date", flat=True)
+            .first()
+        )
+        return cls.objects.filter(snapshot_date=snapshot_date).order_by("target", "status")
+
+    @property
+    def lag(self):
+        """How long the oldest due notification has been waiting, if any."""
+        if self.oldest_due is None:
+            return None
+        return self.snapshot_date - self.oldest_due
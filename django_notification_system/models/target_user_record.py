@@ -1,6 +1,8 @@
 import uuid
 
+from dateutil import tz
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.db import transaction
 
@@ -34,6 +36,14 @@ class TargetUserRecord(CreatedModifiedAbstractModel):
     active : boolean
         Indicator of whether user target is active or not. For example,
         we have an outdated email record for a user.
+    timezone : str
+        The IANA name of the user's timezone, e.g. "America/Chicago". Defaults
+        to the project's TIME_ZONE when blank.
+    quiet_hours_start : time
+        Local time from which non-urgent notifications are held back.
+    quiet_hours_end : time
+        Local time at which held back notifications are sent. May be earlier
+        than `quiet_hours_start`, for quiet hours spanning midnight.
     """
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -43,9 +53,12 @@ class TargetUserRecord(CreatedModifiedAbstractModel):
         related_name="notification_target_user_records",
     )
     target = models.ForeignKey(NotificationTarget, on_delete=models.PROTECT)
-    target_user_id = models.CharField(max_length=200)
+    target_user_id = models.CharField(max_length=200, db_index=True)
     description = models.CharField(max_length=200)
     active = models.BooleanField(default=True)
+    timezone = models.CharField(max_length=64, null=True, blank=True)
+    quiet_hours_start = models.TimeField(null=True, blank=True)
+    quiet_hours_end = models.TimeField(null=True, blank=True)
 
     class Meta:
         db_table = "notification_system_target_user_record"
@@ -59,3 +72,20 @@ class TargetUserRecord(CreatedModifiedAbstractModel):
 
     def __str__(self):
         return "{}: {}".format(self.user.username, self.description)
+
+    def clean(self):
+        """
+        Validate the timezone, and that quiet hours have both a start and an end.
+
+        Raises
+        ------
+        ValidationError
+            Will include details of what caused the validation error.
+        """
+        if self.timezone and tz.gettz(self.timezone) is None:
+            raise ValidationError({"timezone": "Unknown timezone {}.".format(self.timezone)})
+
+        if (self.quiet_hours_start is None) != (self.quiet_hours_end is None):
+            raise ValidationError(
+                "Quiet hours need both a start and an end, or neither."
+            )
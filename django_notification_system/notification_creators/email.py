@@ -3,8 +3,11 @@ from django_notification_system.utils import (
     check_for_user_opt_out,
     user_notification_targets,
 )
+from django_notification_system.utils.bulk import bulk_create_notifications
+from django_notification_system.utils.idempotency import recent_idempotency_keys
 
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.template.loader import get_template
 from django.utils import timezone
 
@@ -25,6 +28,8 @@ def create_notification(
     max_retries: int = 3,
     quiet=False,
     extra: dict = None,
+    idempotency_key: str = None,
+    digest_key: str = None,
 ) -> None:
     """
     This function will generate an email notification.
@@ -41,6 +46,11 @@ def create_notification(
         quiet (bool, optional): Suppress exceptions from being raised. Defaults to False.
         extra (dict, optional): User specified additional data that will be used to
             populate an HTML template if "template_name" is present inside.
+        idempotency_key (str, optional): A key identifying this request, such as the id of the
+            event that triggered it. Repeated calls with the same key create no new
+            notifications and raise no exceptions, which makes retries safe.
+        digest_key (str, optional): Notifications for the same user target sharing a digest key
+            are coalesced into a single digest when they are processed.
 
     Raises:
         UserIsOptedOut: When the user has an active opt-out.
@@ -48,6 +58,11 @@ def create_notification(
         NotificationsNotCreated: When the notifications could not be created.
     """
 
+    cache_key = ("Email", user.pk, idempotency_key)
+    if idempotency_key and cache_key in recent_idempotency_keys:
+        # A hot duplicate, no need to ask the database.
+        return
+
     try:
         check_for_user_opt_out(user=user)
     except UserIsOptedOut:
@@ -79,22 +94,30 @@ def create_notification(
             "You must either specify a `body` value or include 'template_name' in `extra` to create an email notification."
         )
 
-    notifications_created = []
-    for target_user_record in target_user_records:
-        notification, created = Notification.objects.get_or_create(
-            target_user_record=target_user_record,
-            title=title,
-            scheduled_delivery=scheduled_delivery,
-            defaults={
-                "body": email_body,
-                "status": "SCHEDULED",
-                "retry_time_interval": retry_time_interval,
-                "max_retries": max_retries,
-            },
-        )
+    notifications_created = bulk_create_notifications(
+        [
+            Notification(
+                target_user_record=target_user_record,
+                title=title,
+                scheduled_delivery=scheduled_delivery,
+                body=email_body,
+                status=Notification.SCHEDULED,
+                retry_time_interval=retry_time_interval,
+                max_retries=max_retries,
+                idempotency_key=idempotency_key,
+                digest_key=digest_key,
+            )
+            for target_user_record in target_user_records
+        ],
+        # With an idempotency key, duplicates are expected and silently
+        # ignored, so a single INSERT is all we need.
+        check_existing=not idempotency_key,
+    )
 
-        if created:
-            notifications_created.append(notification)
+    if idempotency_key:
+        # Only once committed: a rolled back call must be retried for real.
+        transaction.on_commit(lambda: recent_idempotency_keys.add(cache_key))
+        return
 
     if not notifications_created:
         if quiet:
@@ -8,8 +8,11 @@ from django_notification_system.utils import (
     check_for_user_opt_out,
     user_notification_targets,
 )
+from django_notification_system.utils.bulk import bulk_create_notifications
+from django_notification_system.utils.idempotency import recent_idempotency_keys
 
 from django.contrib.auth.models import User
+from django.db import transaction
 from django.utils import timezone
 
 from ..models import Notification
@@ -26,6 +29,8 @@ def create_notification(
     max_retries: int = 3,
     quiet=False,
     extra: dict = None,
+    idempotency_key: str = None,
+    digest_key: str = None,
 ) -> None:
     """
     Generate an Expo push notification.
@@ -41,12 +46,22 @@ def create_notification(
         max_retries (int, optional): Maximum number of retry attempts for delivery. Defaults to 3.
         quiet (bool, optional): Suppress exceptions from being raised. Defaults to False.
         extra (dict, optional): Defaults to None.
+        idempotency_key (str, optional): A key identifying this request, such as the id of the
+            event that triggered it. Repeated calls with the same key create no new
+            notifications and raise no exceptions, which makes retries safe.
+        digest_key (str, optional): Notifications for the same user target sharing a digest key
+            are coalesced into a single digest when they are processed.
 
     Raises:
         UserIsOptedOut: When the user has an active opt-out.
         UserHasNoTargetRecords: When the user has no eligible targets for this notification type.
         NotificationsNotCreated: When the notifications could not be created.
     """
+    cache_key = ("Expo", user.pk, idempotency_key)
+    if idempotency_key and cache_key in recent_idempotency_keys:
+        # A hot duplicate, no need to ask the database.
+        return
+
     try:
         check_for_user_opt_out(user=user)
     except UserIsOptedOut:
@@ -68,26 +83,35 @@ def create_notification(
     if scheduled_delivery is None:
         scheduled_delivery = timezone.now()
 
-    notifications_created = []
-    for target_user_record in target_user_records:
-        # JSONField casts None to {}, so we have to check if the server value = {}
-        if extra is None:
-            extra = {}  # I hate casting so much
-        notification, created = Notification.objects.get_or_create(
-            target_user_record=target_user_record,
-            title=title,
-            scheduled_delivery=scheduled_delivery,
-            extra=extra,
-            defaults={
-                "body": body,
-                "status": "SCHEDULED",
-                "retry_time_interval": retry_time_interval,
-                "max_retries": max_retries,
-            },
-        )
-
-        if created:
-            notifications_created.append(notification)
+    # JSONField casts None to {}, so we have to check if the server value = {}
+    if extra is None:
+        extra = {}  # I hate casting so much
+
+    notifications_created = bulk_create_notifications(
+        [
+            Notification(
+                target_user_record=target_user_record,
+                title=title,
+                scheduled_delivery=scheduled_delivery,
+                extra=extra,
+                body=body,
+                status=Notification.SCHEDULED,
+                retry_time_interval=retry_time_interval,
+                max_retries=max_retries,
+                idempotency_key=idempotency_key,
+                digest_key=digest_key,
+            )
+            for target_user_record in target_user_records
+        ],
+        # With an idempotency key, duplicates are expected and silently
+        # ignored, so a single INSERT is all we need.
+        check_existing=not idempotency_key,
+    )
+
+    if idempotency_key:
+        # Only once committed: a rolled back call must be retried for real.
+        transaction.on_commit(lambda: recent_idempotency_keys.add(cache_key))
+        return
 
     if not notifications_created:
         if quiet:
@@ -6,7 +6,9 @@ import django.core.mail
 from django.conf import settings
 from django.utils import timezone
 
+from ..dispatch.profiling import phase
 from ..utils import check_and_update_retry_attempts
+from ..utils.http import DEFAULT_TIMEOUT, get_timeout
 
 
 def send_notification(notification):
@@ -19,14 +21,23 @@ def send_notification(notification):
     Returns:
         str: Whether the email has successfully sent, or an error message.
     """
+    # Without a timeout for the email target, EMAIL_TIMEOUT still applies.
+    default_timeout = (settings.EMAIL_TIMEOUT,) * 2 if settings.EMAIL_TIMEOUT else DEFAULT_TIMEOUT
+    connection = django.core.mail.get_connection(
+        timeout=max(get_timeout('email', default_timeout)))
+
+    with phase("render"):
+        message = html2text.html2text(notification.body)
+
     try:
         django.core.mail.send_mail(
             subject=notification.title,
-            message=html2text.html2text(notification.body),
+            message=message,
             html_message=notification.body,
             from_email=settings.NOTIFICATION_SYSTEM_TARGETS['email']['from_email'],
             recipient_list=[notification.target_user_record.target_user_id],
             fail_silently=False,
+            connection=connection,
         )
 
     except SMTPException as e:
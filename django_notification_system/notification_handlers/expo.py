@@ -1,16 +1,17 @@
 """A Django Notification System Handler."""
 from exponent_server_sdk import (
-    PushClient,
     PushMessage,
     PushResponseError,
     PushServerError,
     DeviceNotRegisteredError,
 )
-from requests import HTTPError
+from requests import RequestException
 
 from django.utils import timezone
 
+from ..dispatch.profiling import phase
 from ..utils import check_and_update_retry_attempts
+from ..utils.expo_client import PushClient
 
 
 def send_notification(notification) -> str:
@@ -23,24 +24,25 @@ def send_notification(notification) -> str:
     Returns:
         String: Whether the push notification has successfully sent, or an error message.
     """
-    extra = prepare_extra(notification.extra)
+    with phase("render"):
+        extra = prepare_extra(notification.extra)
+        message = PushMessage(
+            to=str(notification.target_user_record.target_user_id),
+            title=notification.title,
+            body=notification.body,
+            data=extra["data"],
+            sound=extra["sound"],
+            ttl=extra["ttl"],
+            expiration=extra["expiration"],
+            priority=extra["priority"],
+            badge=extra["badge"],
+            channel_id=extra["channel_id"],
+        )
 
     try:
-        response = PushClient().publish(
-            PushMessage(
-                to=str(notification.target_user_record.target_user_id),
-                title=notification.title,
-                body=notification.body,
-                data=extra["data"],
-                sound=extra["sound"],
-                ttl=extra["ttl"],
-                expiration=extra["expiration"],
-                priority=extra["priority"],
-                badge=extra["badge"],
-                channel_id=extra["channel_id"],
-            )
-        )
-    except (PushServerError, HTTPError, ValueError) as e:
+        response = PushClient().publish(message)
+    except (PushServerError, RequestException, ValueError) as e:
+        # RequestException covers HTTP errors as well as timeouts.
         check_and_update_retry_attempts(notification)
         return "{}: {}".format(type(e), e)
 
@@ -98,6 +100,9 @@ def handle_push_response(notification, response):
         target_user_record = notification.target_user_record
         target_user_record.active = False
         target_user_record.save()
+        notification.status = notification.INACTIVE_DEVICE
+        notification.attempted_delivery = timezone.now()
+        notification.save()
         return "{}: {}".format(type(e), e)
     except PushResponseError as e:
         check_and_update_retry_attempts(notification)
@@ -105,5 +110,8 @@ def handle_push_response(notification, response):
     else:
         notification.status = notification.DELIVERED
         notification.attempted_delivery = timezone.now()
+        # Keep the ticket id so the receipt can be checked later on by
+        # the `process_expo_receipts` command.
+        notification.push_ticket_id = getattr(response, "id", None)
         notification.save()
         return "Notification Successfully Pushed!"
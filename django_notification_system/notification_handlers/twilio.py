@@ -1,9 +1,52 @@
+from functools import lru_cache
+
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 
 from django.conf import settings
 from django.utils import timezone
 
 from ..utils import check_and_update_retry_attempts
+from ..utils.http import get_timeout
+
+
+class _TimeoutHttpClient(TwilioHttpClient):
+    """
+    A pooled Twilio HTTP client with a default timeout. Older twilio releases,
+    such as the pinned 6.29.1, take no `timeout` argument when created.
+    """
+
+    def __init__(self, timeout):
+        super().__init__(pool_connections=True)
+        self.default_timeout = timeout
+
+    def request(self, *args, timeout=None, **kwargs):
+        return super().request(*args, timeout=timeout or self.default_timeout, **kwargs)
+
+
+@lru_cache(maxsize=8)
+def get_client(account_sid, auth_token, timeout, base_url=None):
+    """
+    Return a Twilio client whose pooled connections are reused across sends.
+
+    Args:
+        account_sid (str): The Twilio account SID.
+        auth_token (str): The Twilio auth token.
+        timeout (float): The request timeout in seconds.
+        base_url (str, optional): Replaces https://api.twilio.com, e.g. for
+            the fake Twilio API of `utils.fake_providers`.
+
+    Returns:
+        Client: The Twilio client.
+    """
+    client = Client(
+        account_sid,
+        auth_token,
+        http_client=_TimeoutHttpClient(timeout),
+    )
+    if base_url:
+        client.api.base_url = base_url
+    return client
 
 
 def send_notification(notification):
@@ -24,7 +67,12 @@ def send_notification(notification):
         twilio_sender = twilio_settings['sender']
         twilio_receiver = notification.target_user_record.target_user_id
 
-        client = Client(twilio_account_sid, twilio_auth_token)
+        # Twilio takes a single timeout, which applies to connecting and reading.
+        client = get_client(
+            twilio_account_sid,
+            twilio_auth_token,
+            max(get_timeout('twilio_sms')),
+            twilio_settings.get('base_url'))
 
         client.messages.create(
             body=notification.body,
@@ -0,0 +1,118 @@
+"""
+A transactional outbox for notifications.
+
+Notifications requested with `enqueue_notification` inside a transaction are
+kept in memory and created once the transaction commits, using
+`transaction.on_commit`. This keeps the caller's transaction short, and no
+notifications are created for work that is rolled back, savepoints included.
+Callers with many requests at hand can create them all with a single bulk insert
+with `create_buffered_notifications`, e.g. from their own on_commit callback.
+
+Example:
+
+    from django.db import transaction
+    from django_notification_system.outbox import enqueue_notification
+
+    with transaction.atomic():
+        comment = Comment.objects.create(...)
+        for user in comment.thread.subscribers.all():
+            enqueue_notification(user, "Email", "New comment", comment.text)
+"""
+from datetime import datetime
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+
+from .models import Notification, TargetUserRecord
+from .utils.bulk import bulk_create_notifications
+
+
+def enqueue_notification(
+    user: User,
+    target_name: str,
+    title: str,
+    body: str,
+    scheduled_delivery: datetime = None,
+    retry_time_interval: int = 60,
+    max_retries: int = 3,
+    extra: dict = None,
+    idempotency_key: str = None,
+    digest_key: str = None,
+    using: str = DEFAULT_DB_ALIAS,
+) -> None:
+    """
+    Request notifications for all active records of a user in a target once the
+    current transaction commits.
+
+    Unlike the notification creators, nothing is checked while enqueuing. Users
+    who are opted out or have no active records for the target are skipped
+    silently when the notifications are created.
+
+    Args:
+        user (User): The user to whom the notification will be sent.
+        target_name (str): The name of the NotificationTarget, e.g. "Email".
+        title (str): The title for the notification.
+        body (str): The body of the notification.
+        scheduled_delivery (datetime, optional): Defaults to immediately.
+        retry_time_interval (int, optional): Delay between send attempts. Defaults to 60.
+        max_retries (int, optional): Maximum number of retry attempts. Defaults to 3.
+        extra (dict, optional): Defaults to None.
+        idempotency_key (str, optional): A key identifying this request, see the
+            notification creators.
+        digest_key (str, optional): A key to coalesce notifications by, see the
+            notification creators.
+        using (str, optional): The database alias whose transaction to follow.
+    """
+    request = {
+        "user_id": user.pk,
+        "target_name": target_name,
+        "title": title,
+        "body": body,
+        "scheduled_delivery": scheduled_delivery or timezone.now(),
+        "retry_time_interval": retry_time_interval,
+        "max_retries": max_retries,
+        "extra": extra or {},
+        "idempotency_key": idempotency_key,
+        "digest_key": digest_key,
+    }
+
+    # Django drops the callbacks of rolled back transactions and savepoints, and
+    # runs them right away outside of a transaction.
+    transaction.on_commit(partial(create_buffered_notifications, [request]), using=using)
+
+
+def create_buffered_notifications(requests):
+    """
+    Create the notifications for a list of buffered requests. All target user
+    records are resolved with one query, and the notifications are created with
+    one INSERT per 1000 notifications.
+    """
+    records = {}
+    for pk, user_id, target_name in (
+        TargetUserRecord.objects.filter(
+            user_id__in={request["user_id"] for request in requests},
+            target__name__in={request["target_name"] for request in requests},
+            active=True,
+        )
+        .exclude(user__notification_opt_out__active=True)
+        .values_list("id", "user_id", "target__name")
+    ):
+        records.setdefault((user_id, target_name), []).append(pk)
+
+    notifications = []
+    for request in requests:
+        request = dict(request)
+        for target_user_record_id in records.get(
+            (request.pop("user_id"), request.pop("target_name")), []
+        ):
+            notifications.append(
+                Notification(
+                    target_user_record_id=target_user_record_id,
+                    status=Notification.SCHEDULED,
+                    **request,
+                )
+            )
+
+    bulk_create_notifications(notifications, check_existing=False)
@@ -0,0 +1,277 @@
+"""
+Channel-agnostic notifications with fallback routing.
+
+`notify` sends a notification to each user through the first channel in a
+preference order for which the user has an active target user record. The
+remaining channels are stored in the notification's `extra["fallback_channels"]`,
+and when a handler finds the device inactive, `escalate_notifications` creates
+a notification on the next channel instead. `fan_out_blast` does the same for
+the audience of a blast, one chunk of users at a time.
+
+Example:
+
+    from django_notification_system.routing import notify
+
+    notify(
+        User.objects.filter(groups__name="Volunteers"),
+        "Shift reminder",
+        "Your shift starts in an hour.",
+        channels=["Expo", "Twilio", "Email"],
+    )
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, Model
+from django.utils import timezone
+
+from .models import Notification, NotificationBatch, TargetUserRecord
+from .utils.bulk import bulk_create_notifications
+
+DEFAULT_CHANNELS = ("Expo", "Twilio", "Email")
+FALLBACK_CHANNELS = "fallback_channels"
+
+
+def resolve_channels(user_ids, channels):
+    """
+    Resolve the preferred channel of each user with one query.
+
+    Opted out users and users without an active record in any of the channels
+    are left out.
+
+    Args:
+        user_ids (iterable or QuerySet): The ids of the users.
+        channels ([str]): Names of NotificationTargets, most preferred first.
+
+    Returns:
+        dict: {user id: (channel name, [target user record ids])}
+    """
+    records = defaultdict(lambda: defaultdict(list))
+    for record_id, user_id, target_name in (
+        TargetUserRecord.objects.filter(
+            user_id__in=user_ids,
+            target__name__in=channels,
+            active=True,
+        )
+        .exclude(user__notification_opt_out__active=True)
+        .values_list("id", "user_id", "target__name")
+    ):
+        records[user_id][target_name].append(record_id)
+
+    resolved = {}
+    for user_id, by_channel in records.items():
+        channel = next(channel for channel in channels if channel in by_channel)
+        resolved[user_id] = (channel, by_channel[channel])
+    return resolved
+
+
+def notify(
+    users,
+    title: str,
+    body: str,
+    channels=DEFAULT_CHANNELS,
+    scheduled_delivery: datetime = None,
+    retry_time_interval: int = 60,
+    max_retries: int = 3,
+    extra: dict = None,
+    idempotency_key: str = None,
+    digest_key: str = None,
+    batch=None,
+) -> list:
+    """
+    Create notifications for a user, or a whole audience, on each user's
+    preferred channel.
+
+    Unlike the notification creators, users who are opted out or have no active
+    records in any of the channels are skipped silently.
+
+    Args:
+        users (User or QuerySet): A user, or a queryset or list of users.
+        title (str): The title for the notification.
+        body (str): The body of the notification.
+        channels ([str], optional): Names of NotificationTargets, most preferred
+            first. Defaults to Expo, then Twilio, then Email.
+        scheduled_delivery (datetime, optional): Defaults to immediately.
+        retry_time_interval (int, optional): Delay between send attempts. Defaults to 60.
+        max_retries (int, optional): Maximum number of retry attempts. Defaults to 3.
+        extra (dict, optional): Defaults to None.
+        idempotency_key (str, optional): A key identifying this request, see the
+            notification creators.
+        digest_key (str, optional): A key to coalesce notifications by, see the
+            notification creators.
+        batch (NotificationBatch, optional): The campaign the notifications belong
+            to. Notifications of a paused batch are created paused.
+
+    Returns:
+        [Notification]: The notifications that were created.
+    """
+    if batch is not None and batch.status == NotificationBatch.CANCELLED:
+        return []
+
+    if isinstance(users, Model):
+        user_ids = [users.pk]
+    elif hasattr(users, "values"):
+        # A queryset, resolved as a subquery.
+        user_ids = users.values("pk")
+    else:
+        user_ids = [user.pk for user in users]
+
+    channels = list(channels)
+    extra = extra or {}
+    scheduled_delivery = scheduled_delivery or timezone.now()
+    status = (
+        Notification.PAUSED
+        if batch is not None and batch.status == NotificationBatch.PAUSED
+        else Notification.SCHEDULED
+    )
+
+    notifications = []
+    for channel, record_ids in resolve_channels(user_ids, channels).values():
+        fallback_channels = channels[channels.index(channel) + 1:]
+        for record_id in record_ids:
+            notifications.append(
+                Notification(
+                    target_user_record_id=record_id,
+                    title=title,
+                    body=body,
+                    extra={**extra, FALLBACK_CHANNELS: fallback_channels},
+                    status=status,
+                    scheduled_delivery=scheduled_delivery,
+                    retry_time_interval=retry_time_interval,
+                    max_retries=max_retries,
+                    idempotency_key=idempotency_key,
+                    digest_key=digest_key,
+                    batch=batch,
+                )
+            )
+
+    return bulk_create_notifications(notifications, check_existing=not idempotency_key)
+
+
+def escalate_notifications(notification_ids) -> list:
+    """
+    Create notifications on the next fallback channel for notifications whose
+    device turned out to be inactive.
+
+    Only INACTIVE DEVICE notifications with fallback channels left are escalated.
+    Escalating the same notification twice creates a single notification.
+
+    Args:
+        notification_ids (iterable): The ids of the notifications to escalate.
+
+    Returns:
+        [Notification]: The notifications that were created.
+    """
+    failed = [
+        notification
+        for notification in Notification.objects.filter(
+            id__in=list(notification_ids), status=Notification.INACTIVE_DEVICE
+        ).select_related("target_user_record")
+        if (notification.extra or {}).get(FALLBACK_CHANNELS)
+    ]
+    if not failed:
+        return []
+
+    all_channels = {
+        channel
+        for notification in failed
+        for channel in notification.extra[FALLBACK_CHANNELS]
+    }
+    resolved = {}
+    for record_id, user_id, target_name in (
+        TargetUserRecord.objects.filter(
+            user_id__in={notification.target_user_record.user_id for notification in failed},
+            target__name__in=all_channels,
+            active=True,
+        )
+        .exclude(user__notification_opt_out__active=True)
+        .values_list("id", "user_id", "target__name")
+    ):
+        resolved.setdefault((user_id, target_name), []).append(record_id)
+
+    now = timezone.now()
+    notifications = []
+    for notification in failed:
+        fallback_channels = notification.extra[FALLBACK_CHANNELS]
+        user_id = notification.target_user_record.user_id
+        for i, channel in enumerate(fallback_channels):
+            record_ids = resolved.get((user_id, channel))
+            if record_ids:
+                break
+        else:
+            continue
+
+        for record_id in record_ids:
+            notifications.append(
+                Notification(
+                    target_user_record_id=record_id,
+                    title=notification.title,
+                    body=notification.body,
+                    extra={
+                        **notification.extra,
+                        FALLBACK_CHANNELS: fallback_channels[i + 1:],
+                    },
+                    status=Notification.SCHEDULED,
+                    scheduled_delivery=now,
+                    retry_time_interval=notification.retry_time_interval,
+                    max_retries=notification.max_retries,
+                    idempotency_key="escalation:{}".format(notification.id),
+                    batch_id=notification.batch_id,
+                )
+            )
+
+    return bulk_create_notifications(notifications, check_existing=False)
+
+
+def fan_out_blast(batch, batch_size: int = 1000) -> int:
+    """
+    Create the notifications of a blast, one chunk of users at a time.
+
+    Each chunk is inserted, and the cursor of the batch moved past it, in a
+    single transaction, so an interrupted fan-out resumes where it stopped.
+    The batch is reloaded before every chunk, which stops the fan-out as soon
+    as the batch is cancelled and creates paused notifications while it is paused.
+
+    Args:
+        batch (NotificationBatch): A blast, i.e. a batch with an audience.
+        batch_size (int, optional): Number of users per chunk. Defaults to 1000.
+
+    Returns:
+        int: The number of notifications created.
+    """
+    User = get_user_model()
+    audience = User.objects.filter(**batch.audience).order_by("pk").distinct()
+    created = 0
+    while True:
+        batch.refresh_from_db()
+        if batch.status == NotificationBatch.CANCELLED or batch.fanout_completed:
+            return created
+
+        users = audience
+        if batch.fanout_cursor:
+            users = users.filter(pk__gt=batch.fanout_cursor)
+        user_ids = list(users.values_list("pk", flat=True)[:batch_size])
+        if not user_ids:
+            NotificationBatch.objects.filter(pk=batch.pk).update(
+                fanout_completed=timezone.now(), modified_date=timezone.now()
+            )
+            return created
+
+        with transaction.atomic():
+            created += len(
+                notify(
+                    User.objects.filter(pk__in=user_ids),
+                    batch.title,
+                    batch.body,
+                    channels=batch.channels or DEFAULT_CHANNELS,
+                    scheduled_delivery=batch.scheduled_delivery or batch.created_date,
+                    batch=batch,
+                )
+            )
+            NotificationBatch.objects.filter(pk=batch.pk).update(
+                fanout_cursor=str(user_ids[-1]),
+                audience_count=F("audience_count") + len(user_ids),
+                modified_date=timezone.now(),
+            )
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.dispatch.circuit_breaker import CircuitBreaker
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+from django_notification_system.notification_handlers.twilio import get_client
+
+CIRCUIT_BREAKER = {"threshold": 2, "cooldown": 300}
+
+
+class TestCircuitBreaker(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.breaker = CircuitBreaker("twilio", **CIRCUIT_BREAKER)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_opens_after_consecutive_failures(self):
+        self.assertFalse(self.breaker.record_failure())
+        self.breaker.record_success()
+        self.assertFalse(self.breaker.record_failure())
+        self.assertTrue(self.breaker.record_failure())
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open_probe(self):
+        """
+        After the cooldown a single probe is let through. A failed probe opens
+        the breaker again and a successful one closes it.
+        """
+        cache.set(self.breaker.open_until_key, timezone.now() - timedelta(seconds=1))
+        self.assertTrue(self.breaker.allow())
+        self.assertFalse(self.breaker.allow())
+
+        self.assertTrue(self.breaker.record_failure())
+        self.assertFalse(self.breaker.allow())
+
+        cache.set(self.breaker.open_until_key, timezone.now() - timedelta(seconds=1))
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertTrue(self.breaker.allow())
+        self.assertTrue(self.breaker.allow())
+
+
+@override_settings(NOTIFICATION_SYSTEM_CIRCUIT_BREAKER=CIRCUIT_BREAKER)
+class TestProcessNotificationsCircuitBreaker(TestCase):
+    def setUp(self):
+        cache.clear()
+        # A cached client would bypass the patched Twilio Client.
+        get_client.cache_clear()
+        self.addCleanup(get_client.cache_clear)
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        record = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Twilio"),
+            target_user_id="6766676677",
+            description="Test Phone #",
+            active=True)
+        for i in range(5):
+            Notification.objects.create(
+                target_user_record=record,
+                status=Notification.SCHEDULED,
+                title=f"Title {i}",
+                body="Body",
+                scheduled_delivery=timezone.now() - timedelta(minutes=5 - i))
+
+    def tearDown(self):
+        cache.clear()
+
+    @patch("django_notification_system.notification_handlers.twilio.Client")
+    def test_outage_reschedules_without_spending_retries(self, client):
+        """
+        Once the breaker opens, the remaining notifications are rescheduled
+        without being attempted.
+        """
+        client.return_value.messages.create.side_effect = ConnectionError("Twilio is down")
+
+        call_command("process_notifications", stdout=StringIO())
+
+        self.assertEqual(client.return_value.messages.create.call_count, 2)
+        notifications = list(Notification.objects.order_by("scheduled_delivery", "title"))
+        for notification in notifications[:2]:
+            self.assertEqual(notification.status, Notification.RETRY)
+            self.assertEqual(notification.retry_attempts, 1)
+        for notification in notifications[2:]:
+            self.assertEqual(notification.status, Notification.SCHEDULED)
+            self.assertEqual(notification.retry_attempts, 0)
+            self.assertGreater(notification.scheduled_delivery, timezone.now())
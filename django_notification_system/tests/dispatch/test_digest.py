@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.dispatch.digest import coalesce_notifications
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+
+
+class TestDigest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        self.user_target = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=user.email,
+            description="Dangle email",
+            active=True)
+
+    def _create(self, title, minutes_ago, digest_key="comments"):
+        return Notification.objects.create(
+            target_user_record=self.user_target,
+            status=Notification.SCHEDULED,
+            title=title,
+            body=f"<p>{title}</p>",
+            digest_key=digest_key,
+            scheduled_delivery=timezone.now() - timedelta(minutes=minutes_ago))
+
+    @override_settings(NOTIFICATION_SYSTEM_DIGEST={"window": 300})
+    def test_coalesce_notifications(self):
+        """
+        Notifications sharing a digest key are replaced by a single digest once
+        the oldest of them has waited for the window.
+        """
+        members = [self._create(f"Comment {i}", minutes_ago=10 - i) for i in range(3)]
+        other = self._create("Like", minutes_ago=10, digest_key="likes")
+        plain = self._create("Plain", minutes_ago=10, digest_key=None)
+
+        self.assertEqual(coalesce_notifications(), 3)
+
+        for notification in members:
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, Notification.COALESCED)
+
+        digest = Notification.objects.get(
+            status=Notification.SCHEDULED, digest_key__isnull=True,
+            title__startswith="Comment")
+        self.assertEqual(digest.title, "Comment 0 (and 2 more)")
+        self.assertIn("<p>Comment 2</p>", digest.body)
+        self.assertEqual(digest.scheduled_delivery, members[0].scheduled_delivery)
+
+        other.refresh_from_db()
+        plain.refresh_from_db()
+        self.assertEqual(other.status, Notification.SCHEDULED)
+        self.assertEqual(plain.status, Notification.SCHEDULED)
+
+        # Coalescing again is a no-op.
+        self.assertEqual(coalesce_notifications(), 0)
+
+    def test_digest_body_separators(self):
+        """
+        Email bodies are separated by horizontal rules, plain text ones by blank lines.
+        """
+        for i in range(2):
+            self._create(f"Comment {i}", minutes_ago=10)
+        sms = TargetUserRecord.objects.create(
+            user=self.user_target.user,
+            target=NotificationTarget.objects.get(name="Twilio"),
+            target_user_id="5555555555",
+            description="Dangle phone",
+            active=True)
+        for i in range(2):
+            Notification.objects.create(
+                target_user_record=sms,
+                status=Notification.SCHEDULED,
+                title=f"Text {i}",
+                body=f"Text {i}",
+                digest_key="comments",
+                scheduled_delivery=timezone.now() - timedelta(minutes=10))
+
+        self.assertEqual(coalesce_notifications(), 4)
+
+        digests = Notification.objects.filter(status=Notification.SCHEDULED)
+        self.assertEqual(
+            digests.get(target_user_record=self.user_target).body,
+            "<p>Comment 0</p>\n<hr>\n<p>Comment 1</p>")
+        self.assertEqual(digests.get(target_user_record=sms).body, "Text 0\n\nText 1")
+
+    @override_settings(NOTIFICATION_SYSTEM_DIGEST={"window": 300})
+    def test_process_notifications__holds_and_sends_digest(self):
+        """
+        Digest notifications within their window are held back, and a single
+        email is sent for the digest afterwards.
+        """
+        recent = [self._create(f"Comment {i}", minutes_ago=1) for i in range(2)]
+        call_command("process_notifications", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 0)
+        for notification in recent:
+            notification.refresh_from_db()
+            self.assertEqual(notification.status, Notification.SCHEDULED)
+
+        Notification.objects.update(scheduled_delivery=timezone.now() - timedelta(minutes=10))
+        call_command("process_notifications", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.COALESCED).count(), 2)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.DELIVERED).count(), 1)
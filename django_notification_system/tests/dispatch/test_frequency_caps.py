@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+
+
+class TestFrequencyCaps(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        self.user_target = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=user.email,
+            description="Dangle email",
+            active=True)
+
+        self.delivered_at = timezone.now() - timedelta(minutes=10)
+        Notification.objects.create(
+            target_user_record=self.user_target,
+            status=Notification.DELIVERED,
+            title="Earlier",
+            body="<p>Earlier</p>",
+            scheduled_delivery=self.delivered_at,
+            attempted_delivery=self.delivered_at)
+
+        self.scheduled = [
+            Notification.objects.create(
+                target_user_record=self.user_target,
+                status=Notification.SCHEDULED,
+                title=f"Title {i}",
+                body="<p>Body</p>",
+                scheduled_delivery=timezone.now() - timedelta(minutes=5 - i))
+            for i in range(3)
+        ]
+
+    @override_settings(NOTIFICATION_SYSTEM_FREQUENCY_CAPS={
+        "user": {"limit": 2, "period": 3600}})
+    def test_over_cap_notifications_are_deferred(self):
+        """
+        Notifications over the cap are rescheduled for when the window has room.
+        """
+        call_command("process_notifications", "--batch-size", "2", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 1)
+        for notification in self.scheduled:
+            notification.refresh_from_db()
+
+        self.assertEqual(self.scheduled[0].status, Notification.DELIVERED)
+        for notification in self.scheduled[1:]:
+            self.assertEqual(notification.status, Notification.SCHEDULED)
+            self.assertEqual(
+                notification.scheduled_delivery,
+                self.delivered_at + timedelta(seconds=3600))
+
+    @override_settings(NOTIFICATION_SYSTEM_FREQUENCY_CAPS={
+        "email": {"limit": 3, "period": 3600, "action": "drop"},
+        "twilio": {"limit": 1, "period": 3600}})
+    def test_over_cap_notifications_are_dropped(self):
+        """
+        Target caps only count deliveries to their target, and notifications
+        over a dropping cap are throttled.
+        """
+        call_command("process_notifications", stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.THROTTLED).get(),
+            self.scheduled[2])
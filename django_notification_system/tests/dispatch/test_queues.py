@@ -0,0 +1,79 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.dispatch.queues import (
+    DatabaseQueue, InMemoryQueue, get_queue)
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+from django_notification_system.notification_creators.email import create_notification
+
+IN_MEMORY = {
+    "backend": "django_notification_system.dispatch.queues.InMemoryQueue",
+    "poll_interval": 30,
+}
+
+
+class TestQueues(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        TargetUserRecord.objects.create(
+            user=self.user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=self.user.email,
+            description="Email",
+            active=True)
+
+    def test_in_memory_queue_wakes_waiter(self):
+        queue = InMemoryQueue()
+        threading.Timer(0.1, queue.notify).start()
+
+        started = time.monotonic()
+        self.assertTrue(queue.wait(10))
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse(queue.wait(0))
+
+    def test_database_queue_is_the_default(self):
+        self.assertIsInstance(get_queue(), DatabaseQueue)
+
+    @override_settings(NOTIFICATION_SYSTEM_QUEUE=IN_MEMORY)
+    def test_creating_notifications_wakes_daemon(self):
+        """
+        The daemon runs again as soon as a notification is created, rather
+        than after the poll interval.
+        """
+        queue = get_queue()
+        queue.wait(0)
+        create_notification(self.user, "Password reset", "<p>Your code is 1234</p>")
+
+        started = time.monotonic()
+        call_command(
+            "process_notifications", "--daemon", "--max-runs", "2", stdout=StringIO())
+
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.DELIVERED).count(), 1)
+
+    @override_settings(NOTIFICATION_SYSTEM_QUEUE=IN_MEMORY)
+    def test_daemon_wakes_when_next_notification_is_due(self):
+        create_notification(
+            self.user,
+            "Reminder",
+            "<p>Soon</p>",
+            scheduled_delivery=timezone.now() + timedelta(seconds=1))
+        get_queue().wait(0)
+
+        call_command(
+            "process_notifications", "--daemon", "--max-runs", "2", stdout=StringIO())
+
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.DELIVERED).count(), 1)
@@ -0,0 +1,74 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.dispatch.quiet_hours import next_allowed_time
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+
+
+class TestNextAllowedTime(TestCase):
+    def test_within_quiet_hours_spanning_midnight(self):
+        # 22:00 in Chicago.
+        now = datetime(2026, 1, 15, 4, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            next_allowed_time(now, "America/Chicago", time(21, 0), time(7, 0)),
+            datetime(2026, 1, 15, 13, 0, tzinfo=dt_timezone.utc))
+
+    def test_outside_of_quiet_hours(self):
+        # Noon in Chicago.
+        now = datetime(2026, 1, 15, 18, 0, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            next_allowed_time(now, "America/Chicago", time(21, 0), time(7, 0)), now)
+
+
+class TestQuietHours(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        now = timezone.now()
+        self.quiet_hours_end = (now + timedelta(hours=1)).time().replace(microsecond=0)
+        self.user_target = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=user.email,
+            description="Dangle email",
+            active=True,
+            timezone="UTC",
+            quiet_hours_start=(now - timedelta(hours=1)).time(),
+            quiet_hours_end=self.quiet_hours_end)
+
+        self.regular = Notification.objects.create(
+            target_user_record=self.user_target,
+            status=Notification.SCHEDULED,
+            title="Regular",
+            body="<p>Body</p>",
+            scheduled_delivery=now - timedelta(minutes=1))
+        self.urgent = Notification.objects.create(
+            target_user_record=self.user_target,
+            status=Notification.SCHEDULED,
+            title="Urgent",
+            body="<p>Body</p>",
+            extra={"urgent": True},
+            scheduled_delivery=now - timedelta(minutes=1))
+
+    def test_process_notifications__respects_quiet_hours(self):
+        """
+        Non-urgent notifications are moved to the end of the quiet hours, and
+        urgent ones are sent right away.
+        """
+        call_command("process_notifications", stdout=StringIO())
+
+        self.assertEqual([email.subject for email in mail.outbox], ["Urgent"])
+
+        self.regular.refresh_from_db()
+        self.assertEqual(self.regular.status, Notification.SCHEDULED)
+        self.assertEqual(self.regular.scheduled_delivery.time(), self.quiet_hours_end)
+        self.assertGreater(self.regular.scheduled_delivery, timezone.now())
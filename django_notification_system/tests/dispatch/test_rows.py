@@ -0,0 +1,84 @@
+import tracemalloc
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from django_notification_system.dispatch.rows import load_notification_rows
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+from django_notification_system.notification_handlers.email import send_notification
+
+
+def footprint(load):
+    """Return the bytes still allocated by what `load` returns, and its result."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = load()
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
+
+
+class TestNotificationRows(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        self.record = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=user.email,
+            description="Email",
+            active=True)
+        self.scheduled_delivery = timezone.now() - timedelta(minutes=1)
+
+    def create_notifications(self, count):
+        Notification.objects.bulk_create(
+            Notification(
+                target_user_record=self.record,
+                title=f"Title {i}",
+                body="<p>Body</p>",
+                extra={"data": {"i": i}},
+                status=Notification.SCHEDULED,
+                scheduled_delivery=self.scheduled_delivery,
+                dedupe_key=str(i))
+            for i in range(count))
+
+    def test_handlers_accept_rows(self):
+        self.create_notifications(1)
+        row = load_notification_rows(Notification.objects.all())[0]
+        self.assertEqual(row.target_user_record.target.name, "Email")
+
+        self.assertEqual(send_notification(row), "Email Successfully Sent")
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.status, Notification.DELIVERED)
+        self.assertIsNotNone(notification.attempted_delivery)
+        # Any other attribute comes from the model instance.
+        self.assertEqual(row.created_date, notification.created_date)
+
+    def test_rows_share_records(self):
+        self.create_notifications(3)
+        with self.assertNumQueries(1):
+            rows = load_notification_rows(Notification.objects.order_by("id"))
+        self.assertEqual(len({id(row.target_user_record) for row in rows}), 1)
+
+    def test_memory_footprint(self):
+        """
+        Rows take a fraction of the memory of model instances with their
+        related user and target instances.
+        """
+        count = 2000
+        self.create_notifications(count)
+        notifications = Notification.objects.order_by("scheduled_delivery", "id")
+
+        instances_size, instances = footprint(lambda: list(notifications.select_related(
+            "target_user_record__user", "target_user_record__target")))
+        rows_size, rows = footprint(lambda: load_notification_rows(notifications))
+
+        self.assertEqual(len(instances), len(rows))
+        self.assertLess(rows_size / count, instances_size / count / 2)
@@ -0,0 +1,143 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.dispatch.shards import (
+    parse_shard, shard_backlog, shard_filter, shard_range)
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+from django_notification_system.models.notification import SHARD_KEYS, build_shard_key
+from django_notification_system.utils.bulk import bulk_create_notifications
+
+
+class TestShards(TestCase):
+    def setUp(self):
+        email = NotificationTarget.objects.get(name="Email")
+        self.records = []
+        for i in range(12):
+            user = User.objects.create_user(
+                username=f"Danglesauce{i}",
+                email=f"danglesauce{i}@gmail.com",
+                password="ImpressivePassword")
+            self.records.append(TargetUserRecord.objects.create(
+                user=user,
+                target=email,
+                target_user_id=user.email,
+                description="Email",
+                active=True))
+        bulk_create_notifications(
+            Notification(
+                target_user_record=record,
+                title=f"Title {i}",
+                body="<p>Body</p>",
+                status=Notification.SCHEDULED,
+                scheduled_delivery=timezone.now() - timedelta(minutes=i))
+            for record in self.records
+            for i in range(2))
+
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for value in ("0/4", "5/4", "1/0", "two/4", "4", f"1/{SHARD_KEYS + 1}"):
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+
+    def test_shards_cover_all_keys_once(self):
+        for count in (1, 3, 7, SHARD_KEYS):
+            ranges = [shard_range(index, count) for index in range(1, count + 1)]
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], SHARD_KEYS)
+            for (_, stop), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(stop, start)
+
+    def test_shard_key_follows_target_user_record(self):
+        for notification in Notification.objects.all():
+            self.assertEqual(
+                notification.shard_key, build_shard_key(notification.target_user_record_id))
+
+    def test_shards_partition_notifications(self):
+        Notification.objects.filter(target_user_record=self.records[0]).update(shard_key=None)
+        shards = [
+            set(Notification.objects.filter(shard_filter(index, 3)).values_list("id", flat=True))
+            for index in (1, 2, 3)
+        ]
+        self.assertEqual(sum(map(len, shards)), Notification.objects.count())
+        self.assertEqual(set.union(*shards), set(Notification.objects.values_list("id", flat=True)))
+
+        # Without a shard key, notifications are handled by the first shard.
+        self.assertTrue(
+            set(Notification.objects.filter(
+                target_user_record=self.records[0]).values_list("id", flat=True)) <= shards[0])
+
+    def test_process_one_shard(self):
+        out = StringIO()
+        call_command("process_notifications", "--shard", "2/3", stdout=out)
+
+        start, stop = shard_range(2, 3)
+        delivered = Notification.objects.filter(status=Notification.DELIVERED)
+        self.assertEqual(
+            set(delivered.values_list("id", flat=True)),
+            set(Notification.objects.filter(
+                shard_key__gte=start, shard_key__lt=stop).values_list("id", flat=True)))
+        # Both notifications of a record are always handled by the same shard.
+        self.assertFalse(
+            Notification.objects.filter(
+                target_user_record__in=delivered.values("target_user_record"),
+                status=Notification.SCHEDULED).exists())
+
+        # The backlog of the other shards is reported.
+        backlog = shard_backlog(3, Notification.objects.filter(status=Notification.SCHEDULED))
+        self.assertEqual(backlog[1]["count"], 0)
+        for shard in backlog:
+            self.assertIn("Shard {shard}: {count} due notifications left".format(**shard), out.getvalue())
+
+        for shard in ("1/3", "3/3"):
+            call_command("process_notifications", "--shard", shard, stdout=StringIO())
+        self.assertEqual(delivered.count(), Notification.objects.count())
+
+    def test_process_targets(self):
+        expo = TargetUserRecord.objects.create(
+            user=self.records[0].user,
+            target=NotificationTarget.objects.get(name="Expo"),
+            target_user_id="ExponentPushToken[Danglesauce0]",
+            description="Expo",
+            active=True)
+        Notification.objects.create(
+            target_user_record=expo,
+            title="Expo",
+            body="Body",
+            status=Notification.SCHEDULED,
+            scheduled_delivery=timezone.now())
+
+        call_command("process_notifications", "--targets", "email", stdout=StringIO())
+
+        self.assertEqual(
+            Notification.objects.get(target_user_record=expo).status, Notification.SCHEDULED)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.DELIVERED).count(), 24)
+
+    def test_report_includes_backlog(self):
+        with tempfile.TemporaryDirectory() as directory:
+            report_path = os.path.join(directory, "report.json")
+            call_command(
+                "process_notifications", "--shard", "1/2", "--report", report_path,
+                stdout=StringIO())
+            with open(report_path) as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(report["shard"], "1/2")
+        self.assertEqual([shard["shard"] for shard in report["backlog"]], ["1/2", "2/2"])
+        self.assertEqual(report["backlog"][0]["count"], 0)
+
+    def test_invalid_options(self):
+        with self.assertRaises(CommandError):
+            call_command("process_notifications", "--shard", "3/2", stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("process_notifications", "--targets", "carrier_pigeon", stdout=StringIO())
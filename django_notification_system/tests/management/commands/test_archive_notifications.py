@@ -0,0 +1,84 @@
+import gzip
+import json
+import os
+import tempfile
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.models import (
+    ArchivedNotification, Notification, NotificationTarget, TargetUserRecord)
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        user_target = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=user.email,
+            description="Dangle email",
+            active=True)
+
+        long_ago = timezone.now() - timedelta(days=200)
+        self.old_delivered = [
+            Notification.objects.create(
+                target_user_record=user_target,
+                status=Notification.DELIVERED,
+                title=f"Old {i}",
+                body="<p>Body of the message</p>",
+                scheduled_delivery=long_ago,
+                attempted_delivery=long_ago)
+            for i in range(3)
+        ]
+        self.old_scheduled = Notification.objects.create(
+            target_user_record=user_target,
+            status=Notification.SCHEDULED,
+            title="Old but pending",
+            body="<p>Body of the message</p>",
+            scheduled_delivery=long_ago)
+        self.recent_delivered = Notification.objects.create(
+            target_user_record=user_target,
+            status=Notification.DELIVERED,
+            title="Recent",
+            body="<p>Body of the message</p>",
+            scheduled_delivery=timezone.now(),
+            attempted_delivery=timezone.now())
+
+    def test_archive_notifications(self):
+        """
+        Ensure only old notifications with a final status are moved to the archive.
+        """
+        out = StringIO()
+        call_command("archive_notifications", "--batch-size=2", stdout=out)
+
+        self.assertEqual(
+            set(ArchivedNotification.objects.values_list("id", flat=True)),
+            {notification.id for notification in self.old_delivered})
+        self.assertEqual(
+            set(Notification.objects.values_list("id", flat=True)),
+            {self.old_scheduled.id, self.recent_delivered.id})
+
+    def test_archive_notifications__to_file(self):
+        """
+        Ensure notifications can be archived to a gzipped JSON Lines file.
+        """
+        handle, path = tempfile.mkstemp(suffix=".jsonl.gz")
+        os.close(handle)
+        self.addCleanup(os.remove, path)
+
+        call_command("archive_notifications", f"--output={path}", stdout=StringIO())
+
+        with gzip.open(path, "rt") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(
+            {row["title"] for row in rows}, {"Old 0", "Old 1", "Old 2"})
+        self.assertFalse(ArchivedNotification.objects.exists())
+        self.assertEqual(Notification.objects.count(), 2)
@@ -4,7 +4,7 @@ from django.test import TestCase
 from six import StringIO
 
 from django_notification_system.management.commands.create_email_target_user_records import Command
-from django_notification_system.models import TargetUserRecord
+from django_notification_system.models import NotificationTarget, TargetUserRecord
 
 cmd = Command()
 
@@ -38,3 +38,47 @@ class TestCommand(TestCase):
             if target.user == self.user:
                 self.assertEqual(target.target_user_id,
                                  self.user.email)
+
+    def test_create_email_target_user_records__updates_existing(self):
+        """
+        Ensure existing records are reactivated rather than duplicated.
+        """
+        TargetUserRecord.objects.all().delete()
+        TargetUserRecord.objects.create(
+            user=self.user,
+            target=NotificationTarget.objects.get(name='Email'),
+            target_user_id=self.user.email,
+            description="Old description",
+            active=False)
+
+        out = StringIO()
+        call_command('create_email_target_user_records', stdout=out)
+
+        post_call = TargetUserRecord.objects.all()
+        self.assertEqual(len(post_call), 1)
+        self.assertTrue(post_call[0].active)
+        self.assertEqual(post_call[0].description, "Dangle Sauce's Email")
+
+    def test_create_email_target_user_records__deactivate_changed(self):
+        """
+        Ensure records for an old email address are deactivated when requested.
+        """
+        TargetUserRecord.objects.all().delete()
+        old_record = TargetUserRecord.objects.create(
+            user=self.user,
+            target=NotificationTarget.objects.get(name='Email'),
+            target_user_id="old@gmail.com",
+            description="Old email",
+            active=True)
+
+        out = StringIO()
+        call_command(
+            'create_email_target_user_records',
+            '--deactivate-changed',
+            '--batch-size=1',
+            stdout=out)
+
+        old_record.refresh_from_db()
+        self.assertFalse(old_record.active)
+        self.assertTrue(
+            TargetUserRecord.objects.get(target_user_id=self.user.email).active)
@@ -0,0 +1,72 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+
+
+class TestGenerateNotificationLoad(TestCase):
+    def test_seed_load(self):
+        call_command(
+            "generate_notification_load",
+            "--users", "30",
+            "--notifications", "200",
+            "--seed", "1",
+            stdout=StringIO())
+
+        self.assertEqual(User.objects.filter(username__startswith="loadtest-").count(), 30)
+        self.assertEqual(Notification.objects.count(), 200)
+        self.assertEqual(
+            set(TargetUserRecord.objects.values_list("target__name", flat=True)),
+            {"Email", "Expo", "Twilio"})
+
+        # Running it again reuses the users and their records.
+        records = TargetUserRecord.objects.count()
+        call_command(
+            "generate_notification_load",
+            "--users", "30",
+            "--notifications", "10",
+            "--seed", "2",
+            stdout=StringIO())
+        self.assertEqual(TargetUserRecord.objects.count(), records)
+        self.assertEqual(Notification.objects.count(), 210)
+
+    def test_run_against_fake_providers(self):
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        real = Notification.objects.create(
+            target_user_record=TargetUserRecord.objects.create(
+                user=user,
+                target=NotificationTarget.objects.get(name="Email"),
+                target_user_id=user.email,
+                description="Email",
+                active=True),
+            title="Real",
+            body="<p>Not for the fakes</p>",
+            status=Notification.SCHEDULED,
+            scheduled_delivery=timezone.now())
+
+        out = StringIO()
+        call_command(
+            "generate_notification_load",
+            "--users", "10",
+            "--notifications", "40",
+            "--future", "0",
+            "--seed", "1",
+            "--run",
+            "--latency", "0",
+            "--error-rate", "0",
+            stdout=out)
+
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.DELIVERED).count(), 40)
+        self.assertIn("Attempted 40 notifications", out.getvalue())
+        # Only the load is dispatched.
+        real.refresh_from_db()
+        self.assertEqual(real.status, Notification.SCHEDULED)
+        self.assertIn("SMTP:", out.getvalue())
@@ -0,0 +1,88 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.models import (
+    Notification, NotificationOptOut, NotificationTarget, TargetUserRecord)
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            first_name="Dangle",
+            last_name="Sauce",
+            password="ImpressivePassword")
+
+        self.other_user = User.objects.create_user(
+            username="Eggless",
+            email="eggless@gmail.com",
+            first_name="Egg",
+            last_name="Less",
+            password="ImpressivePassword")
+
+        self.user_target = TargetUserRecord.objects.create(
+            user=self.user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=self.user.email,
+            description="Dangle email",
+            active=True)
+
+        self.scheduled = Notification.objects.create(
+            target_user_record=self.user_target,
+            status=Notification.SCHEDULED,
+            title="Scheduled",
+            body="<p>Body of the message</p>",
+            scheduled_delivery=timezone.now())
+
+        self.delivered = Notification.objects.create(
+            target_user_record=self.user_target,
+            status=Notification.DELIVERED,
+            title="Delivered",
+            body="<p>Body of the message</p>",
+            scheduled_delivery=timezone.now(),
+            attempted_delivery=timezone.now())
+
+    def test_import_opt_outs(self):
+        """
+        Ensure opt outs are created or updated and pending notifications are opted out.
+        """
+        NotificationOptOut.objects.create(user=self.other_user, active=True)
+
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as f:
+            f.write("user,active\nDanglesauce,\nEggless,false\nNobody,true\n")
+        self.addCleanup(os.remove, path)
+
+        out = StringIO()
+        call_command("import_opt_outs", path, stdout=out)
+
+        self.assertTrue(NotificationOptOut.objects.get(user=self.user).active)
+        self.assertFalse(NotificationOptOut.objects.get(user=self.other_user).active)
+
+        self.scheduled.refresh_from_db()
+        self.delivered.refresh_from_db()
+        self.assertEqual(self.scheduled.status, Notification.OPTED_OUT)
+        self.assertEqual(self.delivered.status, Notification.DELIVERED)
+        self.assertIn("Skipped 1 rows", out.getvalue())
+
+    def test_last_row_wins(self):
+        """
+        Ensure the last row of a user decides its opt out, even within one batch.
+        """
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w") as f:
+            f.write("user,active\nDanglesauce,true\nDanglesauce,false\n")
+        self.addCleanup(os.remove, path)
+
+        call_command("import_opt_outs", path, stdout=StringIO())
+
+        self.assertFalse(NotificationOptOut.objects.get(user=self.user).active)
+        self.scheduled.refresh_from_db()
+        self.assertEqual(self.scheduled.status, Notification.SCHEDULED)
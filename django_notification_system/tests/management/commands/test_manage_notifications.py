@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.dispatch.queues import get_queue
+from django_notification_system.models import (
+    Notification, NotificationOptOut, NotificationTarget, TargetUserRecord)
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        self.email_record = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=user.email,
+            description="Email",
+            active=True)
+        self.twilio_record = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Twilio"),
+            target_user_id="6766676677",
+            description="Phone",
+            active=True)
+
+        attempted = timezone.now() - timedelta(hours=1)
+        for i, record in enumerate([self.email_record, self.twilio_record] * 3):
+            Notification.objects.create(
+                target_user_record=record,
+                status=Notification.DELIVERY_FAILURE,
+                title=f"Failed {i}",
+                body="Body",
+                scheduled_delivery=attempted,
+                attempted_delivery=attempted,
+                retry_attempts=3)
+            Notification.objects.create(
+                target_user_record=record,
+                status=Notification.SCHEDULED,
+                title="Campaign",
+                body="Body",
+                scheduled_delivery=timezone.now() + timedelta(days=1, minutes=i))
+
+    def test_requeue(self):
+        """
+        Failed notifications are scheduled again, with their retries reset.
+        """
+        out = StringIO()
+        call_command(
+            "manage_notifications", "requeue", "--target", "Twilio",
+            "--batch-size", "2", stdout=out)
+
+        self.assertIn("changed 3 notifications", out.getvalue())
+        requeued = Notification.objects.filter(title__startswith="Failed", status=Notification.SCHEDULED)
+        self.assertEqual(requeued.count(), 3)
+        for notification in requeued:
+            self.assertEqual(notification.target_user_record, self.twilio_record)
+            self.assertEqual(notification.retry_attempts, 0)
+            self.assertIsNone(notification.attempted_delivery)
+
+    @override_settings(NOTIFICATION_SYSTEM_QUEUE={
+        "backend": "django_notification_system.dispatch.queues.InMemoryQueue"})
+    def test_requeue_skips_opted_out_users(self):
+        """
+        Failures of users who opted out since are not sent again, and the
+        dispatch daemon is woken for the others.
+        """
+        opted_out = User.objects.create_user(
+            username="Skeeter",
+            email="skeeter@gmail.com",
+            password="ImpressivePassword")
+        record = TargetUserRecord.objects.create(
+            user=opted_out,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=opted_out.email,
+            description="Email",
+            active=True)
+        Notification.objects.create(
+            target_user_record=record,
+            status=Notification.CANCELLED,
+            title="Cancelled",
+            body="Body",
+            scheduled_delivery=timezone.now())
+        NotificationOptOut.objects.create(user=opted_out, active=True)
+        queue = get_queue()
+        queue.wait(0)
+
+        out = StringIO()
+        call_command("manage_notifications", "requeue", "--dry-run", stdout=out)
+        self.assertIn("6 notifications would be changed", out.getvalue())
+
+        call_command("manage_notifications", "requeue", stdout=StringIO())
+
+        self.assertEqual(
+            Notification.objects.get(target_user_record=record).status, Notification.CANCELLED)
+        self.assertEqual(
+            Notification.objects.filter(
+                title__startswith="Failed", status=Notification.SCHEDULED).count(), 6)
+        self.assertTrue(queue.wait(0))
+
+    def test_cancel(self):
+        """
+        Only pending notifications are cancelled.
+        """
+        call_command("manage_notifications", "cancel", "--dry-run", stdout=StringIO())
+        self.assertFalse(Notification.objects.filter(status=Notification.CANCELLED).exists())
+
+        call_command("manage_notifications", "cancel", "--title", "Campaign", stdout=StringIO())
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.CANCELLED).count(), 6)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.DELIVERY_FAILURE).count(), 6)
+
+    def test_reschedule(self):
+        call_command(
+            "manage_notifications", "reschedule", "--to", "2030-01-01T09:00:00+00:00",
+            stdout=StringIO())
+        self.assertEqual(
+            set(Notification.objects.filter(title="Campaign").values_list(
+                "scheduled_delivery", flat=True)),
+            {datetime(2030, 1, 1, 9, tzinfo=dt_timezone.utc)})
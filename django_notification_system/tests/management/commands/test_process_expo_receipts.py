@@ -0,0 +1,161 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from exponent_server_sdk import PushResponse
+from six import StringIO
+
+from django_notification_system.models import (
+    Notification, NotificationBatch, NotificationTarget, TargetUserRecord)
+from ...mock_exponent_server_sdk import MockPushClient
+
+
+@patch('django_notification_system.notification_handlers.expo.PushClient', new=MockPushClient)
+@patch('django_notification_system.management.commands.process_expo_receipts.PushClient',
+       new=MockPushClient)
+class TestCommand(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Eggless",
+            email="eggless@gmail.com",
+            first_name="Egg",
+            last_name="Less",
+            password="ImpressivePassword")
+
+        self.notifications = {}
+        for name in ["ok", "dead", "too_big", "pending"]:
+            user_target = TargetUserRecord.objects.create(
+                user=self.user,
+                target=NotificationTarget.objects.get(name='Expo'),
+                target_user_id=f'ExponentPushToken[{name}]',
+                description=f"{name} phone",
+                active=True)
+            self.notifications[name] = Notification.objects.create(
+                target_user_record=user_target,
+                status=Notification.SCHEDULED,
+                title="Title",
+                body="Body of the message",
+                scheduled_delivery=timezone.now() - timedelta(1))
+
+    def _push_notifications(self):
+        """Push the notifications and register receipts for their tickets."""
+        call_command("process_notifications", stdout=StringIO())
+        for notification in self.notifications.values():
+            notification.refresh_from_db()
+            # Pretend the notifications were pushed a while ago.
+            Notification.objects.filter(id=notification.id).update(
+                attempted_delivery=timezone.now() - timedelta(hours=1))
+
+        MockPushClient.receipts = {
+            self.notifications["dead"].push_ticket_id: {
+                "status": PushResponse.ERROR_STATUS,
+                "message": "not registered",
+                "details": {"error": PushResponse.ERROR_DEVICE_NOT_REGISTERED},
+            },
+            self.notifications["too_big"].push_ticket_id: {
+                "status": PushResponse.ERROR_STATUS,
+                "message": "too big",
+                "details": {"error": PushResponse.ERROR_MESSAGE_TOO_BIG},
+            },
+            self.notifications["pending"].push_ticket_id: None,
+        }
+        self.addCleanup(setattr, MockPushClient, "receipts", {})
+
+    def test_push_stores_ticket_id(self):
+        """
+        Ensure successfully pushed notifications keep their push ticket id.
+        """
+        self._push_notifications()
+        for notification in self.notifications.values():
+            self.assertEqual(notification.status, Notification.DELIVERED)
+            self.assertIsNotNone(notification.push_ticket_id)
+
+    def test_process_expo_receipts(self):
+        """
+        Ensure receipts update notifications and deactivate dead devices.
+        """
+        self._push_notifications()
+        out = StringIO()
+        call_command("process_expo_receipts", "--batch-size=2", stdout=out)
+
+        for notification in self.notifications.values():
+            notification.refresh_from_db()
+
+        ok = self.notifications["ok"]
+        self.assertEqual(ok.status, Notification.DELIVERED)
+        self.assertIsNone(ok.push_ticket_id)
+
+        dead = self.notifications["dead"]
+        self.assertEqual(dead.status, Notification.INACTIVE_DEVICE)
+        self.assertIsNone(dead.push_ticket_id)
+        self.assertFalse(dead.target_user_record.active)
+
+        too_big = self.notifications["too_big"]
+        self.assertEqual(too_big.status, Notification.DELIVERY_FAILURE)
+        self.assertTrue(too_big.target_user_record.active)
+
+        pending = self.notifications["pending"]
+        self.assertEqual(pending.status, Notification.DELIVERED)
+        self.assertIsNotNone(pending.push_ticket_id)
+
+    def test_process_expo_receipts__rate_exceeded(self):
+        """
+        Ensure rate limited receipts are retried after the retry interval,
+        unless the notification has no retries left.
+        """
+        self._push_notifications()
+        rate_exceeded = {
+            "status": PushResponse.ERROR_STATUS,
+            "message": "rate exceeded",
+            "details": {"error": PushResponse.ERROR_MESSAGE_RATE_EXCEEDED},
+        }
+        for name in ["too_big", "ok"]:
+            MockPushClient.receipts[self.notifications[name].push_ticket_id] = rate_exceeded
+        Notification.objects.filter(id=self.notifications["too_big"].id).update(
+            retry_time_interval=30)
+        Notification.objects.filter(id=self.notifications["ok"].id).update(max_retries=1)
+
+        out = StringIO()
+        call_command("process_expo_receipts", stdout=out)
+
+        retried = Notification.objects.get(id=self.notifications["too_big"].id)
+        self.assertEqual(retried.status, Notification.RETRY)
+        self.assertEqual(retried.retry_attempts, 1)
+        self.assertIsNone(retried.push_ticket_id)
+        self.assertGreater(retried.scheduled_delivery, timezone.now() + timedelta(minutes=29))
+
+        exhausted = Notification.objects.get(id=self.notifications["ok"].id)
+        self.assertEqual(exhausted.status, Notification.DELIVERY_FAILURE)
+        self.assertIn("1 retries, 1 delivery failures", out.getvalue())
+
+    def test_process_expo_receipts__batch_counters(self):
+        """
+        Ensure failed receipts move notifications from the delivered to the
+        failed counter of their batch.
+        """
+        batch = NotificationBatch.objects.create(name="Spring Sale", scheduled_count=4)
+        Notification.objects.update(batch=batch)
+        self._push_notifications()
+        batch.refresh_from_db()
+        self.assertEqual(batch.delivered_count, 4)
+
+        call_command("process_expo_receipts", stdout=StringIO())
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.delivered_count, 2)
+        self.assertEqual(batch.failed_count, 2)
+        self.assertEqual(batch.remaining_count, 0)
+
+    def test_process_expo_receipts__too_recent(self):
+        """
+        Ensure receipts are not checked before --min-age has passed.
+        """
+        self._push_notifications()
+        out = StringIO()
+        call_command("process_expo_receipts", "--min-age=120", stdout=out)
+
+        self.assertEqual(
+            Notification.objects.filter(push_ticket_id__isnull=False).count(), 4)
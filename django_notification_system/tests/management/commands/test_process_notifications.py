@@ -1,3 +1,7 @@
+import json
+import os
+import pstats
+import tempfile
 from datetime import timedelta
 from unittest.mock import patch
 
@@ -378,3 +382,36 @@ class TestCommand(TestCase):
         handle_push_response(self.dev_notification, response=response)
         self.dev_user_target.refresh_from_db()
         self.assertEqual(self.dev_user_target.active, False)
+
+    def test_profiling(self):
+        """
+        The profiling options report time and queries per phase and target.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            stats_path = os.path.join(directory, "dispatch.prof")
+            report_path = os.path.join(directory, "dispatch.json")
+            out = StringIO()
+            call_command(
+                "process_notifications",
+                "--profile", stats_path,
+                "--trace-queries",
+                "--report", report_path,
+                stdout=out)
+
+            self.assertIn("Phase", out.getvalue())
+            self.assertIn("send: email", out.getvalue())
+            self.assertTrue(pstats.Stats(stats_path).total_calls)
+            with open(report_path) as report_file:
+                report = json.load(report_file)
+
+        self.assertEqual(
+            set(report["phases"]), {"fetch", "prepare", "render", "send", "persist"})
+        self.assertEqual(report["targets"]["expo"]["notifications"], 3)
+        self.assertEqual(report["targets"]["email"]["notifications"], 1)
+        # Each send renders its message apart from talking to the provider.
+        self.assertEqual(report["phases"]["render"]["calls"], 4)
+        # Each email send saves its notification, which counts as persisting.
+        self.assertEqual(report["targets"]["email"]["queries"], 1)
+        self.assertEqual(report["phases"]["send"]["queries"], 0)
+        self.assertGreaterEqual(report["phases"]["persist"]["calls"], 4)
+        self.assertGreaterEqual(report["phases"]["fetch"]["queries"], 1)
@@ -0,0 +1,57 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.models import (
+    Notification, NotificationOptOut, NotificationTarget, TargetUserRecord)
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        self.notifications = []
+        for username in ["Danglesauce", "Eggless"]:
+            user = User.objects.create_user(
+                username=username,
+                email=f"{username.lower()}@gmail.com",
+                password="ImpressivePassword")
+            target_user_record = TargetUserRecord.objects.create(
+                user=user,
+                target=NotificationTarget.objects.get(name="Email"),
+                target_user_id=user.email,
+                description="Email",
+                active=True)
+            self.notifications.append(Notification.objects.create(
+                target_user_record=target_user_record,
+                status=Notification.SCHEDULED,
+                title="Title",
+                body="<p>Body of the message</p>",
+                scheduled_delivery=timezone.now()))
+            # Bypass NotificationOptOut.save() so no cascade happens.
+            NotificationOptOut.objects.bulk_create(
+                [NotificationOptOut(user=user, active=False)])
+
+    def test_reconcile_opt_outs(self):
+        """
+        Ensure opt outs activated without a save are applied to pending notifications.
+        """
+        NotificationOptOut.objects.update(active=True)
+
+        out = StringIO()
+        call_command("reconcile_opt_outs", "--dry-run", stdout=out)
+        self.assertIn("2 notifications", out.getvalue())
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.SCHEDULED).count(), 2)
+
+        call_command("reconcile_opt_outs", "--batch-size=1", stdout=out)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.OPTED_OUT).count(), 2)
+
+    def test_reconcile_opt_outs__inactive_opt_outs_ignored(self):
+        """
+        Ensure notifications of users with inactive opt outs are left alone.
+        """
+        call_command("reconcile_opt_outs", stdout=StringIO())
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.SCHEDULED).count(), 2)
@@ -0,0 +1,138 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from six import StringIO
+
+from django_notification_system.models import NotificationTarget, TargetUserRecord
+
+
+class TestCommand(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            first_name="Dangle",
+            last_name="Sauce",
+            password="ImpressivePassword")
+
+        self.other_user = User.objects.create_user(
+            username="Eggless",
+            email="eggless@gmail.com",
+            first_name="Egg",
+            last_name="Less",
+            password="ImpressivePassword")
+
+        self.expo = NotificationTarget.objects.get(name="Expo")
+
+    def _write(self, suffix, content):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, "w") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_sync_from_csv(self):
+        """
+        Ensure records are created from a CSV file and unknown users are skipped.
+        """
+        path = self._write(
+            ".csv",
+            "user,target,target_user_id,active\n"
+            "Danglesauce,Expo,ExponentPushToken[1],true\n"
+            "Danglesauce,Twilio,5745555555,false\n"
+            "Nobody,Expo,ExponentPushToken[2],true\n",
+        )
+
+        out = StringIO()
+        call_command("sync_target_user_records", path, stdout=out)
+
+        self.assertEqual(TargetUserRecord.objects.filter(user=self.user).count(), 2)
+        self.assertTrue(
+            TargetUserRecord.objects.get(target=self.expo).active)
+        self.assertFalse(
+            TargetUserRecord.objects.get(target__name="Twilio").active)
+        self.assertIn("Skipped 1 rows", out.getvalue())
+
+    def test_sync_from_jsonl__updates_and_deactivates_missing(self):
+        """
+        Ensure existing records are updated in place and absent records of the
+        synchronized targets are deactivated.
+        """
+        existing = TargetUserRecord.objects.create(
+            user=self.user,
+            target=self.expo,
+            target_user_id="ExponentPushToken[1]",
+            description="Dangle's phone",
+            active=False)
+        absent = TargetUserRecord.objects.create(
+            user=self.other_user,
+            target=self.expo,
+            target_user_id="ExponentPushToken[old]",
+            description="Egg's old phone",
+            active=True)
+        email = TargetUserRecord.objects.create(
+            user=self.other_user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=self.other_user.email,
+            description="Egg's email",
+            active=True)
+
+        rows = [
+            {"user": "Danglesauce", "target": "Expo",
+             "target_user_id": "ExponentPushToken[1]", "active": True},
+            {"user": "Eggless", "target": "Expo",
+             "target_user_id": "ExponentPushToken[new]"},
+        ]
+        path = self._write(".jsonl", "\n".join(json.dumps(row) for row in rows))
+
+        out = StringIO()
+        call_command(
+            "sync_target_user_records", path, "--deactivate-missing",
+            "--batch-size=1", stdout=out)
+
+        existing.refresh_from_db()
+        absent.refresh_from_db()
+        email.refresh_from_db()
+        self.assertTrue(existing.active)
+        self.assertEqual(existing.description, "Dangle's phone")
+        self.assertFalse(absent.active)
+        self.assertTrue(email.active)
+        self.assertTrue(
+            TargetUserRecord.objects.get(target_user_id="ExponentPushToken[new]").active)
+
+    def test_sync__invalid_active_value(self):
+        """
+        Ensure rows with invalid values are reported and skipped without
+        aborting the sync, and keep missing records from being deactivated.
+        """
+        absent = TargetUserRecord.objects.create(
+            user=self.other_user,
+            target=self.expo,
+            target_user_id="ExponentPushToken[old]",
+            description="Egg's old phone",
+            active=True)
+        path = self._write(
+            ".csv",
+            "user,target,target_user_id,active\n"
+            "Danglesauce,Expo,ExponentPushToken[1],maybe\n"
+            "Danglesauce,Expo,ExponentPushToken[2],true\n",
+        )
+
+        out, err = StringIO(), StringIO()
+        call_command(
+            "sync_target_user_records", path, "--deactivate-missing",
+            "--batch-size=1", stdout=out, stderr=err)
+
+        self.assertEqual(
+            list(TargetUserRecord.objects.filter(user=self.user).values_list(
+                "target_user_id", flat=True)),
+            ["ExponentPushToken[2]"])
+        absent.refresh_from_db()
+        self.assertTrue(absent.active)
+        self.assertIn("Skipped 1 rows (1 invalid)", out.getvalue())
+        self.assertIn("maybe", err.getvalue())
+        self.assertIn("Not deactivating missing records", err.getvalue())
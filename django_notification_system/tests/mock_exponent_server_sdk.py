@@ -1,6 +1,11 @@
+import random
+import time
+import uuid
 from collections import namedtuple
 from exponent_server_sdk import PushResponseError, DeviceNotRegisteredError, MessageTooBigError, MessageRateExceededError, PushServerError, PushMessage, PushResponse
 
+from django_notification_system.utils.expo_client import PushTicket
+
 
 class MockPushClient(object):
     """Exponent push client
@@ -9,6 +14,17 @@ class MockPushClient(object):
     """
     DEFAULT_HOST = "https://exp.host" # TODO
     DEFAULT_BASE_API_URL = "/--/api/v2"
+    MAX_RECEIPT_IDS = 1000
+
+    # Receipts returned by get_receipts, keyed by ticket id. Tickets missing
+    # from here get an 'ok' receipt, tickets mapped to None get no receipt.
+    receipts = {}
+
+    # Seconds each publish takes, and the share of publishes failing with a
+    # PushServerError, to stand in for a slow or flaky Expo under load.
+    latency = 0
+    error_rate = 0
+    random = random.Random()
 
     def __init__(self, host=None, api_url=None):
         """Construct a new PushClient object.
@@ -51,14 +67,20 @@ class MockPushClient(object):
         Args:
             push_messages: An array of PushMessage objects.
         """
+        if self.latency:
+            time.sleep(self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise PushServerError('Request failed', {})
+
         receipts = []
         for i, message in enumerate(push_messages):
             payload = message.get_payload()
-            receipts.append(PushResponse(
+            receipts.append(PushTicket(
                 push_message=message,
                 status=PushResponse.SUCCESS_STATUS,
                 message='',
-                details=None))
+                details=None,
+                id=str(uuid.uuid4())))
             if payload.get('sound', 'default') != 'default':
                 raise PushServerError('Request failed', {})
 
@@ -85,3 +107,19 @@ class MockPushClient(object):
            An array of PushResponse objects which contains the results.
         """
         return self._publish_internal(push_messages)
+
+    def get_receipts(self, ticket_ids):
+        """Returns the push receipts of the given tickets
+
+        Args:
+            ticket_ids: An iterable of push ticket ids.
+
+        Returns:
+           A dictionary of receipts keyed by ticket id.
+        """
+        receipts = {}
+        for ticket_id in ticket_ids:
+            receipt = self.receipts.get(ticket_id, {'status': PushResponse.SUCCESS_STATUS})
+            if receipt is not None:
+                receipts[ticket_id] = receipt
+        return receipts
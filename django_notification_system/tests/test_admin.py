@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+
+
+class TestNotificationAdmin(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="Admin", email="admin@gmail.com", password="ImpressivePassword")
+        self.client.force_login(self.admin)
+
+        for username in ["Danglesauce", "Eggless"]:
+            user = User.objects.create_user(
+                username=username,
+                email=f"{username.lower()}@gmail.com",
+                password="ImpressivePassword")
+            record = TargetUserRecord.objects.create(
+                user=user,
+                target=NotificationTarget.objects.get(name="Email"),
+                target_user_id=user.email,
+                description="Email",
+                active=True)
+            for i in range(5):
+                Notification.objects.create(
+                    target_user_record=record,
+                    status=Notification.SCHEDULED,
+                    title=f"Title {i}",
+                    body="<p>Body</p>",
+                    scheduled_delivery=timezone.now() + timedelta(minutes=i))
+
+    def _changelist_queries(self, model_name, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse(f"admin:django_notification_system_{model_name}_changelist"), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        _, queries = self._changelist_queries("notification")
+        Notification.objects.filter(title="Title 0").delete()
+        _, fewer_row_queries = self._changelist_queries("notification")
+        self.assertEqual(queries, fewer_row_queries)
+
+        _, queries = self._changelist_queries("targetuserrecord")
+        TargetUserRecord.objects.filter(user__username="Eggless").delete()
+        _, fewer_row_queries = self._changelist_queries("targetuserrecord")
+        self.assertEqual(queries, fewer_row_queries)
+
+    def test_search(self):
+        response, _ = self._changelist_queries("notification", q="Danglesauce")
+        self.assertEqual(response.context["cl"].result_count, 5)
+
+        response, _ = self._changelist_queries("notification", q="eggless@")
+        self.assertEqual(response.context["cl"].result_count, 5)
+
+        response, _ = self._changelist_queries("targetuserrecord", q="Eggless")
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+    def test_reschedule_action(self):
+        """
+        The reschedule action moves the selected pending notifications.
+        """
+        selected = Notification.objects.filter(title__in=["Title 0", "Title 1"])
+        response = self.client.post(
+            reverse("admin:django_notification_system_notification_changelist"),
+            {
+                "action": "reschedule",
+                "_selected_action": [str(pk) for pk in selected.values_list("pk", flat=True)],
+                "scheduled_delivery_0": "2030-01-01",
+                "scheduled_delivery_1": "09:00:00",
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            Notification.objects.filter(scheduled_delivery__year=2030).count(), 4)
+
+    def test_cancel_action(self):
+        self.client.post(
+            reverse("admin:django_notification_system_notification_changelist"),
+            {
+                "action": "cancel",
+                "_selected_action": [
+                    str(pk) for pk in Notification.objects.values_list("pk", flat=True)],
+            })
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.CANCELLED).count(), 10)
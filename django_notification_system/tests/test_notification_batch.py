@@ -0,0 +1,230 @@
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.dispatch.queues import get_queue
+from django_notification_system.models import (
+    Notification, NotificationBatch, NotificationOptOut, NotificationTarget,
+    TargetUserRecord)
+from django_notification_system.routing import escalate_notifications, notify
+from django_notification_system.utils.bulk import bulk_create_notifications, set_opt_outs
+
+
+class TestNotificationBatch(TestCase):
+    def setUp(self):
+        for username in ["Danglesauce", "Eggless", "Charlie"]:
+            user = User.objects.create_user(
+                username=username,
+                email=f"{username.lower()}@gmail.com",
+                password="ImpressivePassword")
+            TargetUserRecord.objects.create(
+                user=user,
+                target=NotificationTarget.objects.get(name="Email"),
+                target_user_id=user.email,
+                description="Email",
+                active=True)
+        self.batch = NotificationBatch.objects.create(name="Spring Sale")
+
+    def notify(self, title="Title"):
+        return notify(User.objects.all(), title, "<p>Body</p>", batch=self.batch)
+
+    def test_progress_counters(self):
+        self.notify()
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.scheduled_count, 3)
+        self.assertEqual(self.batch.remaining_count, 3)
+
+        call_command("process_notifications", stdout=StringIO())
+
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.delivered_count, 3)
+        self.assertEqual(self.batch.remaining_count, 0)
+
+    def test_pause_and_resume(self):
+        self.notify()
+        self.assertEqual(self.batch.pause(), 3)
+        self.assertEqual(len(self.notify("Late")), 3)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.PAUSED).count(), 6)
+
+        call_command("process_notifications", stdout=StringIO())
+        self.assertFalse(
+            Notification.objects.filter(status=Notification.DELIVERED).exists())
+
+        self.assertEqual(self.batch.resume(), 6)
+        call_command("process_notifications", stdout=StringIO())
+        self.batch.refresh_from_db()
+        self.assertEqual(self.batch.status, NotificationBatch.ACTIVE)
+        self.assertEqual(self.batch.delivered_count, 6)
+
+    def test_pause_keeps_retries(self):
+        """Notifications waiting for a retry are retried once the batch resumes."""
+        self.notify()
+        retry = Notification.objects.filter(batch=self.batch).first()
+        Notification.objects.filter(pk=retry.pk).update(
+            status=Notification.RETRY, attempted_delivery=timezone.now())
+        modified_date = self.batch.modified_date
+
+        self.assertEqual(self.batch.pause(), 3)
+        self.assertGreater(self.batch.modified_date, modified_date)
+        self.batch.refresh_from_db()
+        self.assertGreater(self.batch.modified_date, modified_date)
+
+        self.assertEqual(self.batch.resume(), 3)
+        retry.refresh_from_db()
+        self.assertEqual(retry.status, Notification.RETRY)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.SCHEDULED).count(), 2)
+
+    @override_settings(NOTIFICATION_SYSTEM_QUEUE={
+        "backend": "django_notification_system.dispatch.queues.InMemoryQueue"})
+    def test_opt_out_while_paused(self):
+        """
+        Users who opt out while the batch is paused do not get its notifications
+        when it resumes, and the dispatch daemon is woken for the others.
+        """
+        self.notify()
+        self.batch.pause()
+        queue = get_queue()
+        queue.wait(0)
+
+        NotificationOptOut.objects.create(
+            user=User.objects.get(username="Danglesauce"), active=True)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.OPTED_OUT).count(), 1)
+
+        self.assertEqual(self.batch.resume(), 2)
+        self.assertTrue(queue.wait(0))
+
+    def test_resume_skips_opted_out_users(self):
+        """Opt outs that bypassed the cascade are caught when resuming."""
+        self.notify()
+        self.batch.pause()
+        NotificationOptOut.objects.bulk_create([
+            NotificationOptOut(user=User.objects.get(username="Eggless"), active=True)])
+
+        self.assertEqual(self.batch.resume(), 2)
+        self.assertEqual(
+            Notification.objects.get(status=Notification.OPTED_OUT).target_user_record.user.username,
+            "Eggless")
+
+    def test_opt_out_cascades_cover_paused(self):
+        self.notify()
+        self.batch.pause()
+        set_opt_outs([User.objects.get(username="Charlie").pk])
+        NotificationOptOut.objects.bulk_create([
+            NotificationOptOut(user=User.objects.get(username="Eggless"), active=True)])
+        call_command("reconcile_opt_outs", stdout=StringIO())
+
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.OPTED_OUT).count(), 2)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.PAUSED).count(), 1)
+
+    def test_cancel(self):
+        self.notify()
+        # One UPDATE of the notifications and one of the batch, in a savepoint,
+        # and a refresh of the counter.
+        with self.assertNumQueries(5):
+            self.assertEqual(self.batch.cancel(), 3)
+        self.assertEqual(self.batch.cancelled_count, 3)
+        self.assertEqual(self.batch.remaining_count, 0)
+        self.assertEqual(self.notify("Late"), [])
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.CANCELLED).count(), 3)
+
+    def assertCounters(self, **counters):
+        self.batch.refresh_from_db()
+        for counter, value in counters.items():
+            self.assertEqual(getattr(self.batch, counter), value, counter)
+
+    def test_counters_of_digests(self):
+        """Coalesced notifications are skipped, and their digests counted instead."""
+        self.notify("First")
+        notify(User.objects.all(), "Second", "<p>Body</p>", digest_key="sale", batch=self.batch)
+        notify(User.objects.all(), "Third", "<p>Body</p>", digest_key="sale", batch=self.batch)
+
+        call_command("process_notifications", stdout=StringIO())
+
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.COALESCED).count(), 6)
+        self.assertCounters(
+            scheduled_count=12, delivered_count=6, skipped_count=6, remaining_count=0)
+
+    def test_counters_of_cancel_notifications(self):
+        self.notify()
+        call_command("manage_notifications", "cancel", stdout=StringIO())
+        self.assertCounters(cancelled_count=3, remaining_count=0)
+
+    def test_counters_of_conflicting_notifications(self):
+        """Notifications skipped by the INSERT are not counted as scheduled."""
+        now = timezone.now()
+
+        def notifications():
+            return [
+                Notification(
+                    target_user_record=record,
+                    title="Title",
+                    body="<p>Body</p>",
+                    status=Notification.SCHEDULED,
+                    scheduled_delivery=now,
+                    batch=self.batch)
+                for record in TargetUserRecord.objects.all()
+            ]
+
+        self.assertEqual(len(bulk_create_notifications(notifications())), 3)
+        self.assertEqual(bulk_create_notifications(notifications()), [])
+        self.assertCounters(scheduled_count=3, remaining_count=3)
+
+    def test_counters_of_opt_outs(self):
+        self.notify()
+        NotificationOptOut.objects.create(
+            user=User.objects.get(username="Danglesauce"), active=True)
+        set_opt_outs([User.objects.get(username="Eggless").pk])
+        NotificationOptOut.objects.bulk_create([
+            NotificationOptOut(user=User.objects.get(username="Charlie"), active=True)])
+        call_command("reconcile_opt_outs", stdout=StringIO())
+
+        self.assertCounters(skipped_count=3, remaining_count=0)
+
+    def test_counters_of_opt_outs_on_resume(self):
+        self.notify()
+        self.batch.pause()
+        NotificationOptOut.objects.bulk_create([
+            NotificationOptOut(user=User.objects.get(username="Charlie"), active=True)])
+        self.batch.resume()
+        call_command("process_notifications", stdout=StringIO())
+
+        self.assertCounters(delivered_count=2, skipped_count=1, remaining_count=0)
+
+    def test_counters_of_requeue(self):
+        """Requeued notifications are not counted twice once they are processed again."""
+        self.notify()
+        self.batch.cancel()
+        Notification.objects.filter(
+            target_user_record__user__username="Charlie"
+        ).update(status=Notification.DELIVERY_FAILURE)
+        NotificationBatch.objects.filter(pk=self.batch.pk).update(
+            cancelled_count=2, failed_count=1)
+
+        call_command("manage_notifications", "requeue", stdout=StringIO())
+        self.assertCounters(cancelled_count=0, failed_count=0, remaining_count=3)
+
+        self.batch.resume()
+        call_command("process_notifications", stdout=StringIO())
+        self.assertCounters(delivered_count=3, remaining_count=0)
+
+    def test_counters_of_escalation_twice(self):
+        """Escalating the same notification twice schedules a single notification."""
+        self.notify()
+        notification = Notification.objects.filter(batch=self.batch).first()
+        Notification.objects.filter(pk=notification.pk).update(
+            status=Notification.INACTIVE_DEVICE,
+            extra={"fallback_channels": ["Email"]})
+
+        escalate_notifications([notification.pk])
+        escalate_notifications([notification.pk])
+
+        self.assertCounters(scheduled_count=4)
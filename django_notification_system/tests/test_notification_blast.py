@@ -0,0 +1,93 @@
+import json
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from six import StringIO
+
+from django_notification_system.models import (
+    Notification, NotificationBatch, NotificationTarget, TargetUserRecord)
+
+
+class TestNotificationBlast(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_superuser(
+            username="Admin", email="admin@gmail.com", password="ImpressivePassword")
+        volunteers = Group.objects.create(name="Volunteers")
+        for i in range(5):
+            user = User.objects.create_user(
+                username=f"Volunteer{i}",
+                email=f"volunteer{i}@gmail.com",
+                password="ImpressivePassword")
+            user.groups.add(volunteers)
+            TargetUserRecord.objects.create(
+                user=user,
+                target=NotificationTarget.objects.get(name="Email"),
+                target_user_id=user.email,
+                description="Email",
+                active=True)
+        self.client.force_login(self.staff)
+
+    def blast(self, **data):
+        return self.client.post(
+            reverse("notification_blast"),
+            json.dumps({
+                "title": "Shift reminder",
+                "body": "<p>Your shift starts in an hour.</p>",
+                "audience": {"groups__name": "Volunteers"},
+                **data,
+            }),
+            content_type="application/json")
+
+    def test_blast_returns_before_fan_out(self):
+        response = self.blast()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Notification.objects.exists())
+
+        call_command("process_notification_blasts", "--batch-size=2", stdout=StringIO())
+
+        self.assertEqual(Notification.objects.count(), 5)
+        progress = self.client.get(
+            reverse("notification_blast_progress", args=[response.json()["id"]])).json()
+        self.assertTrue(progress["fanned_out"])
+        self.assertEqual(progress["audience_count"], 5)
+        self.assertEqual(progress["scheduled_count"], 5)
+        self.assertEqual(progress["remaining_count"], 5)
+
+    def test_interrupted_fan_out_resumes(self):
+        batch = NotificationBatch.objects.get(pk=self.blast().json()["id"])
+        batch.fanout_cursor = str(
+            User.objects.filter(groups__name="Volunteers").order_by("pk")[1].pk)
+        batch.save()
+
+        call_command("process_notification_blasts", stdout=StringIO())
+        call_command("process_notification_blasts", stdout=StringIO())
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.audience_count, 3)
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_cancelled_blast_is_not_fanned_out(self):
+        NotificationBatch.objects.get(pk=self.blast().json()["id"]).cancel()
+
+        call_command("process_notification_blasts", stdout=StringIO())
+
+        self.assertFalse(Notification.objects.exists())
+
+    def test_invalid_blast(self):
+        response = self.blast(
+            audience={"password__startswith": "pbkdf2"}, channels=["Pigeon"])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            set(response.json()["errors"]), {"audience", "channels"})
+        self.assertEqual(self.blast(audience={"shoe_size": 12}).status_code, 400)
+        self.assertFalse(NotificationBatch.objects.exists())
+
+    def test_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.blast().status_code, 302)
+        self.assertEqual(
+            self.client.get(reverse("notifications_blasted")).status_code, 302)
@@ -0,0 +1,132 @@
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from django_notification_system.models import (
+    Notification, NotificationOptOut, NotificationTarget, TargetUserRecord)
+from django_notification_system.outbox import (
+    create_buffered_notifications, enqueue_notification)
+
+
+class TestOutbox(TransactionTestCase):
+    def setUp(self):
+        email, _ = NotificationTarget.objects.get_or_create(
+            name="Email", notification_module_name="email")
+
+        self.users = []
+        for username in ["Danglesauce", "Eggless", "Charlie"]:
+            user = User.objects.create_user(
+                username=username,
+                email=f"{username.lower()}@gmail.com",
+                password="ImpressivePassword")
+            TargetUserRecord.objects.create(
+                user=user,
+                target=email,
+                target_user_id=user.email,
+                description="Email",
+                active=True)
+            self.users.append(user)
+
+        NotificationOptOut.objects.create(user=self.users[2], active=True)
+
+    def test_notifications_created_on_commit(self):
+        """
+        Notifications are created in bulk once the transaction commits,
+        skipping opted out users.
+        """
+        with transaction.atomic():
+            for user in self.users:
+                enqueue_notification(user, "Email", "Title", "<p>Body</p>")
+            self.assertEqual(Notification.objects.count(), 0)
+
+        self.assertEqual(
+            set(Notification.objects.values_list(
+                "target_user_record__user__username", flat=True)),
+            {"Danglesauce", "Eggless"})
+
+    def test_flush_query_count(self):
+        """
+        Nothing is queried before the transaction commits, and creating the
+        buffered notifications takes a constant number of queries.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                for user in self.users[:2]:
+                    for i in range(5):
+                        enqueue_notification(user, "Email", f"Title {i}", "<p>Body</p>")
+                self.assertFalse([q for q in queries.captured_queries
+                                  if q["sql"].startswith(("SELECT", "INSERT"))])
+
+        self.assertEqual(Notification.objects.count(), 10)
+
+        requests = [
+            {
+                "user_id": user.pk,
+                "target_name": "Email",
+                "title": f"Batch {i}",
+                "body": "<p>Body</p>",
+                "scheduled_delivery": timezone.now(),
+            }
+            for user in self.users[:2]
+            for i in range(5)
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            create_buffered_notifications(requests)
+        self.assertEqual(Notification.objects.count(), 20)
+        # BEGIN and COMMIT aside, one query for the records and one INSERT.
+        self.assertLessEqual(
+            len([q for q in queries.captured_queries
+                 if q["sql"].startswith(("SELECT", "INSERT"))]),
+            2)
+
+    def test_nothing_created_on_rollback(self):
+        """
+        No notifications are created for rolled back work, including rolled
+        back savepoints.
+        """
+        with transaction.atomic():
+            enqueue_notification(self.users[0], "Email", "Kept", "<p>Body</p>")
+            try:
+                with transaction.atomic():
+                    enqueue_notification(self.users[1], "Email", "Lost", "<p>Body</p>")
+                    raise ValueError
+            except ValueError:
+                pass
+
+        try:
+            with transaction.atomic():
+                enqueue_notification(self.users[0], "Email", "Also lost", "<p>Body</p>")
+                raise ValueError
+        except ValueError:
+            pass
+
+        self.assertEqual(
+            list(Notification.objects.values_list("title", flat=True)), ["Kept"])
+
+    def test_rolled_back_savepoint_before_the_rest(self):
+        """
+        Rolling back the savepoint of the first request of a transaction does
+        not lose the requests that follow it.
+        """
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    enqueue_notification(self.users[0], "Email", "Lost", "<p>Body</p>")
+                    raise ValueError
+            except ValueError:
+                pass
+            with transaction.atomic():
+                enqueue_notification(self.users[0], "Email", "Nested", "<p>Body</p>")
+            enqueue_notification(self.users[1], "Email", "Kept", "<p>Body</p>")
+
+        self.assertEqual(
+            set(Notification.objects.values_list("title", flat=True)), {"Nested", "Kept"})
+
+    def test_outside_of_transaction(self):
+        """
+        Outside of a transaction, notifications are created right away.
+        """
+        enqueue_notification(self.users[0], "Email", "Title", "<p>Body</p>")
+        self.assertEqual(Notification.objects.count(), 1)
@@ -0,0 +1,83 @@
+import json
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from six import StringIO
+
+from django_notification_system.models import (
+    Notification, NotificationTarget, QueueHealthSnapshot, TargetUserRecord)
+from django_notification_system.views.queue_health import queue_health
+
+
+class TestQueueHealth(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_superuser(
+            username="Admin", email="admin@gmail.com", password="ImpressivePassword")
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        record = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Email"),
+            target_user_id=user.email,
+            description="Email",
+            active=True)
+
+        now = timezone.now()
+        self.oldest_due = now - timedelta(minutes=30)
+        notifications = [
+            (Notification.SCHEDULED, self.oldest_due, None, 0),
+            (Notification.SCHEDULED, now - timedelta(minutes=1), None, 0),
+            (Notification.SCHEDULED, now + timedelta(days=1), None, 0),
+            (Notification.RETRY, now - timedelta(minutes=1), now - timedelta(minutes=2), 2),
+            (Notification.DELIVERED, now, now - timedelta(minutes=1), 0),
+            (Notification.DELIVERED, now, now - timedelta(hours=2), 0),
+            (Notification.DELIVERY_FAILURE, now, now - timedelta(minutes=1), 3),
+        ]
+        for i, (status, scheduled, attempted, retries) in enumerate(notifications):
+            Notification.objects.create(
+                target_user_record=record,
+                status=status,
+                title=f"Title {i}",
+                body="<p>Body</p>",
+                scheduled_delivery=scheduled,
+                attempted_delivery=attempted,
+                retry_attempts=retries)
+
+        call_command("refresh_queue_health", stdout=StringIO())
+
+    def test_snapshot(self):
+        snapshots = {
+            snapshot.status: snapshot for snapshot in QueueHealthSnapshot.latest()
+        }
+        self.assertEqual(snapshots[Notification.SCHEDULED].pending_count, 3)
+        self.assertEqual(snapshots[Notification.SCHEDULED].due_count, 2)
+        self.assertEqual(snapshots[Notification.SCHEDULED].oldest_due, self.oldest_due)
+        self.assertEqual(snapshots[Notification.RETRY].retry_distribution, {"2": 1})
+        self.assertEqual(
+            snapshots[Notification.DELIVERED].recent_counts,
+            {"300": 1, "3600": 1, "86400": 2})
+
+    def test_json_view(self):
+        request = RequestFactory().get("/queue-health/")
+        request.user = self.staff
+        response = queue_health(request)
+
+        self.assertEqual(response.status_code, 200)
+        email = json.loads(response.content)["targets"]["Email"]
+        self.assertEqual(email["pending"], 4)
+        self.assertEqual(email["due"], 3)
+        # One delivery against a retry and a failure in the last 5 minutes.
+        self.assertEqual(email["failure_rates"]["300"], round(2 / 3, 4))
+
+    def test_admin_dashboard(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(
+            reverse("admin:django_notification_system_queuehealthsnapshot_changelist"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["cl"].result_count, 4)
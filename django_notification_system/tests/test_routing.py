@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase
+from six import StringIO
+
+from django_notification_system.models import (
+    Notification, NotificationOptOut, NotificationTarget, TargetUserRecord)
+from django_notification_system.routing import notify
+
+
+class TestRouting(TestCase):
+    def setUp(self):
+        self.users = {}
+        for username in ["Danglesauce", "Eggless", "Charlie"]:
+            user = User.objects.create_user(
+                username=username,
+                email=f"{username.lower()}@gmail.com",
+                password="ImpressivePassword")
+            TargetUserRecord.objects.create(
+                user=user,
+                target=NotificationTarget.objects.get(name="Email"),
+                target_user_id=user.email,
+                description="Email",
+                active=True)
+            self.users[username] = user
+
+        self.expo_record = TargetUserRecord.objects.create(
+            user=self.users["Danglesauce"],
+            target=NotificationTarget.objects.get(name="Expo"),
+            target_user_id="ExponentPushToken[ByAAmjPd96SUb1Is5eUzXX]",
+            description="Expo",
+            active=True)
+
+        NotificationOptOut.objects.create(user=self.users["Charlie"], active=True)
+
+    def test_notify_resolves_preferred_channels(self):
+        """
+        Each user gets a single notification on their most preferred channel,
+        resolved for the whole audience with one query.
+        """
+        # Records, one INSERT and the lookup of the inserted notifications.
+        with self.assertNumQueries(3):
+            notify(User.objects.all(), "Title", "<p>Body</p>")
+
+        self.assertEqual(
+            sorted(Notification.objects.values_list(
+                "target_user_record__user__username",
+                "target_user_record__target__name")),
+            [("Danglesauce", "Expo"), ("Eggless", "Email")])
+        self.assertEqual(
+            Notification.objects.get(target_user_record=self.expo_record)
+            .extra["fallback_channels"],
+            ["Twilio", "Email"])
+
+    def test_inactive_device_escalates_to_fallback(self):
+        """
+        When the device turns out to be inactive, the notification is sent on
+        the next channel the user has.
+        """
+        notify(self.users["Danglesauce"], "Title", "<p>Body</p>", channels=["Expo", "Email"])
+        self.expo_record.active = False
+        self.expo_record.save()
+
+        call_command("process_notifications", stdout=StringIO())
+        self.assertEqual(
+            Notification.objects.get(target_user_record=self.expo_record).status,
+            Notification.INACTIVE_DEVICE)
+
+        # Escalating again does not create a second notification.
+        call_command("process_notifications", stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(
+            Notification.objects.get(
+                target_user_record__target__name="Email").extra["fallback_channels"],
+            [])
@@ -6,7 +6,8 @@ from django_notification_system.models import (
     Notification, NotificationTarget, TargetUserRecord, NotificationOptOut)
 from django_notification_system.notification_creators.expo import (
     create_notification)
-from django_notification_system.exceptions import UserIsOptedOut, UserHasNoTargetRecords
+from django_notification_system.exceptions import (
+    NotificationsNotCreated, UserIsOptedOut, UserHasNoTargetRecords)
 
 
 class TestCreateNotification(TestCase):
@@ -110,3 +111,48 @@ class TestCreateNotification(TestCase):
 
         post_function_notifications = Notification.objects.all()
         self.assertEqual(len(post_function_notifications), 0)
+
+    def test_duplicate_notifications_not_created(self):
+        """
+        Creating the same notification twice should not create duplicates,
+        while a different `extra` makes it a different notification.
+        """
+        scheduled_delivery = timezone.now()
+        create_notification(user=self.user_with_targets,
+                            title="Wow",
+                            body="You really did it!",
+                            scheduled_delivery=scheduled_delivery)
+
+        with self.assertRaises(NotificationsNotCreated):
+            create_notification(user=self.user_with_targets,
+                                title="Wow",
+                                body="You really did it!",
+                                scheduled_delivery=scheduled_delivery)
+        self.assertEqual(Notification.objects.count(), 2)
+
+        create_notification(user=self.user_with_targets,
+                            title="Wow",
+                            body="You really did it!",
+                            scheduled_delivery=scheduled_delivery,
+                            extra={"badge": 1})
+        self.assertEqual(Notification.objects.count(), 4)
+
+    def test_dedupe_key_set_on_save(self):
+        """
+        Notifications saved directly get the same dedupe key the creators use.
+        """
+        scheduled_delivery = timezone.now()
+        notification = Notification.objects.create(
+            target_user_record=self.user_target1,
+            title="Wow",
+            body="You really did it!",
+            status=Notification.SCHEDULED,
+            scheduled_delivery=scheduled_delivery)
+        self.assertIsNotNone(notification.dedupe_key)
+
+        create_notification(user=self.user_with_targets,
+                            title="Wow",
+                            body="You really did it!",
+                            scheduled_delivery=scheduled_delivery)
+        # Only the notification for the second target was created.
+        self.assertEqual(Notification.objects.count(), 2)
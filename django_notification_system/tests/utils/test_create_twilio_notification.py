@@ -1,11 +1,13 @@
 from django.contrib.auth.models import User
-from django.test.testcases import TestCase
+from django.db import transaction
+from django.test.testcases import TestCase, TransactionTestCase
 from django.utils import timezone
 
 from django_notification_system.models import (
     Notification, NotificationTarget, TargetUserRecord, NotificationOptOut)
 from django_notification_system.notification_creators.twilio import (
     create_notification)
+from django_notification_system.utils.idempotency import recent_idempotency_keys
 from django_notification_system.exceptions import UserIsOptedOut, UserHasNoTargetRecords
 
 
@@ -109,4 +111,98 @@ class TestCreateNotification(TestCase):
             pass
 
         post_function_notifications = Notification.objects.all()
-        self.assertEqual(len(post_function_notifications), 0)
\ No newline at end of file
+        self.assertEqual(len(post_function_notifications), 0)
+
+    def test_idempotency_key(self):
+        """
+        Repeating a call with the same idempotency key should neither create
+        duplicates nor raise, even when scheduled_delivery defaults to now.
+        """
+        self.addCleanup(recent_idempotency_keys.clear)
+
+        for _ in range(2):
+            create_notification(user=self.user_with_targets,
+                                title="Wow",
+                                body="You really did it!",
+                                idempotency_key="comment-1234")
+        self.assertEqual(Notification.objects.count(), 2)
+
+        # Also when the in-process cache has been lost, e.g. in another process.
+        recent_idempotency_keys.clear()
+        create_notification(user=self.user_with_targets,
+                            title="Wow",
+                            body="You really did it!",
+                            idempotency_key="comment-1234")
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(
+            Notification.objects.filter(idempotency_key="comment-1234").count(), 2)
+
+        create_notification(user=self.user_with_targets,
+                            title="Wow",
+                            body="You really did it!",
+                            idempotency_key="comment-5678")
+        self.assertEqual(Notification.objects.count(), 4)
+
+    def test_idempotency_key_retry_after_rollback(self):
+        """
+        A call whose transaction rolled back must not keep its retry from
+        creating the notification.
+        """
+        self.addCleanup(recent_idempotency_keys.clear)
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                create_notification(user=self.user_with_targets,
+                                    title="Wow",
+                                    body="You really did it!",
+                                    idempotency_key="comment-1234")
+                raise RuntimeError("Request failed")
+        self.assertEqual(Notification.objects.count(), 0)
+        self.assertNotIn(
+            ("Twilio", self.user_with_targets.pk, "comment-1234"), recent_idempotency_keys)
+
+        create_notification(user=self.user_with_targets,
+                            title="Wow",
+                            body="You really did it!",
+                            idempotency_key="comment-1234")
+        self.assertEqual(Notification.objects.count(), 2)
+
+
+class TestIdempotencyCache(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='sadboi@gmail.com',
+            email='sadboi@gmail.com',
+            first_name='Sad',
+            last_name='Boi',
+            password='Ok.')
+
+        target, created = NotificationTarget.objects.get_or_create(
+            name='Twilio',
+            notification_module_name='twilio')
+
+        TargetUserRecord.objects.create(
+            user=self.user,
+            target=target,
+            target_user_id='2917471274',
+            description='Happy Phone')
+
+        self.addCleanup(recent_idempotency_keys.clear)
+
+    def test_hot_duplicate_skips_database(self):
+        """
+        Once the first call commits, a repeat with the same idempotency key is
+        answered from the in-process cache without a single query.
+        """
+        create_notification(user=self.user,
+                            title="Wow",
+                            body="You really did it!",
+                            idempotency_key="comment-1234")
+        self.assertIn(("Twilio", self.user.pk, "comment-1234"), recent_idempotency_keys)
+
+        with self.assertNumQueries(0):
+            create_notification(user=self.user,
+                                title="Wow",
+                                body="You really did it!",
+                                idempotency_key="comment-1234")
+        self.assertEqual(Notification.objects.count(), 1)
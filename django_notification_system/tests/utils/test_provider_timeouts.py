@@ -0,0 +1,104 @@
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from requests.exceptions import Timeout
+from six import StringIO
+
+from django_notification_system.models import (
+    Notification, NotificationTarget, TargetUserRecord)
+from django_notification_system.notification_handlers.twilio import get_client
+from django_notification_system.utils.fake_providers import FakeTwilioServer
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answers every request, but only after taking a long nap."""
+
+    delay = 2
+
+    def do_POST(self):
+        time.sleep(self.delay)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b'{"data": []}')
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up long ago, which is the point.
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class TestProviderTimeouts(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+        cls.server.daemon_threads = True
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        user = User.objects.create_user(
+            username="Danglesauce",
+            email="danglesauce@gmail.com",
+            password="ImpressivePassword")
+        record = TargetUserRecord.objects.create(
+            user=user,
+            target=NotificationTarget.objects.get(name="Expo"),
+            target_user_id="ExponentPushToken[ByAAmjPd96SUb1Is5eUzXX]",
+            description="Dangle Expo",
+            active=True)
+        for i in range(3):
+            Notification.objects.create(
+                target_user_record=record,
+                status=Notification.SCHEDULED,
+                title=f"Title {i}",
+                body="Body",
+                scheduled_delivery=timezone.now() - timedelta(minutes=1))
+
+    def test_hung_provider_does_not_stall_dispatch(self):
+        """
+        Sends to a provider that does not answer in time fail after the
+        configured timeout and are retried later, and the loop moves on.
+        """
+        host, port = self.server.server_address
+        targets = {
+            **settings.NOTIFICATION_SYSTEM_TARGETS,
+            "expo": {
+                "host": f"http://{host}:{port}",
+                "timeout": {"connect": 1, "read": 0.2},
+            },
+        }
+
+        started = time.monotonic()
+        with override_settings(NOTIFICATION_SYSTEM_TARGETS=targets):
+            call_command("process_notifications", stdout=StringIO())
+
+        self.assertLess(time.monotonic() - started, SlowHandler.delay)
+        self.assertEqual(
+            Notification.objects.filter(status=Notification.RETRY).count(), 3)
+
+    def test_twilio_client_times_out(self):
+        """The Twilio client applies the timeout to every request."""
+        self.addCleanup(get_client.cache_clear)
+        with FakeTwilioServer(latency=SlowHandler.delay) as twilio:
+            client = get_client("ACtimeout", "token", 0.2, twilio.url)
+            started = time.monotonic()
+            with self.assertRaises(Timeout):
+                client.messages.create(body="Body", from_="+15550000000", to="+15551111111")
+
+        self.assertLess(time.monotonic() - started, SlowHandler.delay)
@@ -2,9 +2,18 @@ from .views.notification_blast import (
     NotificationBlasterView,
     NotificationsBlastedView,
 )
+from .views.queue_health import queue_health
 
 from django.urls import path
 
 
-urlpatterns = []
-
+urlpatterns = [
+    path("blast/", NotificationBlasterView.as_view(), name="notification_blast"),
+    path("blasts/", NotificationsBlastedView.as_view(), name="notifications_blasted"),
+    path(
+        "blasts/<uuid:pk>/",
+        NotificationsBlastedView.as_view(),
+        name="notification_blast_progress",
+    ),
+    path("queue-health/", queue_health, name="queue_health"),
+]
@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
 from django.db.models import QuerySet
+from django.utils.functional import cached_property
 from django.http import HttpRequest
 from django.urls import reverse
 from django.utils.safestring import mark_safe
@@ -111,3 +114,61 @@ USER_SEARCH_FIELDS = (
     "user__last_name",
     "user__email",
 )
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    A paginator that estimates the number of rows of unfiltered changelists from
+    the database statistics instead of running COUNT(*) over the whole table.
+
+    Estimates are available on PostgreSQL and MySQL. Filtered changelists, other
+    databases and small tables are counted exactly.
+
+    Usage:
+    ```
+    @admin.register(MyModel)
+    class MyModelAdmin(admin.ModelAdmin):
+        paginator = EstimatedCountPaginator
+        show_full_result_count = False
+    ```
+    """
+
+    # Tables estimated to be smaller than this are counted exactly.
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, QuerySet) and not queryset.query.where:
+            estimate = estimate_row_count(queryset)
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                return estimate
+        return super().count
+
+
+def estimate_row_count(queryset: QuerySet):
+    """
+    Return the number of rows of the table of a queryset as estimated by the
+    database statistics, or None where no estimate is available.
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)"
+        params = [connection.ops.quote_name(table)]
+    elif connection.vendor == "mysql":
+        sql = (
+            "SELECT table_rows FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s"
+        )
+        params = [table]
+    else:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        row = cursor.fetchone()
+    # PostgreSQL reports -1 for tables that were never analyzed.
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
@@ -0,0 +1,536 @@
+"""Helpers for set-based (bulk) operations on notification system models."""
+import csv
+import json
+from collections import Counter
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from ..dispatch.queues import get_queue
+from ..models import (
+    Notification,
+    NotificationBatch,
+    NotificationOptOut,
+    TargetUserRecord,
+)
+from ..models.notification import build_dedupe_key, build_shard_key
+
+
+def chunked(iterable, size: int):
+    """Yield successive lists of at most `size` items from `iterable`.
+
+    Args:
+        iterable (iterable): Any iterable, including generators and
+            queryset iterators.
+        size (int): The maximum number of items in each chunk.
+
+    Yields:
+        list: The next chunk of items.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def infer_format(path: str) -> str:
+    """Infer the input format ("csv" or "jsonl") from a file name.
+
+    Raises:
+        ValueError: When the format cannot be inferred.
+    """
+    if path.endswith(".csv"):
+        return "csv"
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    raise ValueError(f"Unable to infer the format of {path}, please specify --format.")
+
+
+def read_rows(stream, format: str):
+    """Lazily read dictionaries from a CSV (with a header row) or JSON Lines stream.
+
+    Args:
+        stream (file): An open text stream.
+        format (str): Either "csv" or "jsonl".
+
+    Yields:
+        dict: One dictionary per input row. Blank JSON lines are skipped.
+
+    Raises:
+        ValueError: When the format is unknown or a JSON line is invalid.
+    """
+    if format == "csv":
+        yield from csv.DictReader(stream)
+    elif format == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+    else:
+        raise ValueError(f"Unsupported input format: {format}")
+
+
+def parse_bool(value, default: bool = True) -> bool:
+    """Interpret a CSV/JSON value as a boolean.
+
+    Args:
+        value: The raw value. Booleans are returned as is, and strings such as
+            "true", "1", "yes", "false", "0" and "no" are interpreted.
+        default (bool, optional): Returned for missing or blank values. Defaults to True.
+
+    Raises:
+        ValueError: When the value cannot be interpreted.
+    """
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    normalized = str(value).strip().lower()
+    if normalized in ("true", "t", "1", "yes", "y"):
+        return True
+    if normalized in ("false", "f", "0", "no", "n"):
+        return False
+    raise ValueError(f"Cannot interpret {value!r} as a boolean")
+
+
+def resolve_user_ids(identifiers, user_field: str) -> dict:
+    """Map user identifiers to primary keys with a single query.
+
+    Args:
+        identifiers (iterable): Values of `user_field` to look up.
+        user_field (str): The user model field the identifiers refer to.
+
+    Returns:
+        dict: The primary key of each user found, keyed by the string form
+        of its identifier. Unknown identifiers are absent.
+    """
+    User = get_user_model()
+    return {
+        str(identifier): pk
+        for identifier, pk in User.objects.filter(
+            **{f"{user_field}__in": set(identifiers)}
+        ).values_list(user_field, "pk")
+    }
+
+
+def inserted_objects(model, objs):
+    """Return the objects that a `bulk_create(..., ignore_conflicts=True)` inserted.
+
+    Conflicting rows are skipped silently, so their objects keep a primary key
+    (generated client side, see the UUID primary keys of the models) that
+    is not found in the table afterwards. Costs one SELECT.
+    """
+    found = set(
+        model.objects.filter(pk__in=[obj.pk for obj in objs]).values_list("pk", flat=True)
+    )
+    return [obj for obj in objs if obj.pk in found]
+
+
+def upsert_target_user_records(records, touch_unchanged=False):
+    """Insert or update a chunk of target user records with a constant number of queries.
+
+    Records are matched against existing rows using the
+    (user, target, target_user_id) unique constraint. Missing rows are
+    inserted with a single `bulk_create`, and rows whose `active` flag
+    or `description` differ are updated with a single `bulk_update`.
+
+    Args:
+        records ([TargetUserRecord]): Unsaved TargetUserRecord instances with
+            `user_id`, `target_id`, `target_user_id`, `description` and
+            `active` populated. A `description` of None leaves the description
+            of an existing row untouched and names the target for a new row.
+        touch_unchanged (bool, optional): Bump the `modified_date` of matched
+            rows that did not otherwise change. Defaults to False.
+
+    Returns:
+        tuple: The number of (created, updated) records.
+    """
+    if not records:
+        return 0, 0
+
+    # Last one wins if the same record appears more than once in a chunk.
+    wanted = {
+        (record.user_id, record.target_id, record.target_user_id): record
+        for record in records
+    }
+
+    existing = TargetUserRecord.objects.filter(
+        user_id__in={key[0] for key in wanted},
+        target_id__in={key[1] for key in wanted},
+    ).values_list("id", "user_id", "target_id", "target_user_id", "active", "description")
+
+    now = timezone.now()
+    to_update = []
+    unchanged_ids = []
+    for pk, user_id, target_id, target_user_id, active, description in existing:
+        record = wanted.pop((user_id, target_id, target_user_id), None)
+        if record is None:
+            continue
+        if record.description is None:
+            record.description = description
+        if record.active != active or record.description != description:
+            record.id = pk
+            record.modified_date = now
+            to_update.append(record)
+        else:
+            unchanged_ids.append(pk)
+
+    to_create = list(wanted.values())
+    for record in to_create:
+        if record.description is None:
+            record.description = f"{record.target.name} record"
+    if to_create:
+        # Rows inserted concurrently since our read are simply skipped.
+        TargetUserRecord.objects.bulk_create(to_create, ignore_conflicts=True)
+        to_create = inserted_objects(TargetUserRecord, to_create)
+    if to_update:
+        TargetUserRecord.objects.bulk_update(
+            to_update, ["active", "description", "modified_date"]
+        )
+    if touch_unchanged and unchanged_ids:
+        TargetUserRecord.objects.filter(id__in=unchanged_ids).update(
+            modified_date=now
+        )
+
+    return len(to_create), len(to_update)
+
+
+def set_opt_outs(user_ids, active: bool = True):
+    """Create or update the opt outs of a chunk of users with a constant number of queries.
+
+    This is the bulk equivalent of saving a `NotificationOptOut` for each
+    user: when opting users out, their SCHEDULED, RETRY and PAUSED
+    notifications are changed to OPTED_OUT with a single UPDATE statement.
+
+    Args:
+        user_ids (iterable): Primary keys of the users to update.
+        active (bool, optional): Whether the opt outs should be active. Defaults to True.
+
+    Returns:
+        tuple: The number of (created, updated) opt outs and of notifications
+        that were marked as OPTED_OUT.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0, 0, 0
+
+    existing = dict(
+        NotificationOptOut.objects.filter(user_id__in=user_ids).values_list(
+            "user_id", "active"
+        )
+    )
+
+    to_create = [
+        NotificationOptOut(user_id=user_id, active=active)
+        for user_id in user_ids
+        if user_id not in existing
+    ]
+    if to_create:
+        NotificationOptOut.objects.bulk_create(to_create, ignore_conflicts=True)
+        to_create = inserted_objects(NotificationOptOut, to_create)
+
+    to_update = [user_id for user_id, current in existing.items() if current != active]
+    if to_update:
+        NotificationOptOut.objects.filter(user_id__in=to_update).update(
+            active=active, modified_date=timezone.now()
+        )
+
+    opted_out = 0
+    if active:
+        opted_out = set_notification_status(
+            Notification.objects.filter(
+                status__in=[Notification.SCHEDULED, Notification.RETRY, Notification.PAUSED],
+                target_user_record__user_id__in=user_ids,
+            ),
+            Notification.OPTED_OUT,
+        )
+
+    return len(to_create), len(to_update), opted_out
+
+
+def bulk_create_notifications(
+    notifications, batch_size: int = 1000, check_existing: bool = True
+):
+    """Insert notifications, skipping those whose dedupe key already exists.
+
+    Each chunk costs one INSERT that ignores conflicts on the dedupe key
+    (ON CONFLICT DO NOTHING), which covers notifications inserted
+    concurrently by someone else, and one SELECT to find the notifications
+    it actually inserted. The `scheduled_count` of the batches of the
+    notifications, if any, is increased by those with one UPDATE per batch
+    and chunk. Finally the queue backend
+    is notified, so a dispatch daemon picks the notifications up right away.
+
+    Args:
+        notifications (iterable): Unsaved Notification instances. Instances
+            without a `dedupe_key` get the default key from `build_dedupe_key`,
+            and their `shard_key` from `build_shard_key`.
+        batch_size (int, optional): Number of notifications per INSERT. Defaults to 1000.
+        check_existing (bool, optional): Look up which notifications were
+            inserted. Without this lookup, each chunk is a single INSERT but it
+            is unknown which notifications already existed. Defaults to True.
+
+    Returns:
+        [Notification]: The notifications that did not exist yet, or all
+        (deduplicated) notifications when `check_existing` is False.
+    """
+    created = []
+    for chunk in chunked(notifications, batch_size):
+        unique = {}
+        for notification in chunk:
+            if notification.shard_key is None:
+                notification.shard_key = build_shard_key(notification.target_user_record_id)
+            if not notification.dedupe_key:
+                notification.dedupe_key = build_dedupe_key(
+                    notification.target_user_record_id,
+                    notification.scheduled_delivery,
+                    notification.title,
+                    notification.extra,
+                    notification.idempotency_key,
+                )
+            unique.setdefault(notification.dedupe_key, notification)
+
+        new = list(unique.values())
+        if any(n.batch_id for n in new):
+            # Notifications of batches are always looked up, so that none is
+            # added to the `scheduled_count` of its batch twice.
+            with transaction.atomic():
+                Notification.objects.bulk_create(new, ignore_conflicts=True)
+                new = inserted_objects(Notification, new)
+                increment_batch_counters(new, "scheduled_count")
+        elif new:
+            Notification.objects.bulk_create(new, ignore_conflicts=True)
+            if check_existing:
+                new = inserted_objects(Notification, new)
+        created.extend(new)
+
+    if any(n.status == Notification.SCHEDULED for n in created):
+        # Wake `process_notifications --daemon`, see `dispatch.queues`.
+        get_queue().notify()
+    return created
+
+
+# The NotificationBatch counter of each status that takes a notification out
+# of the `remaining_count` of its batch.
+BATCH_COUNTERS = {
+    Notification.DELIVERED: "delivered_count",
+    Notification.DELIVERY_FAILURE: "failed_count",
+    Notification.INACTIVE_DEVICE: "failed_count",
+    Notification.THROTTLED: "failed_count",
+    Notification.CANCELLED: "cancelled_count",
+    Notification.OPTED_OUT: "skipped_count",
+    Notification.COALESCED: "skipped_count",
+}
+
+
+def _update_batch_counters(deltas) -> None:
+    """Apply {batch id: Counter of counter deltas} with one UPDATE per batch."""
+    for batch_id, counters in deltas.items():
+        values = {
+            # Never below zero, e.g. for notifications counted before a counter existed.
+            counter: F(counter) + count if count > 0 else Greatest(F(counter) + count, 0)
+            for counter, count in counters.items()
+            if count
+        }
+        if values:
+            NotificationBatch.objects.filter(pk=batch_id).update(**values)
+
+
+def increment_batch_counters(notifications, counter: str) -> None:
+    """Add notifications to a counter of their NotificationBatches.
+
+    Args:
+        notifications (iterable): Notifications, of which those with a batch are counted.
+        counter (str): The counter field, e.g. "delivered_count".
+    """
+    counts = Counter(
+        notification.batch_id for notification in notifications if notification.batch_id
+    )
+    _update_batch_counters(
+        {batch_id: Counter({counter: count}) for batch_id, count in counts.items()}
+    )
+
+
+def set_notification_status(queryset, status: str, **values) -> int:
+    """Change the status of notifications with one UPDATE, keeping the
+    counters of their NotificationBatches in step.
+
+    The notifications that belong to a batch are locked and read first, so
+    each is moved from the counter of its old status (see `BATCH_COUNTERS`)
+    to the counter of its new one exactly once. Use this rather than a plain
+    `update(status=...)` whenever notifications may belong to a batch.
+
+    Args:
+        queryset (QuerySet): The notifications to change.
+        status (str): The new status.
+        **values: Other fields to set with the same UPDATE.
+
+    Returns:
+        int: The number of notifications changed.
+    """
+    with transaction.atomic(using=queryset.db):
+        moved = Counter(
+            queryset.filter(batch__isnull=False)
+            .select_for_update()
+            .values_list("batch_id", "status")
+        )
+        updated = queryset.update(status=status, **values)
+
+        deltas = {}
+        for (batch_id, old_status), count in moved.items():
+            counters = deltas.setdefault(batch_id, Counter())
+            if old_status in BATCH_COUNTERS:
+                counters[BATCH_COUNTERS[old_status]] -= count
+            if status in BATCH_COUNTERS:
+                counters[BATCH_COUNTERS[status]] += count
+        _update_batch_counters(deltas)
+    return updated
+
+
+REQUEUEABLE_STATUSES = [
+    Notification.CANCELLED,
+    Notification.DELIVERY_FAILURE,
+    Notification.INACTIVE_DEVICE,
+    Notification.RETRY,
+    Notification.THROTTLED,
+]
+PENDING_STATUSES = [Notification.SCHEDULED, Notification.RETRY]
+
+
+def update_in_chunks(queryset, values: dict, batch_size: int = 5000, progress=None) -> int:
+    """Apply an UPDATE to a (possibly huge) queryset in chunks of primary keys.
+
+    Only primary keys are read, in keyset pages, and each page is updated with
+    one UPDATE statement in its own transaction. No model instances are
+    loaded, so neither `save()` nor `clean()` run.
+
+    Args:
+        queryset (QuerySet): The rows to update. The filters are applied again
+            by each UPDATE, so rows changed in the meantime are left alone.
+        values (dict): The field values to set.
+        batch_size (int, optional): Number of rows per UPDATE. Defaults to 5000.
+        progress (callable, optional): Called with the number of rows updated
+            so far after each chunk.
+
+    Returns:
+        int: The number of rows updated.
+    """
+    pks = queryset.order_by("pk").values_list("pk", flat=True)
+    updated = 0
+    last_pk = None
+    while True:
+        page = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+        chunk = list(page[:batch_size])
+        if not chunk:
+            return updated
+        last_pk = chunk[-1]
+        with transaction.atomic(using=queryset.db):
+            if "status" in values:
+                # Through `set_notification_status`, to keep batch counters right.
+                updated += set_notification_status(queryset.filter(pk__in=chunk), **values)
+            else:
+                updated += queryset.filter(pk__in=chunk).update(**values)
+        if progress is not None:
+            progress(updated)
+
+
+def requeueable_notifications(queryset):
+    """Narrow notifications down to those `requeue_notifications` would requeue.
+
+    Notifications of opted out users are left alone: the dispatch query does
+    not look up opt outs, so requeueing them would message the user again.
+
+    Args:
+        queryset (QuerySet): The notifications.
+
+    Returns:
+        QuerySet: The failed, throttled or cancelled notifications of users
+        who did not opt out.
+    """
+    return queryset.filter(status__in=REQUEUEABLE_STATUSES).exclude(
+        target_user_record__user__notification_opt_out__active=True
+    )
+
+
+def requeue_notifications(queryset, batch_size: int = 5000, progress=None) -> int:
+    """Schedule failed, throttled or cancelled notifications for delivery right away.
+
+    Retry attempts are reset. Notifications with any other status, and those
+    of opted out users, are skipped. The queue backend is notified, so a
+    dispatch daemon picks the notifications up right away.
+
+    Args:
+        queryset (QuerySet): The notifications to requeue.
+        batch_size (int, optional): Number of notifications per UPDATE. Defaults to 5000.
+        progress (callable, optional): See `update_in_chunks`.
+
+    Returns:
+        int: The number of notifications requeued.
+    """
+    now = timezone.now()
+    requeued = update_in_chunks(
+        requeueable_notifications(queryset),
+        {
+            "status": Notification.SCHEDULED,
+            "scheduled_delivery": now,
+            "attempted_delivery": None,
+            "retry_attempts": 0,
+            "push_ticket_id": None,
+            "modified_date": now,
+        },
+        batch_size,
+        progress,
+    )
+    if requeued:
+        get_queue().notify()
+    return requeued
+
+
+def cancel_notifications(queryset, batch_size: int = 5000, progress=None) -> int:
+    """Cancel pending (SCHEDULED or RETRY) notifications.
+
+    Args:
+        queryset (QuerySet): The notifications to cancel.
+        batch_size (int, optional): Number of notifications per UPDATE. Defaults to 5000.
+        progress (callable, optional): See `update_in_chunks`.
+
+    Returns:
+        int: The number of notifications cancelled.
+    """
+    return update_in_chunks(
+        queryset.filter(status__in=PENDING_STATUSES),
+        {"status": Notification.CANCELLED, "modified_date": timezone.now()},
+        batch_size,
+        progress,
+    )
+
+
+def reschedule_notifications(
+    queryset, scheduled_delivery, batch_size: int = 5000, progress=None
+) -> int:
+    """Move the delivery of pending (SCHEDULED or RETRY) notifications.
+
+    Args:
+        queryset (QuerySet): The notifications to reschedule.
+        scheduled_delivery (datetime): The new delivery date/time.
+        batch_size (int, optional): Number of notifications per UPDATE. Defaults to 5000.
+        progress (callable, optional): See `update_in_chunks`.
+
+    Returns:
+        int: The number of notifications rescheduled.
+    """
+    return update_in_chunks(
+        queryset.filter(status__in=PENDING_STATUSES),
+        {"scheduled_delivery": scheduled_delivery, "modified_date": timezone.now()},
+        batch_size,
+        progress,
+    )
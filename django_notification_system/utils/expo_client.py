@@ -0,0 +1,131 @@
+"""
+An Expo push client that keeps track of push ticket ids and can fetch push receipts.
+
+The Expo SDK we depend on discards the id of each push ticket, which is needed
+to look up the push receipt that reports whether a notification was actually
+delivered. See https://docs.expo.io/push-notifications/sending-notifications/
+"""
+import json
+
+from django.conf import settings
+from exponent_server_sdk import PushClient as BasePushClient
+from exponent_server_sdk import PushResponse, PushServerError
+
+from .http import get_session, get_timeout
+
+
+class PushTicket(PushResponse):
+    """A PushResponse that also carries the id of its Expo push ticket."""
+
+    def __new__(cls, push_message, status, message, details, id=None):
+        ticket = super().__new__(cls, push_message, status, message, details)
+        ticket.id = id
+        return ticket
+
+
+class PushClient(BasePushClient):
+    """
+    Expo push client returning PushTickets and supporting push receipts.
+
+    Requests go through the pooled session of `utils.http`, with the timeouts
+    of the "expo" target in NOTIFICATION_SYSTEM_TARGETS. Its "host" setting,
+    if any, replaces the Expo host.
+    """
+
+    # Expo accepts at most this many ticket ids per receipts request.
+    MAX_RECEIPT_IDS = 1000
+
+    def __init__(self, host=None, api_url=None, timeout=None, session=None):
+        expo_settings = getattr(settings, "NOTIFICATION_SYSTEM_TARGETS", {}).get("expo", {})
+        super().__init__(host=host or expo_settings.get("host"), api_url=api_url)
+        self.timeout = timeout or get_timeout("expo")
+        self.session = session or get_session()
+
+    def _post(self, path, payload):
+        """
+        POST `payload` to the Expo API and return the `data` of the response.
+
+        Raises:
+            PushServerError: When the response is malformed or reports errors.
+            requests.HTTPError: For any remaining 4xx and 5xx responses.
+            requests.RequestException: For timeouts and connection errors.
+        """
+        response = self.session.post(
+            self.host + self.api_url + path,
+            data=json.dumps(payload),
+            headers={
+                "accept": "application/json",
+                "accept-encoding": "gzip, deflate",
+                "content-type": "application/json",
+            },
+            timeout=self.timeout,
+        )
+
+        try:
+            response_data = response.json()
+        except ValueError:
+            response.raise_for_status()
+            raise PushServerError("Invalid server response", response)
+
+        if "errors" in response_data:
+            raise PushServerError(
+                "Request failed",
+                response,
+                response_data=response_data,
+                errors=response_data["errors"],
+            )
+        if "data" not in response_data:
+            raise PushServerError(
+                "Invalid server response", response, response_data=response_data
+            )
+
+        response.raise_for_status()
+        return response_data["data"]
+
+    def _publish_internal(self, push_messages):
+        data = self._post("/push/send", [pm.get_payload() for pm in push_messages])
+
+        if len(push_messages) != len(data):
+            raise PushServerError(
+                "Mismatched response length. Expected {} tickets but only received {}".format(
+                    len(push_messages), len(data)
+                ),
+                None,
+                response_data=data,
+            )
+
+        return [
+            PushTicket(
+                push_message=push_message,
+                # If there is no status, assume error.
+                status=ticket.get("status", PushResponse.ERROR_STATUS),
+                message=ticket.get("message", ""),
+                details=ticket.get("details", None),
+                id=ticket.get("id"),
+            )
+            for push_message, ticket in zip(push_messages, data)
+        ]
+
+    def get_receipts(self, ticket_ids):
+        """
+        Fetch the push receipts of the given push tickets.
+
+        Args:
+            ticket_ids ([str]): The ids of the push tickets. Requests are split
+                into chunks of MAX_RECEIPT_IDS ids.
+
+        Returns:
+            dict: Receipts (dictionaries with `status`, and for errors `message`
+            and `details` keys) keyed by ticket id. Receipts that are not
+            available yet are absent.
+        """
+        ticket_ids = list(ticket_ids)
+        receipts = {}
+        for start in range(0, len(ticket_ids), self.MAX_RECEIPT_IDS):
+            receipts.update(
+                self._post(
+                    "/push/getReceipts",
+                    {"ids": ticket_ids[start:start + self.MAX_RECEIPT_IDS]},
+                )
+            )
+        return receipts
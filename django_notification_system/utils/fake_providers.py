@@ -0,0 +1,240 @@
+"""
+Local stand-ins for the notification providers, for load tests.
+
+Each fake runs in-process on a background thread, listens on 127.0.0.1 and
+answers like the real thing, after an optional latency and with an optional
+error rate:
+
+* `FakeExpoServer`: the Expo push API (push/send and push/getReceipts).
+* `FakeTwilioServer`: the Twilio messages API.
+* `SMTPSink`: an SMTP server that accepts every message and discards it.
+
+Example:
+
+    with FakeExpoServer(latency=0.05, error_rate=0.01) as expo:
+        settings.NOTIFICATION_SYSTEM_TARGETS["expo"] = {"host": expo.url}
+        call_command("process_notifications")
+    print(expo.requests, expo.errors)
+"""
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+import uuid
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class _FakeProvider:
+    """Starting, stopping and the shared latency and error rate of the fakes."""
+
+    server_class = None
+    handler_class = None
+
+    def __init__(self, latency: float = 0, error_rate: float = 0, seed: int = None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.server = None
+        self._lock = threading.Lock()
+
+    @property
+    def host(self):
+        return self.server.server_address[0]
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    @property
+    def url(self):
+        return "http://{}:{}".format(self.host, self.port)
+
+    def start(self):
+        """Start serving on a free port of 127.0.0.1."""
+        handler = type(self.handler_class.__name__, (self.handler_class,), {"provider": self})
+        self.server = self.server_class(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        """Stop serving."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle_request(self) -> bool:
+        """
+        Count a request and take the configured nap.
+
+        Returns:
+            bool: Whether the request should fail.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            failed = self.random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        return failed
+
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    provider = None
+
+    def read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client timed out before we answered.
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class _ExpoHandler(_JSONHandler):
+    def do_POST(self):
+        body = self.read_body()
+        failed = self.provider.handle_request()
+        if self.path.endswith("/push/send"):
+            if failed:
+                self.send_json(503, {"errors": [{"code": "INTERNAL", "message": "Fake outage"}]})
+                return
+            messages = json.loads(body or b"[]")
+            if isinstance(messages, dict):
+                messages = [messages]
+            self.send_json(200, {
+                "data": [{"status": "ok", "id": str(uuid.uuid4())} for _ in messages]
+            })
+        elif self.path.endswith("/push/getReceipts"):
+            ids = json.loads(body or b"{}").get("ids", [])
+            self.send_json(200, {"data": {ticket_id: {"status": "ok"} for ticket_id in ids}})
+        else:
+            self.send_json(404, {"errors": [{"code": "NOT_FOUND", "message": self.path}]})
+
+
+class FakeExpoServer(_FakeProvider):
+    """
+    A fake Expo push API. Point the "host" of the "expo" target of
+    NOTIFICATION_SYSTEM_TARGETS to its `url`. Failed requests get a 503.
+    """
+
+    server_class = ThreadingHTTPServer
+    handler_class = _ExpoHandler
+
+
+class _TwilioHandler(_JSONHandler):
+    MESSAGES = re.compile(r"^/2010-04-01/Accounts/(?P<account_sid>[^/]+)/Messages\.json$")
+
+    def do_POST(self):
+        form = parse_qs(self.read_body().decode())
+        match = self.MESSAGES.match(self.path)
+        if match is None:
+            self.send_json(404, {"code": 20404, "message": "Not found", "status": 404})
+            return
+        if self.provider.handle_request():
+            self.send_json(500, {"code": 20500, "message": "Fake outage", "status": 500})
+            return
+        sid = "SM" + uuid.uuid4().hex
+        now = formatdate(usegmt=True)
+        # A complete message resource, as older twilio releases read every field.
+        self.send_json(201, {
+            "sid": sid,
+            "account_sid": match.group("account_sid"),
+            "api_version": "2010-04-01",
+            "body": form.get("Body", [""])[0],
+            "date_created": now,
+            "date_updated": now,
+            "date_sent": None,
+            "direction": "outbound-api",
+            "error_code": None,
+            "error_message": None,
+            "from": form.get("From", [""])[0],
+            "messaging_service_sid": None,
+            "num_media": "0",
+            "num_segments": "1",
+            "price": None,
+            "price_unit": "USD",
+            "status": "queued",
+            "subresource_uris": {},
+            "to": form.get("To", [""])[0],
+            "uri": "{}/{}.json".format(self.path[:-len(".json")], sid),
+        })
+
+
+class FakeTwilioServer(_FakeProvider):
+    """
+    A fake Twilio messages API. Set it as the "base_url" of the "twilio_sms"
+    target of NOTIFICATION_SYSTEM_TARGETS. Failed requests get a 500.
+    """
+
+    server_class = ThreadingHTTPServer
+    handler_class = _TwilioHandler
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    provider = None
+
+    def reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        self.reply("220 localhost Fake SMTP sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip().split(" ", 1)[0].upper()
+            if command == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250 8BITMIME")
+            elif command in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                if self.provider.handle_request():
+                    self.reply("451 Fake outage, try again later")
+                else:
+                    self.reply("250 OK: queued")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+
+
+class SMTPSink(_FakeProvider):
+    """
+    An SMTP server that accepts and discards every message. Set EMAIL_HOST and
+    EMAIL_PORT to its `host` and `port`. Failed messages get a 451.
+    """
+
+    server_class = _ThreadingTCPServer
+    handler_class = _SMTPHandler
@@ -0,0 +1,62 @@
+"""Network timeouts and pooled HTTP sessions for the notification handlers."""
+import threading
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds, used when a target configures none.
+DEFAULT_TIMEOUT = (5, 30)
+
+_local = threading.local()
+
+
+def get_timeout(target_key: str, default: tuple = DEFAULT_TIMEOUT) -> tuple:
+    """Return the (connect, read) timeouts configured for a target.
+
+    Timeouts are configured in NOTIFICATION_SYSTEM_TARGETS, either as a single
+    number of seconds used for both, or as a dictionary:
+
+        NOTIFICATION_SYSTEM_TARGETS = {
+            "expo": {"timeout": {"connect": 3.05, "read": 10}},
+            "twilio_sms": {..., "timeout": 10},
+        }
+
+    Args:
+        target_key (str): The key of the target in NOTIFICATION_SYSTEM_TARGETS,
+            e.g. "expo", "twilio_sms" or "email".
+        default (tuple, optional): Used when the target configures no timeout.
+            Defaults to DEFAULT_TIMEOUT.
+
+    Returns:
+        tuple: The connect and read timeouts in seconds.
+    """
+    targets = getattr(settings, "NOTIFICATION_SYSTEM_TARGETS", {})
+    timeout = targets.get(target_key, {}).get("timeout")
+    if timeout is None:
+        return default
+    if isinstance(timeout, dict):
+        return (
+            timeout.get("connect", default[0]),
+            timeout.get("read", default[1]),
+        )
+    return (timeout, timeout)
+
+
+def get_session() -> requests.Session:
+    """Return the pooled, keep-alive HTTP session of the current thread.
+
+    Reusing the session across notifications keeps connections (and their TLS
+    handshakes) open between sends. Sessions are not shared between threads.
+
+    Returns:
+        requests.Session: The session.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
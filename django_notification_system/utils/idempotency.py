@@ -0,0 +1,53 @@
+"""In-process cache of recently used idempotency keys."""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class RecentKeyCache:
+    """
+    A thread-safe, size-bounded set of recently seen keys that expire after `ttl` seconds.
+
+    Args:
+        max_size (int): The maximum number of keys kept. The least recently
+            added keys are evicted first.
+        ttl (float): The number of seconds a key is remembered for.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            expires = self._keys.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._keys[key]
+                return False
+            return True
+
+    def add(self, key):
+        """Remember `key` for the next `ttl` seconds."""
+        with self._lock:
+            self._keys.pop(key, None)
+            self._keys[key] = time.monotonic() + self.ttl
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+
+    def clear(self):
+        """Forget all keys."""
+        with self._lock:
+            self._keys.clear()
+
+
+# Keys of creator calls that recently created notifications in this process.
+recent_idempotency_keys = RecentKeyCache(
+    max_size=getattr(settings, "NOTIFICATION_SYSTEM_IDEMPOTENCY_CACHE_SIZE", 10000),
+    ttl=getattr(settings, "NOTIFICATION_SYSTEM_IDEMPOTENCY_CACHE_TTL", 300),
+)
@@ -0,0 +1,135 @@
+"""Rollups of the notification queue for the queue health dashboard."""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from ..models import Notification, QueueHealthSnapshot
+
+# Windows, in seconds, over which recent delivery attempts are counted.
+DEFAULT_WINDOWS = (300, 3600, 86400)
+
+PENDING_STATUSES = [Notification.SCHEDULED, Notification.RETRY]
+ATTEMPTED_STATUSES = [
+    Notification.DELIVERED,
+    Notification.DELIVERY_FAILURE,
+    Notification.INACTIVE_DEVICE,
+    Notification.RETRY,
+]
+
+
+def refresh_queue_health(now=None, windows=DEFAULT_WINDOWS, keep=timedelta(days=7)):
+    """Take a new queue health snapshot with two aggregate queries.
+
+    Args:
+        now (datetime, optional): The snapshot date. Defaults to timezone.now().
+        windows (tuple, optional): Window lengths in seconds for recent counts.
+        keep (timedelta, optional): Older snapshots are deleted. Defaults to 7 days.
+
+    Returns:
+        [QueueHealthSnapshot]: The rows of the new snapshot.
+    """
+    now = now or timezone.now()
+    rows = {}
+
+    def row(target, status):
+        if (target, status) not in rows:
+            rows[target, status] = QueueHealthSnapshot(
+                snapshot_date=now, target=target, status=status
+            )
+        return rows[target, status]
+
+    due = Q(scheduled_delivery__lte=now)
+    for pending in (
+        Notification.objects.filter(status__in=PENDING_STATUSES)
+        .order_by()
+        .values("target_user_record__target__name", "status", "retry_attempts")
+        .annotate(
+            count=Count("id"),
+            due=Count("id", filter=due),
+            oldest_due=Min("scheduled_delivery", filter=due),
+        )
+    ):
+        snapshot = row(pending["target_user_record__target__name"], pending["status"])
+        snapshot.pending_count += pending["count"]
+        snapshot.due_count += pending["due"]
+        if pending["oldest_due"] and (
+            snapshot.oldest_due is None or pending["oldest_due"] < snapshot.oldest_due
+        ):
+            snapshot.oldest_due = pending["oldest_due"]
+        snapshot.retry_distribution[str(pending["retry_attempts"])] = pending["count"]
+
+    for attempted in (
+        Notification.objects.filter(
+            status__in=ATTEMPTED_STATUSES,
+            attempted_delivery__gte=now - timedelta(seconds=max(windows)),
+        )
+        .order_by()
+        .values("target_user_record__target__name", "status")
+        .annotate(
+            **{
+                f"window_{window}": Count(
+                    "id", filter=Q(attempted_delivery__gte=now - timedelta(seconds=window))
+                )
+                for window in windows
+            }
+        )
+    ):
+        snapshot = row(attempted["target_user_record__target__name"], attempted["status"])
+        snapshot.recent_counts = {
+            str(window): attempted[f"window_{window}"] for window in windows
+        }
+
+    with transaction.atomic():
+        snapshots = QueueHealthSnapshot.objects.bulk_create(rows.values())
+        QueueHealthSnapshot.objects.filter(snapshot_date__lt=now - keep).delete()
+    return snapshots
+
+
+def queue_health_summary(snapshots) -> dict:
+    """Summarize snapshot rows as a JSON serializable dictionary.
+
+    Args:
+        snapshots (iterable): The rows of one snapshot, e.g. `QueueHealthSnapshot.latest()`.
+
+    Returns:
+        dict: The snapshot date, and per target the rows by status along with
+        the totals of pending and due notifications, the oldest due notification
+        and recent failure rates.
+    """
+    summary = {"snapshot_date": None, "targets": {}}
+    for snapshot in snapshots:
+        summary["snapshot_date"] = snapshot.snapshot_date
+        target = summary["targets"].setdefault(
+            snapshot.target,
+            {"pending": 0, "due": 0, "oldest_due": None, "statuses": {}},
+        )
+        target["pending"] += snapshot.pending_count
+        target["due"] += snapshot.due_count
+        if snapshot.oldest_due and (
+            target["oldest_due"] is None or snapshot.oldest_due < target["oldest_due"]
+        ):
+            target["oldest_due"] = snapshot.oldest_due
+        target["statuses"][snapshot.status] = {
+            "pending": snapshot.pending_count,
+            "due": snapshot.due_count,
+            "oldest_due": snapshot.oldest_due,
+            "recent": snapshot.recent_counts,
+            "retry_distribution": snapshot.retry_distribution,
+        }
+
+    for target in summary["targets"].values():
+        windows = {
+            window for status in target["statuses"].values() for window in status["recent"]
+        }
+        failure_rates = {}
+        for window in sorted(windows, key=int):
+            count = target["statuses"].get(Notification.DELIVERED, {}).get("recent", {}).get(window, 0)
+            failed = sum(
+                target["statuses"].get(status, {}).get("recent", {}).get(window, 0)
+                for status in (Notification.DELIVERY_FAILURE, Notification.RETRY)
+            )
+            failure_rates[window] = round(failed / (count + failed), 4) if count + failed else None
+        target["failure_rates"] = failure_rates
+    return summary
@@ -0,0 +1 @@
+"""Views of the Django Notification System, routed by its `urls` module."""
@@ -0,0 +1,135 @@
+"""Endpoints to blast a notification to an audience and follow its progress."""
+import json
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth import get_user_model
+from django.core.exceptions import FieldError, ValidationError
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.decorators import method_decorator
+from django.views import View
+
+from ..models import NotificationBatch, NotificationTarget
+from ..routing import DEFAULT_CHANNELS
+
+
+def blast_progress(batch: NotificationBatch) -> dict:
+    """Summarize the progress of a blast as a JSON serializable dictionary."""
+    return {
+        "id": batch.id,
+        "name": batch.name,
+        "status": batch.status,
+        "fanned_out": batch.fanout_completed is not None,
+        "fanout_completed": batch.fanout_completed,
+        "audience_count": batch.audience_count,
+        "scheduled_count": batch.scheduled_count,
+        "delivered_count": batch.delivered_count,
+        "failed_count": batch.failed_count,
+        "cancelled_count": batch.cancelled_count,
+        "skipped_count": batch.skipped_count,
+        "remaining_count": batch.remaining_count,
+    }
+
+
+@method_decorator(staff_member_required, name="dispatch")
+class NotificationBlasterView(View):
+    """
+    Blast a notification to every user matching an audience filter.
+
+    The request body is a JSON object with a `title`, a `body` and an
+    `audience` of user field lookups, e.g. {"groups__name": "Volunteers"}, and
+    optionally a `name`, `channels` and a `scheduled_delivery`. Only the blast
+    is saved here; its notifications are created in the background by the
+    `process_notification_blasts` management command, so the response comes
+    back immediately no matter how large the audience is.
+    """
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({"error": "The request body must be JSON."}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "The request body must be an object."}, status=400)
+
+        errors = {}
+        title = data.get("title")
+        body = data.get("body")
+        if not title or not isinstance(title, str):
+            errors["title"] = "A title is required."
+        elif len(title) > 100:
+            errors["title"] = "The title can be at most 100 characters."
+        if not body or not isinstance(body, str):
+            errors["body"] = "A body is required."
+
+        audience = data.get("audience")
+        if not isinstance(audience, dict):
+            errors["audience"] = "The audience must be an object of user field lookups."
+        elif any("password" in lookup for lookup in audience):
+            errors["audience"] = "Users can not be selected by password."
+        else:
+            try:
+                # Building the query is enough to validate the lookups.
+                str(get_user_model().objects.filter(**audience).query)
+            except (FieldError, TypeError, ValueError, ValidationError) as error:
+                errors["audience"] = str(error)
+
+        channels = data.get("channels") or list(DEFAULT_CHANNELS)
+        if not isinstance(channels, list) or not all(
+            isinstance(channel, str) for channel in channels
+        ):
+            errors["channels"] = "The channels must be a list of notification target names."
+        else:
+            unknown = set(channels) - set(
+                NotificationTarget.objects.filter(name__in=channels).values_list(
+                    "name", flat=True
+                )
+            )
+            if unknown:
+                errors["channels"] = "Unknown notification targets: {}".format(
+                    ", ".join(sorted(unknown))
+                )
+
+        scheduled_delivery = timezone.now()
+        if data.get("scheduled_delivery"):
+            try:
+                scheduled_delivery = parse_datetime(data["scheduled_delivery"])
+            except (TypeError, ValueError):
+                scheduled_delivery = None
+            if scheduled_delivery is None:
+                errors["scheduled_delivery"] = "The scheduled delivery must be an ISO 8601 date and time."
+            elif timezone.is_naive(scheduled_delivery):
+                scheduled_delivery = timezone.make_aware(scheduled_delivery)
+
+        if errors:
+            return JsonResponse({"errors": errors}, status=400)
+
+        batch = NotificationBatch.objects.create(
+            name=str(data.get("name") or title)[:200],
+            audience=audience,
+            title=title,
+            body=body,
+            channels=channels,
+            scheduled_delivery=scheduled_delivery,
+        )
+        return JsonResponse(blast_progress(batch), status=202)
+
+
+@method_decorator(staff_member_required, name="dispatch")
+class NotificationsBlastedView(View):
+    """
+    Report the progress of a blast, or of the most recent blasts.
+
+    Progress is read from the counters of the blast's NotificationBatch, so it
+    never counts notifications.
+    """
+
+    def get(self, request, pk=None):
+        blasts = NotificationBatch.objects.filter(audience__isnull=False)
+        if pk is not None:
+            return JsonResponse(blast_progress(get_object_or_404(blasts, pk=pk)))
+        return JsonResponse(
+            {"blasts": [blast_progress(batch) for batch in blasts.order_by("-created_date")[:50]]}
+        )
@@ -0,0 +1,16 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from ..models import QueueHealthSnapshot
+from ..utils.queue_health import queue_health_summary
+
+
+@staff_member_required
+def queue_health(request):
+    """
+    Return the latest queue health snapshot as JSON.
+
+    The snapshot is refreshed by the `refresh_queue_health` management command,
+    so this view never aggregates the notification table itself.
+    """
+    return JsonResponse(queue_health_summary(QueueHealthSnapshot.latest()))